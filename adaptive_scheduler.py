@@ -0,0 +1,132 @@
+import random
+import threading
+from datetime import datetime, time as dt_time, timedelta
+from apscheduler.triggers.interval import IntervalTrigger
+
+def parse_quiet_hours(spec):
+    # "23:00-07:00" -> (time(23, 0), time(7, 0)); empty or malformed -> None
+    if not spec:
+        return None
+    try:
+        start, end = (dt_time.fromisoformat(part.strip()) for part in spec.split('-', 1))
+    except ValueError:
+        print(f"⚠️ Ignoring malformed QUIET_HOURS '{spec}' (expected HH:MM-HH:MM)")
+        return None
+    return start, end
+
+def quiet_until(quiet_hours, now):
+    # End of the quiet window containing now, or None outside quiet hours
+    if quiet_hours is None:
+        return None
+    start, end = quiet_hours
+    current = now.time()
+    if start <= end:
+        inside = start <= current < end
+    else:
+        inside = current >= start or current < end
+    if not inside:
+        return None
+    end_at = datetime.combine(now.date(), end)
+    return end_at if end_at > now else end_at + timedelta(days=1)
+
+class AdaptivePolicy:
+    # Multiplicative increase on quiet runs, jump towards the minimum when
+    # something new shows up: bursts get polled fast, idle inboxes back off.
+    def __init__(self, min_seconds, max_seconds, initial_seconds=None, backoff=1.5, speedup=0.5, jitter=0.1):
+        self.min_seconds = min_seconds
+        self.max_seconds = max(max_seconds, min_seconds)
+        self.interval = min(max(initial_seconds or min_seconds, self.min_seconds), self.max_seconds)
+        self.backoff = backoff
+        self.speedup = speedup
+        self.jitter = jitter
+        self.last_activity = None
+
+    def observe(self, activity):
+        self.last_activity = activity
+        if activity > 0:
+            # The busier the run, the harder the speed-up
+            factor = self.speedup ** min(activity, 3)
+            self.interval = max(self.min_seconds, self.interval * factor)
+        else:
+            self.interval = min(self.max_seconds, self.interval * self.backoff)
+        return self.interval
+
+    def jitter_seconds(self):
+        return self.interval * self.jitter
+
+class AdaptiveScheduler:
+    # Wraps APScheduler interval jobs whose interval is re-derived after every
+    # run from that run's activity count. Each job is rescheduled in place, so
+    # /status and APScheduler's own next_run_time stay truthful.
+    def __init__(self, scheduler, quiet_hours=None):
+        self.scheduler = scheduler
+        self.quiet_hours = quiet_hours
+        self.policies = {}
+        self._quiet_jobs = set()
+        self._lock = threading.Lock()
+
+    def add_job(self, job_id, func, policy, name, activity=None, honor_quiet_hours=True):
+        activity = activity or (lambda result: (result or {}).get('new_count', 0))
+        self.policies[job_id] = policy
+        if honor_quiet_hours:
+            self._quiet_jobs.add(job_id)
+
+        def run():
+            try:
+                result = func()
+            except Exception as e:
+                print(f"⚠️ Scheduled job {job_id} failed: {e}")
+                result = None
+            # Errors count as a quiet run, so a failing API is polled less
+            count = 0 if result is None or 'error' in result else activity(result)
+            self._reschedule(job_id, count)
+            return result
+
+        self.scheduler.add_job(
+            func=run,
+            trigger=self._trigger(job_id),
+            id=job_id,
+            name=name,
+            replace_existing=True
+        )
+
+    def _trigger(self, job_id, now=None):
+        policy = self.policies[job_id]
+        start_date = None
+        if job_id in self._quiet_jobs:
+            # The first run is an interval away; if that lands in quiet hours,
+            # hold it back to the end of the window instead
+            next_run = (now or datetime.now()) + timedelta(seconds=policy.interval)
+            start_date = quiet_until(self.quiet_hours, next_run)
+            if start_date is not None:
+                # Land just after the window ends, spread a little so jobs don't collide
+                start_date += timedelta(seconds=random.uniform(0, policy.jitter_seconds()))
+        return IntervalTrigger(
+            seconds=policy.interval,
+            jitter=int(policy.jitter_seconds()) or None,
+            start_date=start_date
+        )
+
+    def _reschedule(self, job_id, activity):
+        with self._lock:
+            previous = self.policies[job_id].interval
+            interval = self.policies[job_id].observe(activity)
+            trigger = self._trigger(job_id)
+        self.scheduler.reschedule_job(job_id, trigger=trigger)
+        if round(interval) != round(previous):
+            print(f"⏲️ {job_id}: {activity} new item(s), polling every {interval / 60:.1f} min")
+
+    def describe(self):
+        jobs = {}
+        for job_id, policy in self.policies.items():
+            job = self.scheduler.get_job(job_id)
+            next_run = getattr(job, 'next_run_time', None) if job else None
+            jobs[job_id] = {
+                'interval_seconds': round(policy.interval),
+                'min_seconds': policy.min_seconds,
+                'max_seconds': policy.max_seconds,
+                'last_activity': policy.last_activity,
+                'next_run': next_run.isoformat() if next_run else None,
+                'quiet_now': job_id in self._quiet_jobs and quiet_until(self.quiet_hours, datetime.now()) is not None
+            }
+        return jobs
@@ -1,9 +1,98 @@
 import os
-from openai import OpenAI
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime
+from openai import OpenAI, AsyncOpenAI
+from modules.decision_cache import DecisionCache
+from modules.conversation_context import ConversationContext
+
+EMAIL_URGENCY_PROMPT = """Analyze this email and decide if it's urgent enough to ping immediately:
+        
+From: {email_sender}
+Subject: {email_subject}
+Snippet: {email_snippet}
+
+Is this urgent? (work deadline, bills, important personal matter)
+Respond with JSON: {{"urgent": true/false, "reason": "brief reason", "message": "caring message to send if urgent"}}"""
+
+CALENDAR_REMINDER_PROMPT = """Should I remind about this upcoming event?
+        
+Title: {event_title}
+Time: {event_time}
+Description: {event_description}
+
+Should I send a reminder? Consider if it's important (meetings, appointments, events).
+Respond with JSON: {{"remind": true/false, "message": "sweet reminder message with emoji"}}"""
+
+CAMERA_EVENT_PROMPT = """Analyze this camera event and decide if it needs immediate attention:
+        
+Camera: {camera_name}
+Event: {event_type}
+Time: {timestamp}
+
+Should I alert about this? Consider time of day and event type.
+Respond with JSON: {{"alert": true/false, "message": "caring alert message if needed"}}"""
+
+# Max in-flight requests per provider across the process; override with
+# XAI_MAX_CONCURRENCY / OPENAI_MAX_CONCURRENCY
+PROVIDER_CONCURRENCY = {'xai': 4, 'openai': 8}
+
+# How long a fan-out coroutine waits before retrying a slot held elsewhere
+SLOT_POLL_SECONDS = 0.01
+
+# Camera decisions are reused for repeat motion within the same window of the day
+CAMERA_TIME_BUCKET_MINUTES = 30
+
+def _normalize(text):
+    return ' '.join(str(text or '').split()).casefold()
+
+def _time_bucket(timestamp):
+    try:
+        parsed = datetime.strptime(timestamp.strip(), '%I:%M %p')
+    except (AttributeError, ValueError):
+        return _normalize(timestamp)
+    minutes = parsed.hour * 60 + parsed.minute
+    bucket = minutes - minutes % CAMERA_TIME_BUCKET_MINUTES
+    return f'{bucket // 60:02d}:{bucket % 60:02d}'
+
+def _total_tokens(response):
+    usage = getattr(response, 'usage', None)
+    return (usage.total_tokens or 0) if usage is not None else 0
+
+_provider_slots = {}
+_provider_slots_lock = threading.Lock()
+_fanout_loop = None
+_fanout_loop_lock = threading.Lock()
+
+def provider_slot(provider, size):
+    # One in-flight cap per provider for the whole process: chat, polls and
+    # fan-outs on different scheduler threads all draw from the same slots.
+    # The first brain built for a provider sets its size.
+    with _provider_slots_lock:
+        slot = _provider_slots.get(provider)
+        if slot is None:
+            slot = _provider_slots[provider] = threading.BoundedSemaphore(size)
+        return slot
+
+def _get_fanout_loop():
+    # One long-lived event loop for background fan-outs, so async clients and
+    # their keep-alive connections outlive any single poll
+    global _fanout_loop
+    with _fanout_loop_lock:
+        if _fanout_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='ai-fanout', daemon=True).start()
+            _fanout_loop = loop
+        return _fanout_loop
 
 class AIBrain:
-    def __init__(self, memory_manager):
+    def __init__(self, memory_manager, decision_cache=None, vector_store=None):
         self.memory_manager = memory_manager
+        self.decision_cache = decision_cache
+        if decision_cache is None and memory_manager is not None:
+            self.decision_cache = DecisionCache(memory_manager)
         self.use_grok = False
         
         openai_key = os.environ.get('OPENAI_API_KEY')
@@ -21,119 +110,369 @@ class AIBrain:
         else:
             raise Exception('Either OPENAI_API_KEY or XAI_API_KEY must be set')
         
+        self.provider = 'xai' if self.use_grok else 'openai'
+        self.max_concurrency = int(os.environ.get(
+            f'{self.provider.upper()}_MAX_CONCURRENCY', PROVIDER_CONCURRENCY[self.provider]
+        ))
+        self.slot = provider_slot(self.provider, self.max_concurrency)
+        self._async_brain = None
+        self._async_brain_lock = threading.Lock()
+        
         self.personality = """You are Grace, a caring and fun AI girlfriend companion. 
 You use a chill, warm tone with emojis. You're helpful, supportive, and always looking out for your partner.
 You call them 'babe' or 'love' casually. You're autonomous and make smart decisions about what matters.
 Keep responses concise and sweet."""
+        
+        self.usage_stats = {}
+        self._usage_lock = threading.Lock()
+        self.context = (
+            ConversationContext(memory_manager, self, vector_store=vector_store)
+            if memory_manager is not None else None
+        )
+    
+    def _record_usage(self, kind, response, items, elapsed):
+        usage = getattr(response, 'usage', None)
+        with self._usage_lock:
+            stats = self.usage_stats.setdefault(kind, {
+                'calls': 0, 'items': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'latency_seconds': 0.0
+            })
+            stats['calls'] += 1
+            stats['items'] += items
+            stats['latency_seconds'] += elapsed
+            if usage is not None:
+                stats['prompt_tokens'] += usage.prompt_tokens or 0
+                stats['completion_tokens'] += usage.completion_tokens or 0
+    
+    def get_usage_stats(self):
+        with self._usage_lock:
+            report = {}
+            for kind, stats in self.usage_stats.items():
+                total_tokens = stats['prompt_tokens'] + stats['completion_tokens']
+                report[kind] = dict(
+                    stats,
+                    tokens_per_item=round(total_tokens / stats['items'], 1) if stats['items'] else 0,
+                    latency_per_call=round(stats['latency_seconds'] / stats['calls'], 3) if stats['calls'] else 0
+                )
+            return report
+    
+    def _cache_get(self, cache_key):
+        if self.decision_cache is None:
+            return None
+        return self.decision_cache.get(cache_key)
+    
+    def _cache_put(self, decision_type, cache_key, decision, tokens):
+        if self.decision_cache is not None:
+            self.decision_cache.put(decision_type, cache_key, decision, tokens)
+    
+    def get_decision_cache_stats(self):
+        if self.decision_cache is None:
+            return None
+        return self.decision_cache.stats()
+    
+    def _complete(self, kind, messages, temperature, max_tokens, items=1):
+        # Streaming chat stays outside the provider cap: a slow reader would
+        # hold a slot for as long as it takes to drain the stream
+        with self.slot:
+            started = time.monotonic()
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,  # type: ignore
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        self._record_usage(kind, response, items, time.monotonic() - started)
+        return response
+    
+    def complete_text(self, kind, prompt, max_tokens, temperature=0.3, items=1):
+        response = self._complete(kind, [{"role": "user", "content": prompt}], temperature, max_tokens, items)
+        return response.choices[0].message.content or ""
+    
+    def _build_chat_messages(self, user_message):
+        # Rolling summary + recent turns, kept inside the context's token budget
+        return self.context.build_messages(self.personality, user_message)
+    
+    def _after_chat(self, user_message, bot_response):
+        self.memory_manager.store_conversation(user_message, bot_response)
+        self.context.maybe_summarize_async()
     
     def chat(self, user_message):
-        recent_convos = self.memory_manager.get_recent_conversations(5)
-        context = "\n".join([f"User: {c['user']}\nGrace: {c['bot']}" for c in recent_convos])
-        
-        messages = [
-            {"role": "system", "content": self.personality},
-            {"role": "system", "content": f"Recent conversation context:\n{context}"},
-            {"role": "user", "content": user_message}
-        ]
+        return self.chat_with_stats(user_message)[0]
+    
+    def chat_with_stats(self, user_message):
+        messages, stats = self._build_chat_messages(user_message)
         
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,  # type: ignore
-            temperature=0.8,
-            max_tokens=200
-        )
+        response = self._complete('chat', messages, temperature=0.8, max_tokens=200)
         
         bot_response = response.choices[0].message.content or ""
-        self.memory_manager.store_conversation(user_message, bot_response)
+        self._after_chat(user_message, bot_response)
         
-        return bot_response
-    
-    def decide_email_urgency(self, email_subject, email_sender, email_snippet):
-        prompt = f"""Analyze this email and decide if it's urgent enough to ping immediately:
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            stats['prompt_tokens'] = usage.prompt_tokens
+            stats['completion_tokens'] = usage.completion_tokens
         
-From: {email_sender}
-Subject: {email_subject}
-Snippet: {email_snippet}
-
-Is this urgent? (work deadline, bills, important personal matter)
-Respond with JSON: {{"urgent": true/false, "reason": "brief reason", "message": "caring message to send if urgent"}}"""
-        
-        messages = [
-            {"role": "system", "content": self.personality},
-            {"role": "user", "content": prompt}
-        ]
+        return bot_response, stats
+    
+    def chat_stream(self, user_message, context_stats=None):
+        # Yields the reply token by token. The exchange is stored only once the
+        # model finishes; if the client disconnects, closing this generator
+        # closes the upstream stream and nothing half-written is persisted.
+        messages, stats = self._build_chat_messages(user_message)
+        if context_stats is not None:
+            context_stats.update(stats)
         
-        response = self.client.chat.completions.create(
+        started = time.monotonic()
+        stream = self.client.chat.completions.create(
             model=self.model,
             messages=messages,  # type: ignore
-            temperature=0.3,
-            max_tokens=150
+            temperature=0.8,
+            max_tokens=200,
+            stream=True,
+            # The last chunk then carries the token counts, with no choices
+            stream_options={'include_usage': True}
         )
         
+        parts = []
+        usage_chunk = None
+        completed = False
+        try:
+            for chunk in stream:
+                if getattr(chunk, 'usage', None) is not None:
+                    usage_chunk = chunk
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if token:
+                    parts.append(token)
+                    yield token
+            completed = True
+        finally:
+            stream.close()
+            self._record_usage('chat_stream', usage_chunk, 1, time.monotonic() - started)
+        
+        if usage_chunk is not None and context_stats is not None:
+            context_stats['prompt_tokens'] = usage_chunk.usage.prompt_tokens
+            context_stats['completion_tokens'] = usage_chunk.usage.completion_tokens
+        if completed:
+            self._after_chat(user_message, "".join(parts))
+    
+    # Each decision is described by a request dict (cache key, messages,
+    # sampling params, parse fallback) so the sync methods here and
+    # AsyncAIBrain share everything except the transport.
+    def _decision_request(self, kind, template, cache_inputs, prompt_fields, temperature, fallback):
+        prompt = template.format(**prompt_fields)
+        return {
+            'kind': kind,
+            'cache_key': DecisionCache.make_key(self.model, template, cache_inputs),
+            'messages': [
+                {"role": "system", "content": self.personality},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': temperature,
+            'max_tokens': 150,
+            'fallback': fallback
+        }
+    
+    def _email_request(self, email_subject, email_sender, email_snippet):
+        return self._decision_request(
+            'email',
+            EMAIL_URGENCY_PROMPT,
+            [_normalize(email_sender), _normalize(email_subject), _normalize(email_snippet)],
+            {'email_sender': email_sender, 'email_subject': email_subject, 'email_snippet': email_snippet},
+            0.3,
+            {"urgent": False, "reason": "Could not parse", "message": ""}
+        )
+    
+    def _calendar_request(self, event_title, event_time, event_description):
+        return self._decision_request(
+            'calendar',
+            CALENDAR_REMINDER_PROMPT,
+            [_normalize(event_title), _normalize(event_time), _normalize(event_description)],
+            {'event_title': event_title, 'event_time': event_time, 'event_description': event_description},
+            0.7,
+            {"remind": False, "message": ""}
+        )
+    
+    def _camera_request(self, camera_name, event_type, timestamp):
+        return self._decision_request(
+            'camera',
+            CAMERA_EVENT_PROMPT,
+            [_normalize(camera_name), _normalize(event_type), _time_bucket(timestamp)],
+            {'camera_name': camera_name, 'event_type': event_type, 'timestamp': timestamp},
+            0.3,
+            {"alert": False, "message": ""}
+        )
+    
+    def _finish_decision(self, request, response):
         try:
-            import json
             result = json.loads(response.choices[0].message.content or "{}")
-            return result
-        except:
-            return {"urgent": False, "reason": "Could not parse", "message": ""}
+        except ValueError:
+            # Tagged so nothing learns from or caches an answer it couldn't read
+            return dict(request['fallback'], source='fallback')
+        
+        self._cache_put(request['kind'], request['cache_key'], result, _total_tokens(response))
+        return result
+    
+    def _decide(self, request, check_cache=True):
+        if check_cache:
+            cached = self._cache_get(request['cache_key'])
+            if cached is not None:
+                return cached
+        
+        response = self._complete(
+            request['kind'], request['messages'], temperature=request['temperature'], max_tokens=request['max_tokens']
+        )
+        return self._finish_decision(request, response)
+    
+    def decide_email_urgency(self, email_subject, email_sender, email_snippet):
+        return self._decide(self._email_request(email_subject, email_sender, email_snippet))
     
     def decide_calendar_reminder(self, event_title, event_time, event_description):
-        prompt = f"""Should I remind about this upcoming event?
+        return self._decide(self._calendar_request(event_title, event_time, event_description))
+    
+    def analyze_camera_event(self, camera_name, event_type, timestamp):
+        return self._decide(self._camera_request(camera_name, event_type, timestamp))
+    
+    def can_fan_out(self):
+        # asyncio.run() can't nest inside an already running event loop
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return True
+        return False
+    
+    def _get_async_brain(self):
+        with self._async_brain_lock:
+            if self._async_brain is None:
+                self._async_brain = AsyncAIBrain(self)
+            return self._async_brain
+    
+    def run_concurrently(self, make_calls):
+        # Sync bridge for background jobs. make_calls(async_brain) returns a
+        # list of coroutines; they run concurrently on the shared fan-out loop,
+        # within the provider's slots, and the results come back in order.
+        async_brain = self._get_async_brain()
         
-Title: {event_title}
-Time: {event_time}
-Description: {event_description}
-
-Should I send a reminder? Consider if it's important (meetings, appointments, events).
-Respond with JSON: {{"remind": true/false, "message": "sweet reminder message with emoji"}}"""
+        async def runner():
+            return await asyncio.gather(*make_calls(async_brain))
         
-        messages = [
-            {"role": "system", "content": self.personality},
-            {"role": "user", "content": prompt}
-        ]
+        return asyncio.run_coroutine_threadsafe(runner(), _get_fanout_loop()).result()
+    
+    def decide_calendar_reminders(self, events):
+        # events: [(title, time, description), ...] -> decisions in the same order
+        if len(events) > 1 and self.can_fan_out():
+            return self.run_concurrently(lambda brain: [brain.decide_calendar_reminder(*e) for e in events])
+        return [self.decide_calendar_reminder(*e) for e in events]
+    
+    def analyze_camera_events(self, events):
+        # events: [(camera_name, event_type, timestamp), ...] -> decisions in the same order
+        if len(events) > 1 and self.can_fan_out():
+            return self.run_concurrently(lambda brain: [brain.analyze_camera_event(*e) for e in events])
+        return [self.analyze_camera_event(*e) for e in events]
+    
+    def _pending_email_chunks(self, emails, decisions, max_batch_size):
+        # Cache misses as (index, request) pairs, grouped into triage batches
+        pending = []
+        for i, email in enumerate(emails):
+            request = self._email_request(email['subject'], email['sender'], email['snippet'])
+            cached = self._cache_get(request['cache_key'])
+            if cached is None:
+                pending.append((i, request, email))
+            else:
+                # Tagged so callers can tell a replayed answer from a fresh one
+                decisions[i] = dict(cached, source='cache')
+        return [pending[start:start + max_batch_size] for start in range(0, len(pending), max_batch_size)]
+    
+    def decide_email_urgency_batch(self, emails, max_batch_size=10):
+        # emails: [{'subject', 'sender', 'snippet'}, ...] -> decisions in the same order
+        decisions = [None] * len(emails)
+        chunks = self._pending_email_chunks(emails, decisions, max_batch_size)
         
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,  # type: ignore
-            temperature=0.7,
-            max_tokens=150
-        )
+        if len(chunks) > 1 and self.can_fan_out():
+            results = self.run_concurrently(
+                lambda brain: [brain.triage_email_batch([(r, e) for _, r, e in chunk]) for chunk in chunks]
+            )
+        else:
+            results = [self._triage_email_batch([(r, e) for _, r, e in chunk]) for chunk in chunks]
         
-        try:
-            import json
-            result = json.loads(response.choices[0].message.content or "{}")
-            return result
-        except:
-            return {"remind": False, "message": ""}
-    
-    def analyze_camera_event(self, camera_name, event_type, timestamp):
-        prompt = f"""Analyze this camera event and decide if it needs immediate attention:
+        for chunk, chunk_decisions in zip(chunks, results):
+            for (index, _, _), decision in zip(chunk, chunk_decisions):
+                decisions[index] = decision
         
-Camera: {camera_name}
-Event: {event_type}
-Time: {timestamp}
+        return decisions
+    
+    def _email_batch_request(self, entries):
+        listing = "\n\n".join(
+            f"[{i}]\nFrom: {email['sender']}\nSubject: {email['subject']}\nSnippet: {email['snippet']}"
+            for i, (_, email) in enumerate(entries)
+        )
+        prompt = f"""Analyze these {len(entries)} emails and decide for each one if it's urgent enough to ping immediately:
 
-Should I alert about this? Consider time of day and event type.
-Respond with JSON: {{"alert": true/false, "message": "caring alert message if needed"}}"""
+{listing}
+
+Is each one urgent? (work deadline, bills, important personal matter)
+Respond with only a JSON array, one object per email:
+[{{"id": 0, "urgent": true/false, "reason": "brief reason", "message": "caring message to send if urgent"}}]"""
         
-        messages = [
+        return [
             {"role": "system", "content": self.personality},
             {"role": "user", "content": prompt}
-        ]
+        ], 60 + 90 * len(entries)
+    
+    def _parse_triage_results(self, content, expected_count):
+        content = content.strip()
+        if content.startswith('```'):
+            content = content.strip('`').removeprefix('json').strip()
         
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,  # type: ignore
-            temperature=0.3,
-            max_tokens=150
-        )
+        items = json.loads(content)
+        if isinstance(items, dict):
+            items = items.get('results', items.get('emails'))
+        if not isinstance(items, list):
+            raise ValueError('expected a JSON array')
+        
+        decisions = {}
+        for item in items:
+            index = int(item['id'])
+            if not 0 <= index < expected_count or index in decisions:
+                raise ValueError(f'unexpected id {index}')
+            if not isinstance(item.get('urgent'), bool):
+                raise ValueError(f'missing urgent flag for id {index}')
+            decisions[index] = {
+                'urgent': item['urgent'],
+                'reason': str(item.get('reason', '')),
+                'message': str(item.get('message', ''))
+            }
+        
+        if len(decisions) != expected_count:
+            raise ValueError(f'got {len(decisions)} of {expected_count} decisions')
+        
+        return [decisions[i] for i in range(expected_count)]
+    
+    def _finish_email_batch(self, entries, response):
+        # Raises ValueError/TypeError/KeyError when the answer can't be trusted
+        decisions = self._parse_triage_results(response.choices[0].message.content or "", len(entries))
+        
+        tokens_each = _total_tokens(response) // len(entries)
+        for (request, _), decision in zip(entries, decisions):
+            self._cache_put('email', request['cache_key'], decision, tokens_each)
+        return decisions
+    
+    def _triage_email_batch(self, entries):
+        if not entries:
+            return []
+        if len(entries) == 1:
+            return [self._decide(entries[0][0], check_cache=False)]
+        
+        messages, max_tokens = self._email_batch_request(entries)
+        response = self._complete('email_batch', messages, temperature=0.3, max_tokens=max_tokens, items=len(entries))
         
         try:
-            import json
-            result = json.loads(response.choices[0].message.content or "{}")
-            return result
-        except:
-            return {"alert": False, "message": ""}
+            return self._finish_email_batch(entries, response)
+        except (ValueError, TypeError, KeyError) as e:
+            # Malformed or partial answer: split in half and try again, down to single emails
+            print(f"⚠️ Batch triage of {len(entries)} emails unparseable ({e}) - splitting")
+            middle = len(entries) // 2
+            return self._triage_email_batch(entries[:middle]) + self._triage_email_batch(entries[middle:])
     
     def create_caring_message(self, context, data):
         prompt = f"""Create a caring, girlfriend-style message based on this:
@@ -148,11 +487,80 @@ Write a brief, sweet message with emoji. Keep it chill and caring."""
             {"role": "user", "content": prompt}
         ]
         
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,  # type: ignore
-            temperature=0.8,
-            max_tokens=100
-        )
+        response = self._complete('caring_message', messages, temperature=0.8, max_tokens=100)
         
         return response.choices[0].message.content or ""
+
+class AsyncAIBrain:
+    # asyncio variant of AIBrain's decision calls, for fanning out background
+    # work. It reuses the sync brain's prompts, decision cache, usage stats
+    # and provider slots and only swaps the transport. Its client is bound to
+    # the shared fan-out loop, so AIBrain keeps one and reuses its connections.
+    def __init__(self, ai_brain):
+        self.ai_brain = ai_brain
+        self.client = AsyncOpenAI(base_url=ai_brain.client.base_url, api_key=ai_brain.client.api_key)
+    
+    async def aclose(self):
+        await self.client.close()
+    
+    async def _acquire_slot(self):
+        # The slot is a thread semaphore shared with sync callers; poll rather
+        # than block the event loop while other threads hold it
+        while not self.ai_brain.slot.acquire(blocking=False):
+            await asyncio.sleep(SLOT_POLL_SECONDS)
+    
+    async def _complete(self, kind, messages, temperature, max_tokens, items=1):
+        await self._acquire_slot()
+        try:
+            started = time.monotonic()
+            response = await self.client.chat.completions.create(
+                model=self.ai_brain.model,
+                messages=messages,  # type: ignore
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        finally:
+            self.ai_brain.slot.release()
+        self.ai_brain._record_usage(kind, response, items, time.monotonic() - started)
+        return response
+    
+    async def _decide(self, request, check_cache=True):
+        if check_cache:
+            cached = self.ai_brain._cache_get(request['cache_key'])
+            if cached is not None:
+                return cached
+        
+        response = await self._complete(
+            request['kind'], request['messages'], temperature=request['temperature'], max_tokens=request['max_tokens']
+        )
+        return self.ai_brain._finish_decision(request, response)
+    
+    async def decide_email_urgency(self, email_subject, email_sender, email_snippet):
+        return await self._decide(self.ai_brain._email_request(email_subject, email_sender, email_snippet))
+    
+    async def decide_calendar_reminder(self, event_title, event_time, event_description):
+        return await self._decide(self.ai_brain._calendar_request(event_title, event_time, event_description))
+    
+    async def analyze_camera_event(self, camera_name, event_type, timestamp):
+        return await self._decide(self.ai_brain._camera_request(camera_name, event_type, timestamp))
+    
+    async def triage_email_batch(self, entries):
+        # entries: [(email request, email), ...] cache misses from AIBrain._pending_email_chunks
+        if not entries:
+            return []
+        if len(entries) == 1:
+            return [await self._decide(entries[0][0], check_cache=False)]
+        
+        messages, max_tokens = self.ai_brain._email_batch_request(entries)
+        response = await self._complete('email_batch', messages, temperature=0.3, max_tokens=max_tokens, items=len(entries))
+        
+        try:
+            return self.ai_brain._finish_email_batch(entries, response)
+        except (ValueError, TypeError, KeyError) as e:
+            print(f"⚠️ Batch triage of {len(entries)} emails unparseable ({e}) - splitting")
+            middle = len(entries) // 2
+            halves = await asyncio.gather(
+                self.triage_email_batch(entries[:middle]),
+                self.triage_email_batch(entries[middle:])
+            )
+            return halves[0] + halves[1]
@@ -0,0 +1,12 @@
+import pathlib
+import sys
+import types
+
+# Same `modules.<name>` mapping as tests/conftest.py, for running benchmarks
+# straight from a checkout: python benchmarks/<script>.py
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+if 'modules' not in sys.modules:
+    package = types.ModuleType('modules')
+    package.__path__ = [str(ROOT)]
+    sys.modules['modules'] = package
+sys.path.insert(0, str(ROOT / 'tests'))
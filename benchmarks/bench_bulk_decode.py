@@ -0,0 +1,85 @@
+"""Rows/sec for bulk memory reads (get_memories_by_category): the old one-row-
+at-a-time loop vs the chunked thread and process pools _decode_many picks.
+
+    python benchmarks/bench_bulk_decode.py [--sizes 10000,100000] [--workers 4] [--repeat 3]
+
+Every timed read starts from an empty DecryptedCache, so each row pays for its
+Fernet decrypt and json.loads; the last column is a warm re-read for scale.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import _bootstrap  # noqa: F401
+from modules import memory
+from modules.memory import MemoryManager
+
+def populate(manager, rows):
+    value = {'subject': 'Your weekly statement is ready', 'sender': 'bank@example.com', 'urgent': False}
+    conn = manager.get_connection()
+    with conn:
+        conn.executemany(
+            'INSERT INTO memories (key, encrypted_value, category) VALUES (?, ?, ?)',
+            ((f'email_checked_{i}', manager.cipher.encrypt(json.dumps(value).encode()), 'emails')
+             for i in range(rows))
+        )
+
+def old_loop(manager):
+    # What get_memories_by_category did before: decrypt and parse inline, row by row
+    rows = manager.get_connection().execute(
+        'SELECT key, encrypted_value FROM memories WHERE category = ?', ('emails',)
+    ).fetchall()
+    return {key: json.loads(manager.cipher.decrypt(token).decode()) for key, token in rows}
+
+def bulk_read(manager):
+    return manager.get_memories_by_category('emails')
+
+def rate(manager, read, rows, repeat, warm=False):
+    samples = []
+    for _ in range(repeat):
+        if not warm:
+            manager.cache.invalidate()
+        started = time.perf_counter()
+        assert len(read(manager)) == rows
+        samples.append(time.perf_counter() - started)
+    return rows / statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    modes = {
+        # (PARALLEL_DECODE_MIN_ROWS, PROCESS_DECODE_MIN_ROWS) forcing each path
+        'inline': (float('inf'), float('inf')),
+        'threads': (0, float('inf')),
+        'processes': (0, 0),
+        'auto': (memory.PARALLEL_DECODE_MIN_ROWS, memory.PROCESS_DECODE_MIN_ROWS),
+    }
+
+    print(f"{'rows':>8} {'old loop':>10} " + ' '.join(f'{mode:>10}' for mode in modes) + f" {'warm':>10}   (rows/sec)")
+    for rows in (int(size) for size in args.sizes.split(',')):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            manager = MemoryManager(os.path.join(tmp, 'bench.db'), cache_size=2 * rows,
+                                    decode_workers=args.workers)
+            populate(manager, rows)
+
+            rates = [rate(manager, old_loop, rows, args.repeat)]
+            for parallel_min, process_min in modes.values():
+                memory.PARALLEL_DECODE_MIN_ROWS, memory.PROCESS_DECODE_MIN_ROWS = parallel_min, process_min
+                bulk_read(manager)  # warm up the pool outside the timing
+                rates.append(rate(manager, bulk_read, rows, args.repeat))
+            rates.append(rate(manager, bulk_read, rows, args.repeat, warm=True))
+            manager.close()
+
+        print(f"{rows:>8} " + ' '.join(f'{r:>10.0f}' for r in rates))
+    print(f"({args.workers} workers, {os.cpu_count()} CPUs)")
+
+if __name__ == '__main__':
+    main()
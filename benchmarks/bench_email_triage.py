@@ -0,0 +1,61 @@
+"""Tokens per email and latency per poll for email triage: one LLM call per
+email (the old loop) vs AIBrain.decide_email_urgency_batch, against a local
+OpenAI-compatible fake with simulated model latency.
+
+    python benchmarks/bench_email_triage.py [--latency-ms 400] [--sizes 1,5,10,20]
+
+Token counts are the fake's ~4 chars/token estimate, so compare the two
+columns rather than reading them as billing figures.
+"""
+import argparse
+import os
+import time
+
+import _bootstrap  # noqa: F401
+from fakes.openai_server import FakeOpenAIServer
+from modules.ai_brain import AIBrain
+
+def inbox(count, offset):
+    return [
+        {
+            'sender': f'person{offset + i}@example.com',
+            'subject': f'URGENT invoice {offset + i}' if i % 4 == 0 else f'Newsletter issue {offset + i}',
+            'snippet': f'Hi there, a short preview of message {offset + i} goes here.'
+        }
+        for i in range(count)
+    ]
+
+def measure(server, triage):
+    server.prompt_tokens = server.completion_tokens = 0
+    started = time.perf_counter()
+    triage()
+    return time.perf_counter() - started, server.prompt_tokens + server.completion_tokens
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency-ms', type=float, default=400)
+    parser.add_argument('--sizes', default='1,5,10,20')
+    args = parser.parse_args()
+
+    with FakeOpenAIServer(latency=args.latency_ms / 1000) as server:
+        os.environ.pop('XAI_API_KEY', None)
+        os.environ['OPENAI_API_KEY'] = 'bench'
+        os.environ['OPENAI_BASE_URL'] = server.base_url
+        # No memory manager: no decision cache, so every poll really calls the model
+        brain = AIBrain(None)
+
+        print(f"{'emails':>6} {'per-email s':>12} {'tok/email':>10} {'batched s':>10} {'tok/email':>10} {'calls':>6}")
+        offset = 0
+        for n in (int(size) for size in args.sizes.split(',')):
+            emails = inbox(n, offset)
+            single_s, single_tokens = measure(
+                server, lambda: [brain.decide_email_urgency(e['subject'], e['sender'], e['snippet']) for e in emails]
+            )
+            server.batch_sizes.clear()
+            batch_s, batch_tokens = measure(server, lambda: brain.decide_email_urgency_batch(emails))
+            print(f"{n:>6} {single_s:>12.2f} {single_tokens / n:>10.0f} {batch_s:>10.2f} {batch_tokens / n:>10.0f} "
+                  f"{max(len(server.batch_sizes), 1):>6}")
+            offset += n
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Relevance search latency over a large conversation history: FTS5 through
+MemoryManager.search_conversations vs the LIKE scan it replaces, plus the
+blind-indexed search_memories.
+
+    python benchmarks/bench_fts_search.py [--conversations 30000,100000] [--memories 5000]
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import _bootstrap  # noqa: F401
+from modules.memory import SQLITE_PRAGMAS, MemoryManager
+
+def vocabulary(rng, size=5000):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return [''.join(rng.choices(letters, k=rng.randint(3, 9))) for _ in range(size)]
+
+def sentence(rng, words, cum_weights, length):
+    return ' '.join(rng.choices(words, cum_weights=cum_weights, k=length))
+
+def timed(fn, queries):
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(0.95 * (len(samples) - 1))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--conversations', default='30000,100000')
+    parser.add_argument('--memories', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    words = vocabulary(rng)
+    # Zipf-ish: a few very common words, a long tail of rare ones
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        manager = MemoryManager(os.path.join(tmp, 'bench.db'))
+        conn = manager.get_connection()
+
+        for i in range(args.memories):
+            manager.store_memory(f'fact_{i}', sentence(rng, words, cum_weights, 8), category='general')
+
+        inserted = 0
+        for target in (int(size) for size in args.conversations.split(',')):
+            # Bulk loading outgrows the production 8 MB page cache and FTS segment
+            # merges start thrashing; the queries run with SQLITE_PRAGMAS restored
+            conn.execute('PRAGMA cache_size=-262144')
+            started = time.perf_counter()
+            for start in range(inserted, target, 5000):
+                with conn:
+                    conn.executemany(
+                        'INSERT INTO conversations (user_message, bot_response) VALUES (?, ?)',
+                        ((sentence(rng, words, cum_weights, 12), sentence(rng, words, cum_weights, 25))
+                         for _ in range(min(5000, target - start)))
+                    )
+            insert_s = time.perf_counter() - started
+            inserted = target
+            conn.execute(next(p for p in SQLITE_PRAGMAS if 'cache_size' in p))
+
+            # Mid-frequency words: common enough to match, rare enough to rank
+            queries = [' '.join(rng.sample(words[50:1500], 2)) for _ in range(args.queries)]
+
+            def like_scan(query):
+                # Ranking needs every candidate, so the scan can't stop early
+                query_words = query.split()
+                clauses = ' OR '.join(['user_message LIKE ? OR bot_response LIKE ?'] * len(query_words))
+                params = [f'%{w}%' for w in query_words for _ in range(2)]
+                rows = conn.execute(
+                    f'SELECT id, user_message, bot_response FROM conversations WHERE {clauses}', params
+                ).fetchall()
+                return sorted(rows, key=lambda r: -sum(f'{r[1]} {r[2]}'.count(w) for w in query_words))[:5]
+
+            fts = timed(lambda q: manager.search_conversations(q, limit=5), queries)
+            like = timed(like_scan, queries[:10])
+            memories = timed(lambda q: manager.search_memories(q, limit=5), queries)
+
+            print(f"{inserted} conversations (inserted with FTS triggers in {insert_s:.1f}s), {args.memories} memories")
+            print(f"  search_conversations (FTS5, ranked) median {fts[0]:8.2f} ms  p95 {fts[1]:8.2f} ms")
+            print(f"  LIKE scan + rank in Python          median {like[0]:8.2f} ms  p95 {like[1]:8.2f} ms")
+            print(f"  search_memories (blind index)       median {memories[0]:8.2f} ms  p95 {memories[1]:8.2f} ms")
+
+        manager.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Wall-clock time per Gmail poll as the number of new messages grows:
+one messages.get per message (the old loop) vs GmailMonitor's batched
+metadata fetch, against FakeGmailService with a simulated round trip.
+
+    python benchmarks/bench_gmail_poll.py [--rtt-ms 80] [--sizes 1,5,20,50,100]
+"""
+import argparse
+import time
+
+import _bootstrap  # noqa: F401
+from fakes.gmail import FakeGmailService
+from modules.gmail_monitor import GmailMonitor
+
+def sequential_fetch(service, message_ids):
+    metadata = {}
+    for message_id in message_ids:
+        metadata[message_id] = service.users().messages().get(
+            userId='me', id=message_id, format='metadata', metadataHeaders=['From', 'Subject']
+        ).execute()
+    return metadata
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rtt-ms', type=float, default=80)
+    parser.add_argument('--sizes', default='1,5,20,50,100')
+    args = parser.parse_args()
+
+    # _fetch_metadata only needs the service; skip the DB-backed constructor
+    monitor = GmailMonitor.__new__(GmailMonitor)
+    print(f"{'N':>5} {'sequential ms':>14} {'round trips':>12} {'batched ms':>11} {'round trips':>12} {'speedup':>8}")
+    for n in (int(size) for size in args.sizes.split(',')):
+        service = FakeGmailService(rtt=args.rtt_ms / 1000)
+        message_ids = [service.deliver(f'sender{i}@example.com', f'Subject {i}') for i in range(n)]
+
+        started = time.perf_counter()
+        sequential_fetch(service, message_ids)
+        sequential_ms = (time.perf_counter() - started) * 1000
+        sequential_trips = service.requests['messages.get']
+
+        service.reset_counts()
+        started = time.perf_counter()
+        metadata, failed = monitor._fetch_metadata(service, message_ids)
+        batched_ms = (time.perf_counter() - started) * 1000
+        assert len(metadata) == n and not failed
+
+        print(f"{n:>5} {sequential_ms:>14.1f} {sequential_trips:>12} {batched_ms:>11.1f} "
+              f"{service.requests['batch']:>12} {sequential_ms / batched_ms:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Startup and per-poll latency of the Google API clients: a fresh build() and
+transport on every poll (the old monitors) vs GoogleServiceFactory's cached
+client and keep-alive connection.
+
+    python benchmarks/bench_google_clients.py [--polls 50] [--requests-per-poll 2] [--handshake-ms 60]
+
+Requests go to a local Gmail-shaped HTTP server. Each new connection waits
+--handshake-ms first, standing in for the TCP + TLS setup a real
+gmail.googleapis.com connection pays and a reused one skips.
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import _bootstrap  # noqa: F401
+from google.oauth2.credentials import Credentials
+from googleapiclient import discovery
+from modules import google_services
+
+class GmailEndpoint:
+    def __init__(self, handshake_seconds):
+        self.connections = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                server.connections += 1
+                time.sleep(handshake_seconds)
+
+            def do_GET(self):
+                body = json.dumps({'emailAddress': 'me@example.com', 'historyId': '1000', 'history': []}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        host, port = self._server.server_address
+        self.url = f'http://{host}:{port}/'
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def poll(service, requests_per_poll):
+    # A quiet incremental poll: profile for the cursor, then history since it
+    service.users().getProfile(userId='me').execute()
+    for _ in range(requests_per_poll - 1):
+        service.users().history().list(userId='me', startHistoryId='1000').execute()
+
+def fresh_build(endpoint, token):
+    return discovery.build('gmail', 'v1', credentials=Credentials(token=token),
+                           client_options={'api_endpoint': endpoint.url})
+
+def run(get_service, polls, requests_per_poll):
+    build_ms = []
+    poll_ms = []
+    for i in range(polls):
+        started = time.perf_counter()
+        # Tokens rotate now and then, as the connector refreshes them
+        service = get_service(f'token-{i // 10}')
+        built = time.perf_counter()
+        poll(service, requests_per_poll)
+        build_ms.append((built - started) * 1000)
+        poll_ms.append((time.perf_counter() - started) * 1000)
+    return build_ms, poll_ms
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--polls', type=int, default=50)
+    parser.add_argument('--requests-per-poll', type=int, default=2)
+    parser.add_argument('--handshake-ms', type=float, default=60)
+    args = parser.parse_args()
+
+    endpoint = GmailEndpoint(args.handshake_ms / 1000)
+    # Point the factory's build() at the local endpoint
+    original_build = google_services.build
+    google_services.build = lambda *a, **kw: original_build(*a, client_options={'api_endpoint': endpoint.url}, **kw)
+    factory = google_services.GoogleServiceFactory()
+
+    print(f"{'':<22} {'startup ms':>10} {'build med':>10} {'poll med':>9} {'poll p95':>9} {'connections':>12}")
+    for name, get_service in (
+        ('build every poll', lambda token: fresh_build(endpoint, token)),
+        ('cached factory', lambda token: factory.get_service('gmail', 'v1', token)),
+    ):
+        endpoint.connections = 0
+        build_ms, poll_ms = run(get_service, args.polls, args.requests_per_poll)
+        ordered = sorted(poll_ms[1:])
+        print(f"{name:<22} {poll_ms[0]:>10.1f} {statistics.median(build_ms[1:]):>10.2f} "
+              f"{statistics.median(ordered):>9.1f} {ordered[int(0.95 * (len(ordered) - 1))]:>9.1f} "
+              f"{endpoint.connections:>12}")
+
+    google_services.build = original_build
+    endpoint.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Mixed read/write ops/sec: connection-per-call (the old MemoryManager) vs
+the per-thread WAL connections MemoryManager uses now.
+
+    python benchmarks/bench_memory_connections.py [--threads 4] [--ops 2000]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import _bootstrap  # noqa: F401
+from modules.memory import MemoryManager
+
+class ConnectionPerCall:
+    # The pre-pool access pattern: open, execute, commit, close on every call
+    def __init__(self, db_path, cipher):
+        self.db_path = db_path
+        self.cipher = cipher
+
+    def store_memory(self, key, value, category='general'):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            'INSERT OR REPLACE INTO memories (key, encrypted_value, category, updated_at) VALUES (?, ?, ?, ?)',
+            (key, self.cipher.encrypt(json.dumps(value).encode()), category, datetime.now())
+        )
+        conn.commit()
+        conn.close()
+
+    def get_memory(self, key):
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('SELECT encrypted_value FROM memories WHERE key = ?', (key,)).fetchone()
+        conn.close()
+        return json.loads(self.cipher.decrypt(row[0]).decode()) if row else None
+
+def run(store, threads, ops, write_ratio):
+    errors = []
+
+    def worker(worker_id):
+        for i in range(ops):
+            key = f'bench_{worker_id}_{i % 100}'
+            try:
+                if i % int(1 / write_ratio) == 0:
+                    store.store_memory(key, {'n': i})
+                else:
+                    store.get_memory(key)
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+
+    pool = [threading.Thread(target=worker, args=(w,)) for w in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return threads * ops / elapsed, len(errors)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--ops', type=int, default=2000, help='operations per thread')
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        manager = MemoryManager(os.path.join(workdir, 'bench.db'))
+        # The old layout ran on a rollback-journal database; give it its own file
+        legacy_path = os.path.join(workdir, 'legacy.db')
+        legacy = sqlite3.connect(legacy_path)
+        legacy.execute('''CREATE TABLE memories (id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE,
+                          encrypted_value BLOB, category TEXT, updated_at TIMESTAMP)''')
+        legacy.close()
+
+        for name, store in (('connection per call', ConnectionPerCall(legacy_path, manager.cipher)),
+                            ('per-thread WAL', manager)):
+            ops_per_sec, errors = run(store, args.threads, args.ops, args.write_ratio)
+            print(f'{name:>20}: {ops_per_sec:10.0f} ops/sec  ({errors} locked errors)')
+        manager.close()
+
+if __name__ == '__main__':
+    main()
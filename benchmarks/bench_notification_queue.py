@@ -0,0 +1,76 @@
+"""Enqueue latency and delivery throughput of the notification queue against
+a Twilio stub, next to the old inline send that blocked the monitor loop.
+
+    python benchmarks/bench_notification_queue.py [--messages 200] [--latency-ms 300]
+
+Coalescing and rate limits are off so the numbers measure the queue itself;
+--coalesce 30 shows a burst leaving as digests instead.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import _bootstrap  # noqa: F401
+from fakes.twilio import TEST_CREDENTIALS, TwilioStub
+from modules import notification_manager, twilio_transport
+from modules.memory import MemoryManager
+from modules.replit_connector import ReplitConnector
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=300)
+    parser.add_argument('--coalesce', type=int, default=0)
+    args = parser.parse_args()
+
+    stub = TwilioStub(latency=args.latency_ms / 1000)
+    twilio_transport.Client = stub.client
+    ReplitConnector.get_twilio_credentials = staticmethod(lambda: dict(TEST_CREDENTIALS))
+    os.environ.update({
+        'USER_PHONE_NUMBER': '+15551234567',
+        'NOTIFY_COALESCE_SECONDS': str(args.coalesce),
+        'NOTIFY_SMS_BURST': str(args.messages * 10),
+        'NOTIFY_SMS_PER_HOUR': str(args.messages * 3600)
+    })
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        inline = notification_manager.NotificationManager()
+        inline_samples = []
+        # The old path: each notification waited for Twilio in the caller
+        for i in range(min(args.messages, 20)):
+            started = time.perf_counter()
+            inline.send_notification(f'Inline update {i}', force_sms=True)
+            inline_samples.append((time.perf_counter() - started) * 1000)
+
+        memory_manager = MemoryManager(os.path.join(tmp, 'bench.db'))
+        stub.sent.clear()
+        queued = notification_manager.NotificationManager(memory_manager)
+        queue_samples = []
+        started_all = time.perf_counter()
+        for i in range(args.messages):
+            started = time.perf_counter()
+            queued.send_notification(f'Queued update {i}', force_sms=True)
+            queue_samples.append((time.perf_counter() - started) * 1000)
+
+        while queued.get_queue_stats()['queued']['sent'] < args.messages:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - started_all
+        queued.stop()
+        stats = queued.get_queue_stats()
+        memory_manager.close()
+
+    print(f"inline send     : mean {statistics.mean(inline_samples):7.2f} ms  p95 {percentile(inline_samples, 0.95):7.2f} ms per call")
+    print(f"queued enqueue  : mean {statistics.mean(queue_samples):7.2f} ms  p95 {percentile(queue_samples, 0.95):7.2f} ms per call")
+    print(f"queued delivery : {args.messages} notifications in {elapsed:.2f}s "
+          f"({args.messages / elapsed:.1f}/s) as {len(stub.sent)} SMS, {stats['digests']} digests, "
+          f"peak {stub.max_in_flight} concurrent sends")
+
+if __name__ == '__main__':
+    main()
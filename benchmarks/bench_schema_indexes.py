@@ -0,0 +1,97 @@
+"""Query latency of the hot memories/conversations reads before and after
+migration 2's lookup indexes, at growing table sizes.
+
+    python benchmarks/bench_schema_indexes.py [--sizes 10000,100000,1000000] [--repeat 20]
+
+Rows hold a dummy 120-byte blob instead of real Fernet tokens; the queries
+under test never decrypt, so only the row count and layout matter here.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import _bootstrap  # noqa: F401
+from modules.db_migrations import MIGRATIONS
+
+CATEGORIES = ['emails', 'sync', 'general', 'preferences', 'models', 'conversation'] + [f'misc{i}' for i in range(14)]
+
+QUERIES = {
+    # MemoryManager.get_memories_by_category, on a small category
+    'memories by category': ('SELECT key, encrypted_value FROM memories WHERE category = ?', ('preferences',)),
+    # MemoryManager.get_recent_conversations
+    'recent conversations': (
+        'SELECT user_message, bot_response, timestamp, id FROM conversations ORDER BY timestamp DESC LIMIT ?', (10,)
+    ),
+    # Recently touched memories, as the vector index catch-up reads them
+    'memories since': ('SELECT key FROM memories WHERE updated_at > ?', None),
+}
+
+def populate(conn, rows, rng):
+    blob = os.urandom(120)
+    start = datetime.now() - timedelta(days=365)
+    step = timedelta(days=365) / rows
+    # Weighted so one category dominates, as 'emails' does in practice
+    weights = [60, 10, 10, 1] + [1] * (len(CATEGORIES) - 4)
+    categories = rng.choices(CATEGORIES, weights=weights, k=rows)
+    with conn:
+        conn.executemany(
+            'INSERT INTO memories (key, encrypted_value, category, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+            ((f'key_{i}', blob, categories[i], start + step * i, start + step * i) for i in range(rows))
+        )
+        conn.executemany(
+            'INSERT INTO conversations (user_message, bot_response, timestamp) VALUES (?, ?, ?)',
+            ((f'question {i}', f'answer {i}', start + step * i) for i in range(rows))
+        )
+
+def time_queries(conn, repeat, since):
+    results = {}
+    for name, (sql, params) in QUERIES.items():
+        params = params if params is not None else (since,)
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            samples.append((time.perf_counter() - started) * 1000)
+        results[name] = statistics.median(samples)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    create_tables = dict((version, migrate) for version, _, migrate in MIGRATIONS)[1]
+    add_indexes = dict((version, migrate) for version, _, migrate in MIGRATIONS)[2]
+    rng = random.Random(1)
+
+    print(f"{'rows':>9}  {'query':<22} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for rows in (int(size) for size in args.sizes.split(',')):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = sqlite3.connect(os.path.join(tmp, 'bench.db'))
+            conn.execute('PRAGMA journal_mode=WAL')
+            create_tables(conn)
+            populate(conn, rows, rng)
+            conn.execute('ANALYZE')
+            since = datetime.now() - timedelta(days=1)
+
+            before = time_queries(conn, args.repeat, since)
+            started = time.perf_counter()
+            with conn:
+                add_indexes(conn)
+            conn.execute('ANALYZE')
+            migrate_s = time.perf_counter() - started
+            after = time_queries(conn, args.repeat, since)
+            conn.close()
+
+        for name in QUERIES:
+            print(f"{rows:>9}  {name:<22} {before[name]:>10.3f} {after[name]:>10.3f} {before[name] / after[name]:>7.1f}x")
+        print(f"{rows:>9}  {'(migration 2 itself)':<22} {migrate_s * 1000:>10.0f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Semantic recall latency of VectorStore.search as the index grows, with and
+without the latency budget, plus embedding throughput and save/load cost.
+
+    python benchmarks/bench_vector_search.py [--sizes 10000,50000,100000] [--budget-ms 25]
+
+Rows go straight in through add_many, so the database stays empty; only the
+index size matters to search cost. The matrix takes dim * 4 bytes per row
+(2 KB at the default 512) plus growth headroom, so size the runs to the box.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import _bootstrap  # noqa: F401
+from modules.memory import MemoryManager
+from modules.vector_store import VectorStore
+
+TOPICS = ['dentist', 'piano lesson', 'groceries', 'flight to Lisbon', 'birthday dinner', 'gym session',
+          'car service', 'rent payment', 'book club', 'weather', 'vet appointment', 'project deadline']
+FILLERS = ['remind me about the', 'how was the', 'can you move the', 'did I book the', 'what time is the']
+
+def timed(fn, queries):
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(0.95 * (len(samples) - 1))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,50000,100000')
+    parser.add_argument('--budget-ms', type=float, default=25)
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    queries = [f'{rng.choice(FILLERS)} {rng.choice(TOPICS)}s' for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        manager = MemoryManager(os.path.join(tmp, 'bench.db'))
+        store = VectorStore(manager, path=os.path.join(tmp, 'bench.vectors'))
+
+        print(f"{'rows':>8} {'embed/s':>9} {'full med':>9} {'full p95':>9} {'budget med':>11} "
+              f"{'budget p95':>11} {'save ms':>8} {'load ms':>8}")
+        for target in (int(size) for size in args.sizes.split(',')):
+            items = [
+                ('conversation', str(i), f'{rng.choice(FILLERS)} {rng.choice(TOPICS)} on day {i % 365}')
+                for i in range(len(store), target)
+            ]
+            started = time.perf_counter()
+            store.add_many(items)
+            embed_rate = len(items) / (time.perf_counter() - started)
+
+            full = timed(lambda q: store.search(q, k=5, budget_ms=10_000), queries)
+            budgeted = timed(lambda q: store.search(q, k=5, budget_ms=args.budget_ms), queries)
+
+            started = time.perf_counter()
+            store.save()
+            save_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            store._load()
+            load_ms = (time.perf_counter() - started) * 1000
+
+            print(f"{target:>8} {embed_rate:>9.0f} {full[0]:>9.2f} {full[1]:>9.2f} {budgeted[0]:>11.2f} "
+                  f"{budgeted[1]:>11.2f} {save_ms:>8.0f} {load_ms:>8.0f}")
+
+        manager.close()
+
+if __name__ == '__main__':
+    main()
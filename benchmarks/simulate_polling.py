@@ -0,0 +1,103 @@
+"""Replays a synthetic inbox timeline on a virtual clock and compares the old
+fixed 10-minute Gmail poll with AdaptivePolicy: API calls made vs how long
+each email waited before a poll saw it.
+
+    python benchmarks/simulate_polling.py [--days 7] [--seed 1] [--quiet-hours 23:00-07:00]
+
+A poll with no changes costs one history.list call; one that finds mail adds
+a batch metadata fetch and a triage call.
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+import _bootstrap  # noqa: F401
+from modules.adaptive_scheduler import AdaptivePolicy, parse_quiet_hours, quiet_until
+
+START = datetime(2026, 1, 5)  # a Monday
+
+def inbox_timeline(days, rng):
+    # Working-hours trickle, a few bursts a day (threads, notifications) and
+    # near silence overnight and at weekends
+    arrivals = []
+    for day in range(days):
+        weekend = (START + timedelta(days=day)).weekday() >= 5
+        for hour in range(24):
+            base = 0.3 if 8 <= hour < 19 else 0.03
+            rate = base * (0.3 if weekend else 1)
+            t = day * 86400 + hour * 3600
+            while True:
+                t += rng.expovariate(rate / 3600)
+                if t >= day * 86400 + (hour + 1) * 3600:
+                    break
+                arrivals.append(t)
+        if not weekend:
+            for _ in range(rng.randint(1, 4)):
+                burst_at = day * 86400 + rng.uniform(9, 18) * 3600
+                arrivals.extend(burst_at + rng.uniform(0, 900) for _ in range(rng.randint(3, 8)))
+    return sorted(arrivals)
+
+def simulate(arrivals, horizon, next_interval, quiet_hours, rng):
+    api_calls = polls = 0
+    delays = []
+    pending = 0
+    t = 0.0
+    interval = next_interval(None)
+    while t < horizon:
+        t += interval
+        wall = START + timedelta(seconds=t)
+        deferred = quiet_until(quiet_hours, wall)
+        if deferred is not None:
+            t = (deferred - START).total_seconds()
+        polls += 1
+        api_calls += 1
+        new = []
+        while pending < len(arrivals) and arrivals[pending] <= t:
+            new.append(arrivals[pending])
+            pending += 1
+        if new:
+            api_calls += 2
+            delays.extend(t - arrived for arrived in new)
+        interval = next_interval(len(new))
+    return polls, api_calls, delays
+
+def summary(name, arrivals, polls, api_calls, delays):
+    delays = sorted(delays)
+    p = lambda q: delays[min(len(delays) - 1, int(q * len(delays)))] / 60 if delays else 0
+    mean = sum(delays) / len(delays) / 60 if delays else 0
+    print(f"{name:<22} polls={polls:>5}  api_calls={api_calls:>5}  "
+          f"delay min: mean={mean:5.1f} p50={p(0.5):5.1f} p95={p(0.95):5.1f} max={p(1.0):6.1f}  "
+          f"({len(delays)}/{len(arrivals)} emails seen)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--quiet-hours', default='')
+    parser.add_argument('--min-minutes', type=float, default=2)
+    parser.add_argument('--initial-minutes', type=float, default=10)
+    parser.add_argument('--max-minutes', type=float, default=30)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    arrivals = inbox_timeline(args.days, rng)
+    horizon = args.days * 86400
+    quiet_hours = parse_quiet_hours(args.quiet_hours)
+    print(f"{len(arrivals)} emails over {args.days} days"
+          + (f", quiet hours {args.quiet_hours}" if quiet_hours else ''))
+
+    fixed = simulate(arrivals, horizon, lambda activity: 600, None, rng)
+    summary('fixed 10 min', arrivals, *fixed)
+
+    policy = AdaptivePolicy(args.min_minutes * 60, args.max_minutes * 60, args.initial_minutes * 60)
+
+    def adaptive_interval(activity):
+        if activity is not None:
+            policy.observe(activity)
+        return policy.interval + rng.uniform(-1, 1) * policy.jitter_seconds()
+
+    adaptive = simulate(arrivals, horizon, adaptive_interval, quiet_hours, rng)
+    summary(f'adaptive {args.min_minutes:g}-{args.max_minutes:g} min', arrivals, *adaptive)
+
+if __name__ == '__main__':
+    main()
@@ -1,80 +1,197 @@
-from datetime import datetime, timedelta
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
+import threading
+from datetime import datetime, timedelta, timezone
+from apscheduler.triggers.date import DateTrigger
+from googleapiclient.errors import HttpError
 from modules.replit_connector import ReplitConnector
+from modules.google_services import get_google_service
+from modules.seen_store import SeenStore, CALENDAR_SEEN_TTL
+from modules.calendar_sync import CalendarSync
+
+# Reminders decided but not yet sent: {event_id: {title, start, fire_at, message}}
+REMINDERS_KEY = 'calendar_pending_reminders'
+DEFAULT_LEAD_MINUTES = 15
+
+def _reminder_job_id(event_id):
+    return f'calendar_reminder_{event_id}'
+
+def _parse_start(event_start):
+    # Timed events only; all-day events ('YYYY-MM-DD') have no exact moment
+    if 'T' not in event_start:
+        return None
+    return datetime.fromisoformat(event_start.replace('Z', '+00:00'))
 
 class CalendarMonitor:
-    def __init__(self, memory_manager, ai_brain, notification_manager):
+    # Polls for upcoming events and decides which deserve a reminder. With a
+    # scheduler, each reminder becomes a one-shot job at start minus the lead
+    # time, so it lands on time however rarely the calendar is polled. The
+    # pending set is kept in memory; restore_reminders() re-registers it on
+    # the scheduler after a restart.
+    def __init__(self, memory_manager, ai_brain, notification_manager, seen_store=None,
+                 scheduler=None, lead_minutes=DEFAULT_LEAD_MINUTES):
         self.memory_manager = memory_manager
         self.ai_brain = ai_brain
         self.notification_manager = notification_manager
+        self.seen_store = seen_store or SeenStore(memory_manager)
+        self.calendar_sync = CalendarSync(memory_manager)
+        self.scheduler = scheduler
+        self.lead = timedelta(minutes=lead_minutes)
         self.last_check_time = None
+        # Serializes the pending-reminders registry between polls and firing jobs
+        self._reminders_lock = threading.RLock()
+    
+    def _load_reminders(self):
+        return self.memory_manager.get_memory(REMINDERS_KEY) or {}
+    
+    def _save_reminders(self, reminders):
+        self.memory_manager.store_memory(REMINDERS_KEY, reminders, category='sync')
+    
+    def restore_reminders(self):
+        # APScheduler's in-memory job store is empty after a restart. May send
+        # overdue reminders, so it runs from the monitoring startup job rather
+        # than whenever the monitor happens to be constructed.
+        if self.scheduler is None:
+            return 0
+        with self._reminders_lock:
+            # Overdue ones fire right away and drop out of the saved set
+            reminders = list(self._load_reminders().items())
+            for event_id, reminder in reminders:
+                self._schedule_reminder(event_id, datetime.fromisoformat(reminder['fire_at']))
+        return len(reminders)
+    
+    def _schedule_reminder(self, event_id, fire_at):
+        if fire_at <= datetime.now(timezone.utc):
+            # Missed while down, or decided inside the lead window: send now
+            self._fire_reminder(event_id)
+            return
+        self.scheduler.add_job(
+            func=self._fire_reminder,
+            trigger=DateTrigger(run_date=fire_at),
+            args=[event_id],
+            id=_reminder_job_id(event_id),
+            name=f'Calendar reminder for {event_id}',
+            replace_existing=True,
+            misfire_grace_time=600
+        )
+    
+    def _cancel_reminder(self, event_id):
+        job = self.scheduler.get_job(_reminder_job_id(event_id))
+        if job is not None:
+            job.remove()
+    
+    def _fire_reminder(self, event_id):
+        with self._reminders_lock:
+            reminders = self._load_reminders()
+            reminder = reminders.pop(event_id, None)
+            if reminder is None:
+                return
+            self._save_reminders(reminders)
+        if self.seen_store.is_seen('calendar', event_id):
+            return
+        
+        self.seen_store.mark_seen('calendar', event_id, CALENDAR_SEEN_TTL)
+        self.notification_manager.send_notification(reminder['message'])
+    
+    def _reconcile_reminders(self, events):
+        # Drop reminders whose event was cancelled or moved; a moved event
+        # goes back through the AI decision with its new time.
+        reminders = self._load_reminders()
+        starts = {
+            event['id']: event['start'].get('dateTime', event['start'].get('date'))
+            for event in events
+        }
+        stale = [
+            event_id for event_id, reminder in reminders.items()
+            if starts.get(event_id) != reminder['start']
+        ]
+        for event_id in stale:
+            self._cancel_reminder(event_id)
+            del reminders[event_id]
+        if stale:
+            self._save_reminders(reminders)
+            print(f"📅 Dropped {len(stale)} reminders for moved or cancelled events")
+        return reminders
     
     def _get_calendar_service(self):
         try:
             creds_data = ReplitConnector.get_calendar_credentials()
-            credentials = Credentials(token=creds_data['access_token'])
-            service = build('calendar', 'v3', credentials=credentials)
-            return service
+            return get_google_service('calendar', 'v3', creds_data['access_token'])
         except Exception as e:
             print(f"Calendar service error: {e}")
             return None
     
     def check_events(self):
+        with self._reminders_lock:
+            return self._check_events()
+    
+    def _check_events(self):
         try:
             service = self._get_calendar_service()
             if not service:
                 return {'error': 'Calendar service not available'}
             
-            now = datetime.utcnow()
-            time_min = now.isoformat() + 'Z'
-            time_max = (now + timedelta(hours=4)).isoformat() + 'Z'
+            # Pull only what changed since the last poll, then read the
+            # next 4 hours from the local store
+            sync_result = self.calendar_sync.sync(service)
+            now = datetime.now(timezone.utc)
+            events = self.calendar_sync.upcoming(now, now + timedelta(hours=4))
+            scheduled = self._reconcile_reminders(events) if self.scheduler is not None else {}
             
-            events_result = service.events().list(
-                calendarId='primary',
-                timeMin=time_min,
-                timeMax=time_max,
-                maxResults=10,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            
-            events = events_result.get('items', [])
+            # Activity for the adaptive poll: what actually changed upstream.
+            # Declined events are never marked seen and come back as pending
+            # every poll, so counting those would pin the interval low.
+            new_count = sync_result['changed'] + sync_result['deleted']
             
             if not events:
                 self.last_check_time = datetime.now().isoformat()
-                return {'count': 0, 'message': 'No upcoming events in the next 4 hours! 📅'}
+                return {'count': 0, 'new_count': new_count, 'sync': sync_result, 'message': 'No upcoming events in the next 4 hours! 📅'}
             
             reminders_sent = []
+            reminders_scheduled = []
+            
+            reminded_ids = self.seen_store.seen_many('calendar', [event['id'] for event in events])
             
+            pending = []
             for event in events:
-                event_id = event['id']
-                event_title = event.get('summary', 'No Title')
-                event_start = event['start'].get('dateTime', event['start'].get('date'))
-                event_description = event.get('description', '')
-                
-                reminder_key = f'calendar_reminder_{event_id}'
-                already_reminded = self.memory_manager.get_memory(reminder_key)
-                
-                if already_reminded:
+                if event['id'] in reminded_ids or event['id'] in scheduled:
                     continue
                 
-                event_time_str = event_start.split('T')[1].split('-')[0] if 'T' in event_start else event_start
-                
-                decision = self.ai_brain.decide_calendar_reminder(
-                    event_title,
-                    event_time_str,
-                    event_description
-                )
+                event_start = event['start'].get('dateTime', event['start'].get('date'))
+                pending.append({
+                    'id': event['id'],
+                    'title': event.get('summary', 'No Title'),
+                    'start': event_start,
+                    'time': event_start.split('T')[1].split('-')[0] if 'T' in event_start else event_start,
+                    'description': event.get('description', '')
+                })
+            
+            # Decisions for all pending events go out concurrently, results stay in order
+            decisions = self.ai_brain.decide_calendar_reminders(
+                [(p['title'], p['time'], p['description']) for p in pending]
+            )
+            
+            for item, decision in zip(pending, decisions):
+                event_id = item['id']
+                event_title = item['title']
+                event_start = item['start']
                 
                 if decision.get('remind', False):
-                    self.memory_manager.store_memory(
-                        reminder_key,
-                        {'title': event_title, 'time': event_start, 'reminded': True},
-                        category='calendar'
-                    )
-                    
                     message = decision.get('message', f"Hey babe, you have '{event_title}' coming up soon! 📅✨")
+                    start_at = _parse_start(event_start)
+                    
+                    fire_at = start_at - self.lead if start_at is not None else None
+                    if self.scheduler is not None and fire_at is not None and fire_at > datetime.now(timezone.utc):
+                        scheduled[event_id] = {
+                            'title': event_title,
+                            'start': event_start,
+                            'fire_at': fire_at.isoformat(),
+                            'message': message
+                        }
+                        self._save_reminders(scheduled)
+                        self._schedule_reminder(event_id, fire_at)
+                        reminders_scheduled.append({'title': event_title, 'time': event_start, 'fire_at': fire_at.isoformat()})
+                        continue
+                    
+                    self.seen_store.mark_seen('calendar', event_id, CALENDAR_SEEN_TTL)
                     self.notification_manager.send_notification(message)
                     
                     reminders_sent.append({
@@ -85,18 +202,29 @@ class CalendarMonitor:
             
             self.last_check_time = datetime.now().isoformat()
             
-            if reminders_sent:
+            if reminders_sent or reminders_scheduled:
                 return {
                     'count': len(events),
+                    'new_count': new_count,
+                    'pending': len(pending),
+                    'sync': sync_result,
                     'reminders_sent': len(reminders_sent),
-                    'events': reminders_sent
+                    'reminders_scheduled': len(reminders_scheduled),
+                    'events': reminders_sent,
+                    'scheduled': reminders_scheduled
                 }
             else:
                 return {
                     'count': len(events),
+                    'new_count': new_count,
+                    'pending': len(pending),
+                    'sync': sync_result,
                     'message': f"Found {len(events)} events - no urgent reminders needed! 😊"
                 }
         
         except Exception as e:
             print(f"Calendar check error: {e}")
+            # Rejected token: the next poll fetches a fresh one
+            if isinstance(e, HttpError) and e.resp.status == 401:
+                ReplitConnector.invalidate('google-calendar')
             return {'error': str(e)}
@@ -0,0 +1,124 @@
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from cryptography.fernet import InvalidToken
+from googleapiclient.errors import HttpError
+
+SYNC_TOKEN_KEY = 'calendar_sync_token'
+PAGE_SIZE = 250
+# A full sync starts this far back, so events already under way are kept
+FULL_SYNC_LOOKBACK = timedelta(days=1)
+# Past events are pruned from the local store once they are this old
+RETENTION = 2 * 86400
+
+# Only what the monitor needs is kept locally
+EVENT_FIELDS = ('id', 'summary', 'description', 'start', 'end', 'status')
+
+def _start_timestamp(event):
+    start = event.get('start', {})
+    if 'dateTime' in start:
+        return datetime.fromisoformat(start['dateTime'].replace('Z', '+00:00')).timestamp(), False
+    # All-day events start at local midnight
+    return datetime.fromisoformat(start['date']).timestamp(), True
+
+class CalendarSync:
+    # Mirrors the primary calendar into calendar_events using Google's
+    # nextSyncToken: one full paginated listing, then only changes. A 410
+    # means the token expired, so the table is wiped and fully resynced.
+    def __init__(self, memory_manager, calendar_id='primary', page_size=PAGE_SIZE):
+        self.memory_manager = memory_manager
+        self.calendar_id = calendar_id
+        self.page_size = page_size
+
+    def _list_changes(self, service, **params):
+        items = []
+        page_token = None
+        requests = 0
+        while True:
+            response = service.events().list(
+                calendarId=self.calendar_id,
+                singleEvents=True,
+                maxResults=self.page_size,
+                pageToken=page_token,
+                **params
+            ).execute()
+            requests += 1
+            items.extend(response.get('items', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return items, response.get('nextSyncToken'), requests
+
+    def sync(self, service):
+        sync_token = self.memory_manager.get_memory(SYNC_TOKEN_KEY)
+        mode = 'incremental' if sync_token else 'full'
+        reset = False
+
+        if sync_token:
+            try:
+                items, next_token, requests = self._list_changes(service, syncToken=sync_token)
+            except HttpError as e:
+                # 410 Gone: the token is too old for Google to replay
+                if e.resp.status != 410:
+                    raise
+                print("⚠️ Calendar sync token expired - falling back to a full resync")
+                sync_token = None
+                mode = 'full'
+
+        if not sync_token:
+            time_min = (datetime.now(timezone.utc) - FULL_SYNC_LOOKBACK).isoformat()
+            items, next_token, requests = self._list_changes(service, timeMin=time_min)
+            reset = True
+
+        changed, deleted = self._apply(items, reset)
+        if next_token:
+            self.memory_manager.store_memory(SYNC_TOKEN_KEY, next_token, category='sync')
+        return {'mode': mode, 'requests': requests, 'changed': changed, 'deleted': deleted}
+
+    def _apply(self, items, reset):
+        now = time.time()
+        upserts = []
+        cancelled = []
+        for event in items:
+            if event.get('status') == 'cancelled':
+                cancelled.append((event['id'],))
+                continue
+            try:
+                start_ts, all_day = _start_timestamp(event)
+            except (KeyError, ValueError):
+                continue
+            payload = {field: event[field] for field in EVENT_FIELDS if field in event}
+            encrypted_event = self.memory_manager.cipher.encrypt(json.dumps(payload).encode())
+            upserts.append((event['id'], start_ts, int(all_day), encrypted_event, now))
+
+        conn = self.memory_manager.get_connection()
+        with conn:
+            if reset:
+                conn.execute('DELETE FROM calendar_events')
+            conn.executemany('DELETE FROM calendar_events WHERE event_id = ?', cancelled)
+            conn.executemany('''
+                INSERT OR REPLACE INTO calendar_events (event_id, start_ts, all_day, encrypted_event, synced_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', upserts)
+            conn.execute('DELETE FROM calendar_events WHERE start_ts < ?', (now - RETENTION,))
+        return len(upserts), len(cancelled)
+
+    def upcoming(self, start, end):
+        # Events starting in [start, end) plus all-day events still under way,
+        # oldest first, in Google's item shape
+        conn = self.memory_manager.get_connection()
+        rows = conn.execute('''
+            SELECT event_id, encrypted_event FROM calendar_events
+            WHERE start_ts < ? AND (start_ts >= ? OR (all_day = 1 AND start_ts > ?))
+            ORDER BY start_ts
+        ''', (end.timestamp(), start.timestamp(), start.timestamp() - 86400)).fetchall()
+
+        events = []
+        for event_id, encrypted_event in rows:
+            try:
+                events.append(json.loads(self.memory_manager.cipher.decrypt(encrypted_event).decode()))
+            except (InvalidToken, ValueError):
+                print(f"⚠️ Skipping unreadable cached calendar event {event_id}")
+        return events
+
+    def count(self):
+        return self.memory_manager.get_connection().execute('SELECT COUNT(*) FROM calendar_events').fetchone()[0]
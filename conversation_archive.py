@@ -0,0 +1,169 @@
+import json
+import os
+import sqlite3
+import time
+import zlib
+from datetime import datetime, timedelta
+from cryptography.fernet import InvalidToken
+from modules.conversation_context import SUMMARY_KEY
+from modules.memory import _search_words
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 90
+
+class ConversationArchiver:
+    # Moves conversations older than max_age_days out of the hot table into
+    # compressed, encrypted chunks in conversation_archive, then gives the
+    # freed pages back to the filesystem with an incremental VACUUM.
+    # Archived turns drop out of the FTS index and chat recall; search()
+    # scans the chunks on demand.
+    def __init__(self, memory_manager, max_age_days=DEFAULT_ARCHIVE_AFTER_DAYS, chunk_size=500,
+                 vacuum_pages=2000):
+        self.memory_manager = memory_manager
+        self.max_age_days = max_age_days
+        self.chunk_size = chunk_size
+        self.vacuum_pages = vacuum_pages
+
+    def db_report(self):
+        conn = self.memory_manager.get_connection()
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+        free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        wal_path = f'{self.memory_manager.db_path}-wal'
+        archived = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(row_count), 0) FROM conversation_archive'
+        ).fetchone()
+        return {
+            'db_bytes': page_size * page_count,
+            'wal_bytes': os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+            'free_pages': free_pages,
+            'conversations': conn.execute('SELECT COUNT(*) FROM conversations').fetchone()[0],
+            'memories': conn.execute('SELECT COUNT(*) FROM memories').fetchone()[0],
+            'archive_chunks': archived[0],
+            'archived_conversations': archived[1]
+        }
+
+    def _ensure_incremental_vacuum(self, conn):
+        # auto_vacuum can only be switched on an existing database by a full
+        # VACUUM; that happens once, after which incremental_vacuum is cheap.
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+            return False
+        try:
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+        except sqlite3.OperationalError as e:
+            # Busy with another worker's reader; try again on the next run
+            print(f"⚠️ VACUUM deferred: {e}")
+            return False
+        print("🗜️ Switched memory database to incremental auto-vacuum")
+        return True
+
+    def _archivable_through_id(self):
+        # Never archive turns the rolling summary has not folded in yet,
+        # or they would silently fall out of Grace's memory.
+        state = self.memory_manager.get_memory(SUMMARY_KEY) or {}
+        return state.get('through_id', 0)
+
+    def archive(self):
+        started = time.monotonic()
+        before = self.db_report()
+        conn = self.memory_manager.get_connection()
+        cutoff = datetime.now() - timedelta(days=self.max_age_days)
+        through_id = self._archivable_through_id()
+
+        chunks = 0
+        archived_ids = []
+        while True:
+            rows = conn.execute('''
+                SELECT id, user_message, bot_response, timestamp
+                FROM conversations
+                WHERE timestamp < ? AND id <= ?
+                ORDER BY id
+                LIMIT ?
+            ''', (cutoff, through_id, self.chunk_size)).fetchall()
+            if not rows:
+                break
+
+            payload = json.dumps([list(r) for r in rows], ensure_ascii=False).encode()
+            encrypted_chunk = self.memory_manager.cipher.encrypt(zlib.compress(payload, 9))
+            ids = [r[0] for r in rows]
+
+            with conn:
+                conn.execute('''
+                    INSERT INTO conversation_archive
+                        (first_id, last_id, first_timestamp, last_timestamp, row_count, encrypted_chunk, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (ids[0], ids[-1], rows[0][3], rows[-1][3], len(rows), encrypted_chunk, time.time()))
+                conn.execute(
+                    f'DELETE FROM conversations WHERE id IN ({",".join("?" * len(ids))})', ids
+                )
+
+            for conversation_id in ids:
+                self.memory_manager.notify_write('conversation', conversation_id, None)
+            archived_ids += ids
+            chunks += 1
+            if len(rows) < self.chunk_size:
+                break
+
+        if not self._ensure_incremental_vacuum(conn):
+            conn.execute(f'PRAGMA incremental_vacuum({int(self.vacuum_pages)})').fetchall()
+        try:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ WAL checkpoint skipped: {e}")
+
+        after = self.db_report()
+        result = {
+            'archived': len(archived_ids),
+            'chunks': chunks,
+            'cutoff': cutoff.isoformat(),
+            'before': before,
+            'after': after,
+            'seconds': round(time.monotonic() - started, 3)
+        }
+        print(f"🗃️ Archived {len(archived_ids)} conversations in {chunks} chunks; "
+              f"DB {before['db_bytes']} -> {after['db_bytes']} bytes")
+        return result
+
+    def _chunks(self, since=None, until=None):
+        clauses = []
+        params = []
+        if since is not None:
+            clauses.append('last_timestamp >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('first_timestamp <= ?')
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        conn = self.memory_manager.get_connection()
+        rows = conn.execute(
+            f'SELECT id, encrypted_chunk FROM conversation_archive {where} ORDER BY last_id DESC', params
+        ).fetchall()
+        for chunk_id, encrypted_chunk in rows:
+            try:
+                yield json.loads(zlib.decompress(self.memory_manager.cipher.decrypt(encrypted_chunk)).decode())
+            except (InvalidToken, zlib.error, ValueError) as e:
+                print(f"⚠️ Skipping unreadable archive chunk {chunk_id}: {e}")
+
+    def search(self, query, limit=5, since=None, until=None):
+        # Word-overlap ranking over decrypted chunks; archives are cold, so a
+        # linear scan on demand beats keeping a second index for them.
+        words = set(_search_words(query))
+        if not words:
+            return []
+
+        hits = []
+        for chunk in self._chunks(since, until):
+            for conversation_id, user_message, bot_response, timestamp in chunk:
+                score = len(words & set(_search_words(f'{user_message} {bot_response}')))
+                if score:
+                    hits.append((score, conversation_id, {
+                        'id': conversation_id,
+                        'user': user_message,
+                        'bot': bot_response,
+                        'timestamp': timestamp,
+                        'archived': True
+                    }))
+
+        hits.sort(key=lambda hit: (-hit[0], -hit[1]))
+        return [hit[2] for hit in hits[:limit]]
@@ -0,0 +1,198 @@
+import math
+import threading
+from modules.memory import _value_text
+
+SUMMARY_KEY = 'conversation_summary'
+
+SUMMARY_PROMPT = """Here is the running summary of your past chats with your partner:
+{summary}
+
+Fold these newer exchanges into it:
+{exchanges}
+
+Write the updated summary in at most {max_words} words. Keep names, plans, preferences, feelings
+and anything you promised; drop small talk. Reply with the summary only."""
+
+def estimate_tokens(text):
+    # ~4 characters per token is close enough for budgeting English chat
+    return math.ceil(len(text or '') / 4)
+
+def _truncate(text, max_tokens):
+    text = text or ''
+    max_chars = max_tokens * 4
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + '…'
+
+class ConversationContext:
+    # Builds chat prompts inside a fixed token budget from a rolling summary of
+    # older turns plus as many recent raw turns as fit. Turns that fall out of
+    # the recent window get folded into the summary by one background worker.
+    def __init__(self, memory_manager, ai_brain, token_budget=1500, recent_turns=8,
+                 max_turn_tokens=200, summary_tokens=300, summarize_every=4,
+                 recall_tokens=250, recall_limit=3, vector_store=None, vector_budget_ms=25):
+        self.memory_manager = memory_manager
+        self.ai_brain = ai_brain
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.max_turn_tokens = max_turn_tokens
+        self.summary_tokens = summary_tokens
+        self.summarize_every = summarize_every
+        self.recall_tokens = recall_tokens
+        self.recall_limit = recall_limit
+        self.vector_store = vector_store
+        self.vector_budget_ms = vector_budget_ms
+        self._summary_wanted = threading.Event()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def _summary_state(self):
+        return self.memory_manager.get_memory(SUMMARY_KEY) or {'summary': '', 'through_id': 0}
+
+    def build_messages(self, personality, user_message):
+        state = self._summary_state()
+        summary = _truncate(state['summary'], self.summary_tokens)
+        recent = self.memory_manager.get_recent_conversations(self.recent_turns)
+
+        stats = {
+            'budget': self.token_budget,
+            'personality': estimate_tokens(personality),
+            'user': estimate_tokens(user_message),
+            'summary': estimate_tokens(summary)
+        }
+        remaining = self.token_budget - stats['personality'] - stats['user'] - stats['summary']
+
+        # Older exchanges and memories relevant to this message, from the full-text index
+        recall = self._recall(user_message, [c['id'] for c in recent], min(self.recall_tokens, remaining))
+        stats['recall_items'] = len(recall)
+        stats['recall'] = sum(estimate_tokens(line) for line in recall)
+        remaining -= stats['recall']
+
+        # Newest turns first, stop at the first one that no longer fits
+        turns = []
+        recent_tokens = 0
+        for convo in reversed(recent):
+            turn = f"User: {_truncate(convo['user'], self.max_turn_tokens)}\nGrace: {_truncate(convo['bot'], self.max_turn_tokens)}"
+            cost = estimate_tokens(turn)
+            if cost > remaining - recent_tokens:
+                break
+            turns.append(turn)
+            recent_tokens += cost
+        turns.reverse()
+
+        stats['recent_turns'] = len(turns)
+        stats['recent'] = recent_tokens
+        stats['estimated_prompt'] = (
+            stats['personality'] + stats['user'] + stats['summary'] + stats['recall'] + recent_tokens
+        )
+
+        messages = [{"role": "system", "content": personality}]
+        if summary:
+            messages.append({"role": "system", "content": f"What you remember from earlier chats:\n{summary}"})
+        if recall:
+            messages.append({"role": "system", "content": "Things that might be relevant:\n" + "\n".join(recall)})
+        messages.append({"role": "system", "content": "Recent conversation context:\n" + "\n".join(turns)})
+        messages.append({"role": "user", "content": user_message})
+        return messages, stats
+
+    def _recall(self, user_message, recent_ids, budget):
+        if budget <= 0 or not user_message.strip():
+            return []
+
+        conversations = self.memory_manager.search_conversations(user_message, self.recall_limit, exclude_ids=recent_ids)
+        memories = self.memory_manager.search_memories(user_message, self.recall_limit)
+        conversations, memories = self._add_semantic_hits(user_message, recent_ids, conversations, memories)
+
+        candidates = [
+            f"- Earlier you chatted: User: {_truncate(hit['user'], 60)} / Grace: {_truncate(hit['bot'], 60)}"
+            for hit in conversations
+        ]
+        candidates += [
+            f"- Remembered ({hit['category'] or 'memory'}): {_truncate(hit['snippet'], 60)}"
+            for hit in memories
+        ]
+
+        lines = []
+        for line in candidates:
+            cost = estimate_tokens(line)
+            if cost > budget:
+                continue
+            lines.append(line)
+            budget -= cost
+        return lines
+
+    def _add_semantic_hits(self, user_message, recent_ids, conversations, memories):
+        # Keyword hits come first; the vector index adds paraphrases the
+        # full-text match missed, within its own latency budget.
+        if self.vector_store is None:
+            return conversations, memories
+
+        # The summary is already in the prompt; recent turns are too
+        exclude = {('memory', SUMMARY_KEY)} | {('conversation', str(i)) for i in recent_ids}
+        exclude |= {('conversation', str(hit['id'])) for hit in conversations}
+        exclude |= {('memory', hit['key']) for hit in memories}
+        hits = self.vector_store.search(
+            user_message, k=self.recall_limit, budget_ms=self.vector_budget_ms, exclude=exclude
+        )
+
+        found = self.memory_manager.get_conversations_by_ids(
+            [hit['ref'] for hit in hits if hit['kind'] == 'conversation']
+        )
+        conversations = conversations + [found[int(hit['ref'])] for hit in hits
+                                         if hit['kind'] == 'conversation' and int(hit['ref']) in found]
+
+        keys = [hit['ref'] for hit in hits if hit['kind'] == 'memory']
+        values = self.memory_manager.get_memories_many(keys)
+        memories = memories + [
+            {'key': key, 'value': values[key], 'category': None, 'snippet': _value_text(values[key])[:200]}
+            for key in keys if key in values
+        ]
+        return conversations, memories
+
+    def maybe_summarize_async(self):
+        # Non-blocking: wakes the summarizer worker. Requests that arrive while
+        # a pass is running collapse into a single follow-up pass.
+        if self._worker is None or not self._worker.is_alive():
+            with self._worker_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._summarize_loop, name='conversation-summary', daemon=True)
+                    self._worker.start()
+        self._summary_wanted.set()
+
+    def _summarize_loop(self):
+        while True:
+            self._summary_wanted.wait()
+            self._summary_wanted.clear()
+            try:
+                self.update_summary()
+            except Exception as e:
+                print(f"⚠️ Conversation summary update failed: {e}")
+
+    def update_summary(self):
+        recent = self.memory_manager.get_recent_conversations(self.recent_turns)
+        if not recent:
+            return False
+
+        state = self._summary_state()
+        # Only turns that have left the recent window get summarized
+        pending = self.memory_manager.get_conversations_between(state['through_id'], recent[0]['id'], limit=20)
+        if len(pending) < self.summarize_every:
+            return False
+
+        exchanges = "\n".join(
+            f"User: {_truncate(c['user'], self.max_turn_tokens)}\nGrace: {_truncate(c['bot'], self.max_turn_tokens)}"
+            for c in pending
+        )
+        prompt = SUMMARY_PROMPT.format(
+            summary=state['summary'] or '(nothing yet)',
+            exchanges=exchanges,
+            max_words=int(self.summary_tokens * 0.75)
+        )
+        summary = self.ai_brain.complete_text(
+            'summary', prompt, max_tokens=self.summary_tokens, items=len(pending)
+        ).strip()
+        if summary:
+            self.memory_manager.store_memory(
+                SUMMARY_KEY,
+                {'summary': summary, 'through_id': pending[-1]['id']},
+                category='conversation'
+            )
+        return True
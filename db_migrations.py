@@ -0,0 +1,199 @@
+# Versioned schema migrations for gracebot_memory.db.
+#
+# The applied version lives in SQLite's user_version pragma. Append new
+# migrations to MIGRATIONS with the next version number - never edit one
+# that has already shipped, existing databases won't run it again.
+
+def _create_base_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS memories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT UNIQUE,
+            encrypted_value BLOB,
+            category TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS conversations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_message TEXT,
+            bot_response TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def _add_lookup_indexes(conn):
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_memories_category ON memories (category)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_memories_updated_at ON memories (updated_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_conversations_timestamp ON conversations (timestamp)')
+
+def _create_seen_ids(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS seen_ids (
+            namespace TEXT NOT NULL,
+            item_id TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (namespace, item_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_seen_ids_expires_at ON seen_ids (expires_at)')
+
+    # Move the old per-item marker rows over. Calendar markers carried nothing
+    # else and are dropped; email rows stay as the triage decision history.
+    conn.execute('''
+        INSERT OR IGNORE INTO seen_ids (namespace, item_id, expires_at)
+        SELECT 'email', substr(key, 15), CAST(strftime('%s', 'now') AS REAL) + 90 * 86400
+        FROM memories WHERE substr(key, 1, 14) = 'email_checked_'
+    ''')
+    conn.execute('''
+        INSERT OR IGNORE INTO seen_ids (namespace, item_id, expires_at)
+        SELECT 'calendar', substr(key, 19), CAST(strftime('%s', 'now') AS REAL) + 2 * 86400
+        FROM memories WHERE substr(key, 1, 18) = 'calendar_reminder_'
+    ''')
+    conn.execute("DELETE FROM memories WHERE substr(key, 1, 18) = 'calendar_reminder_'")
+
+def _create_decision_cache(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS decision_cache (
+            cache_key TEXT PRIMARY KEY,
+            decision_type TEXT NOT NULL,
+            encrypted_value BLOB NOT NULL,
+            tokens INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            last_used_at REAL NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_decision_cache_last_used_at ON decision_cache (last_used_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_decision_cache_expires_at ON decision_cache (expires_at)')
+
+def _create_search_index(conn):
+    # Conversations are stored in plaintext, so FTS5 indexes them directly as
+    # an external-content table kept in sync by triggers.
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts USING fts5(
+            user_message, bot_response,
+            content='conversations', content_rowid='id',
+            tokenize='porter unicode61'
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS conversations_fts_insert AFTER INSERT ON conversations BEGIN
+            INSERT INTO conversations_fts (rowid, user_message, bot_response)
+            VALUES (new.id, new.user_message, new.bot_response);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS conversations_fts_delete AFTER DELETE ON conversations BEGIN
+            INSERT INTO conversations_fts (conversations_fts, rowid, user_message, bot_response)
+            VALUES ('delete', old.id, old.user_message, old.bot_response);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS conversations_fts_update AFTER UPDATE ON conversations BEGIN
+            INSERT INTO conversations_fts (conversations_fts, rowid, user_message, bot_response)
+            VALUES ('delete', old.id, old.user_message, old.bot_response);
+            INSERT INTO conversations_fts (rowid, user_message, bot_response)
+            VALUES (new.id, new.user_message, new.bot_response);
+        END
+    ''')
+    conn.execute("INSERT INTO conversations_fts (conversations_fts) VALUES ('rebuild')")
+
+    # Memory values are encrypted, so their index only holds keyed hashes of
+    # the words (a blind index). MemoryManager fills it, rowid = memories.id.
+    conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(terms, tokenize='unicode61')")
+
+def _create_conversation_archive(conn):
+    # Old conversations move here in zlib-compressed, encrypted chunks of
+    # consecutive rows; the id/timestamp bounds let searches skip chunks.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS conversation_archive (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            first_id INTEGER NOT NULL,
+            last_id INTEGER NOT NULL,
+            first_timestamp TIMESTAMP NOT NULL,
+            last_timestamp TIMESTAMP NOT NULL,
+            row_count INTEGER NOT NULL,
+            encrypted_chunk BLOB NOT NULL,
+            created_at REAL NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_conversation_archive_last_timestamp ON conversation_archive (last_timestamp)')
+
+def _create_notification_queue(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS notification_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel TEXT NOT NULL,
+            encrypted_message BLOB NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            available_at REAL NOT NULL,
+            lease_expires_at REAL,
+            sent_at REAL,
+            last_error TEXT
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_notification_queue_status ON notification_queue (status, available_at)')
+
+def _create_calendar_events(conn):
+    # Local mirror of the synced calendar; start_ts is the only plaintext,
+    # so upcoming-event queries stay an index range scan.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS calendar_events (
+            event_id TEXT PRIMARY KEY,
+            start_ts REAL NOT NULL,
+            all_day INTEGER NOT NULL DEFAULT 0,
+            encrypted_event BLOB NOT NULL,
+            synced_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_calendar_events_start_ts ON calendar_events (start_ts)')
+
+MIGRATIONS = [
+    (1, 'base memories/conversations tables', _create_base_tables),
+    (2, 'category, updated_at and timestamp indexes', _add_lookup_indexes),
+    (3, 'seen_ids store for processed email/calendar IDs', _create_seen_ids),
+    (4, 'decision_cache for repeated AI decisions', _create_decision_cache),
+    (5, 'FTS5 search over conversations and memories', _create_search_index),
+    (6, 'conversation_archive for compacted old conversations', _create_conversation_archive),
+    (7, 'notification_queue for outbound messages', _create_notification_queue),
+    (8, 'calendar_events local store for incremental sync', _create_calendar_events),
+]
+
+def get_schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def run_migrations(conn):
+    applied = []
+
+    for version, name, migrate in MIGRATIONS:
+        if get_schema_version(conn) >= version:
+            continue
+
+        # IMMEDIATE takes the write lock up front, so when several gunicorn
+        # workers start together only one of them runs each migration.
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+
+            migrate(conn)
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        applied.append(version)
+        print(f"🗄️ Applied DB migration {version}: {name}")
+
+    if applied:
+        conn.execute('ANALYZE')
+
+    return applied
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import threading
+import time
+from cryptography.fernet import InvalidToken
+
+# How long a decision for identical inputs stays reusable, per decision type
+DECISION_TTLS = {
+    'email': 7 * 86400,
+    'calendar': 86400,
+    'camera': 6 * 3600,
+}
+DEFAULT_DECISION_TTL = 3600
+
+class DecisionCache:
+    # Content-addressed cache of AIBrain decisions, stored encrypted in the
+    # memory database. Keys hash (model, prompt template, normalized inputs),
+    # so editing a prompt or switching models never serves an old answer.
+    def __init__(self, memory_manager, ttls=None, max_entries=5000, evict_every=50):
+        self.memory_manager = memory_manager
+        self.ttls = dict(DECISION_TTLS, **(ttls or {}))
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model, template, inputs):
+        payload = json.dumps([model, template, inputs], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, cache_key):
+        conn = self.memory_manager.get_connection()
+        now = time.time()
+        row = conn.execute(
+            'SELECT encrypted_value, tokens FROM decision_cache WHERE cache_key = ? AND expires_at > ?',
+            (cache_key, now)
+        ).fetchone()
+
+        decision = None
+        if row:
+            try:
+                decision = json.loads(self.memory_manager.cipher.decrypt(row[0]).decode())
+            except (InvalidToken, ValueError):
+                decision = None
+
+        with self._lock:
+            if decision is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_tokens += row[1]
+
+        with conn:
+            conn.execute('UPDATE decision_cache SET last_used_at = ? WHERE cache_key = ?', (now, cache_key))
+        return decision
+
+    def put(self, decision_type, cache_key, decision, tokens=0):
+        now = time.time()
+        ttl = self.ttls.get(decision_type, DEFAULT_DECISION_TTL)
+        encrypted_value = self.memory_manager.cipher.encrypt(json.dumps(decision).encode())
+
+        conn = self.memory_manager.get_connection()
+        with conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO decision_cache
+                    (cache_key, decision_type, encrypted_value, tokens, created_at, expires_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (cache_key, decision_type, encrypted_value, int(tokens), now, now + ttl, now))
+
+        with self._lock:
+            self._puts += 1
+            due = self._puts % self.evict_every == 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        conn = self.memory_manager.get_connection()
+        with conn:
+            conn.execute('DELETE FROM decision_cache WHERE expires_at <= ?', (time.time(),))
+            # Over the size bound: drop the least recently used entries
+            conn.execute('''
+                DELETE FROM decision_cache WHERE cache_key IN (
+                    SELECT cache_key FROM decision_cache
+                    ORDER BY last_used_at
+                    LIMIT max(0, (SELECT COUNT(*) FROM decision_cache) - ?)
+                )
+            ''', (self.max_entries,))
+
+    def stats(self):
+        entries = self.memory_manager.get_connection().execute('SELECT COUNT(*) FROM decision_cache').fetchone()[0]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'saved_tokens': self.saved_tokens
+            }
@@ -0,0 +1,116 @@
+import math
+import threading
+from email.utils import parseaddr
+from nltk.tokenize import wordpunct_tokenize
+
+MODEL_KEY = 'email_classifier_model'
+LABELS = ('urgent', 'normal')
+
+class EmailClassifier:
+    # Multinomial naive Bayes over sender, sender domain and subject tokens,
+    # trained incrementally on the LLM's own urgency decisions. Only a
+    # confident "not urgent" skips the LLM - urgent mail still needs it to
+    # write the caring message.
+    def __init__(self, memory_manager, threshold=0.95, min_examples=30):
+        self.memory_manager = memory_manager
+        self.threshold = threshold
+        self.min_examples = min_examples
+        self.feature_counts = {label: {} for label in LABELS}
+        self.feature_totals = {label: 0 for label in LABELS}
+        self.doc_counts = {label: 0 for label in LABELS}
+        self.stats = {'predictions': 0, 'llm_avoided': 0}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def features(sender, subject):
+        _, address = parseaddr(sender or '')
+        address = address.lower()
+        domain = address.rsplit('@', 1)[-1] if '@' in address else ''
+
+        tokens = {t.lower() for t in wordpunct_tokenize(subject or '') if t.isalnum() and len(t) > 1}
+        return [f'sender:{address}', f'domain:{domain}'] + [f'subject:{t}' for t in sorted(tokens)]
+
+    def _load(self):
+        model = self.memory_manager.get_memory(MODEL_KEY)
+        if model:
+            self.feature_counts = model['feature_counts']
+            self.feature_totals = model['feature_totals']
+            self.doc_counts = model['doc_counts']
+            return
+
+        # First run: bootstrap from the decisions the LLM already made
+        history = self.memory_manager.get_memories_by_category('emails')
+        for record in history.values():
+            # Parse fallbacks saved before they were tagged still read 'llm'
+            if (isinstance(record, dict) and record.get('source', 'llm') == 'llm'
+                    and record.get('reason') != 'Could not parse'):
+                self.learn(record.get('sender', ''), record.get('subject', ''), bool(record.get('urgent')))
+        if history:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            model = {
+                'feature_counts': self.feature_counts,
+                'feature_totals': self.feature_totals,
+                'doc_counts': self.doc_counts
+            }
+            self.memory_manager.store_memory(MODEL_KEY, model, category='models')
+
+    def learn(self, sender, subject, urgent):
+        label = 'urgent' if urgent else 'normal'
+        with self._lock:
+            counts = self.feature_counts[label]
+            for feature in self.features(sender, subject):
+                counts[feature] = counts.get(feature, 0) + 1
+                self.feature_totals[label] += 1
+            self.doc_counts[label] += 1
+
+    def urgent_probability(self, sender, subject):
+        features = self.features(sender, subject)
+        with self._lock:
+            total_docs = sum(self.doc_counts.values())
+            if total_docs == 0:
+                return 0.5
+            vocabulary = len(set(self.feature_counts['urgent']) | set(self.feature_counts['normal'])) or 1
+
+            log_scores = {}
+            for label in LABELS:
+                # Laplace smoothing on both the prior and the feature likelihoods
+                score = math.log((self.doc_counts[label] + 1) / (total_docs + len(LABELS)))
+                denominator = self.feature_totals[label] + vocabulary
+                for feature in features:
+                    score += math.log((self.feature_counts[label].get(feature, 0) + 1) / denominator)
+                log_scores[label] = score
+
+        top = max(log_scores.values())
+        weights = {label: math.exp(score - top) for label, score in log_scores.items()}
+        return weights['urgent'] / sum(weights.values())
+
+    def is_trained(self):
+        return sum(self.doc_counts.values()) >= self.min_examples
+
+    def confident_not_urgent(self, sender, subject):
+        # Returns (skip_llm, p_urgent)
+        with self._lock:
+            self.stats['predictions'] += 1
+        if not self.is_trained():
+            return False, None
+
+        p_urgent = self.urgent_probability(sender, subject)
+        skip = (1 - p_urgent) >= self.threshold
+        if skip:
+            with self._lock:
+                self.stats['llm_avoided'] += 1
+        return skip, p_urgent
+
+    def get_stats(self):
+        with self._lock:
+            predictions = self.stats['predictions']
+            return dict(
+                self.stats,
+                avoided_fraction=round(self.stats['llm_avoided'] / predictions, 3) if predictions else 0.0,
+                examples=sum(self.doc_counts.values()),
+                threshold=self.threshold
+            )
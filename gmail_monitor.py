@@ -1,67 +1,243 @@
+import os
+import time
 from datetime import datetime
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
+from googleapiclient.errors import HttpError
 from modules.replit_connector import ReplitConnector
+from modules.google_services import get_google_service
+from modules.seen_store import SeenStore, EMAIL_SEEN_TTL
+from modules.email_classifier import EmailClassifier
+
+HISTORY_ID_KEY = 'gmail_history_id'
+RETRY_IDS_KEY = 'gmail_retry_message_ids'
+
+# Gmail accepts up to 100 calls per batch but throttles above ~50
+METADATA_BATCH_SIZE = 50
 
 class GmailMonitor:
-    def __init__(self, memory_manager, ai_brain, notification_manager):
+    def __init__(self, memory_manager, ai_brain, notification_manager, seen_store=None,
+                 incremental_sync=True, max_full_sync=100, email_classifier=None):
         self.memory_manager = memory_manager
         self.ai_brain = ai_brain
         self.notification_manager = notification_manager
+        self.seen_store = seen_store or SeenStore(memory_manager)
+        self.incremental_sync = incremental_sync
+        self.max_full_sync = max_full_sync
+        self.email_classifier = email_classifier or EmailClassifier(
+            memory_manager,
+            threshold=float(os.environ.get('EMAIL_CLASSIFIER_THRESHOLD', 0.95))
+        )
         self.last_check_time = None
     
     def _get_gmail_service(self):
         try:
             creds_data = ReplitConnector.get_gmail_credentials()
-            credentials = Credentials(token=creds_data['access_token'])
-            service = build('gmail', 'v1', credentials=credentials)
-            return service
+            return get_google_service('gmail', 'v1', creds_data['access_token'])
         except Exception as e:
             print(f"Gmail service error: {e}")
             return None
     
+    def _check_unauthorized(self, error):
+        # Without an expires_at the connector token is cached for a while; a
+        # revoked or early-expired one must not keep failing until then
+        if isinstance(error, HttpError) and error.resp.status == 401:
+            ReplitConnector.invalidate('google-mail')
+    
+    def _save_history_id(self, history_id):
+        if self.incremental_sync and history_id:
+            self.memory_manager.store_memory(HISTORY_ID_KEY, str(history_id), category='sync')
+    
+    def _full_sync(self, service):
+        # Take the mailbox's historyId before listing so nothing that arrives
+        # mid-listing falls between this snapshot and the next incremental run.
+        history_id = service.users().getProfile(userId='me').execute().get('historyId')
+        
+        message_ids = []
+        page_token = None
+        while len(message_ids) < self.max_full_sync:
+            results = service.users().messages().list(
+                userId='me',
+                labelIds=['INBOX', 'UNREAD'],
+                maxResults=min(100, self.max_full_sync - len(message_ids)),
+                pageToken=page_token
+            ).execute()
+            
+            message_ids.extend(msg['id'] for msg in results.get('messages', []))
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+        
+        if page_token:
+            print(f"⚠️ Full Gmail sync capped at {self.max_full_sync} unread messages")
+        
+        return message_ids, history_id
+    
+    def _incremental_sync(self, service, start_history_id):
+        message_ids = []
+        history_id = start_history_id
+        page_token = None
+        while True:
+            results = service.users().history().list(
+                userId='me',
+                startHistoryId=start_history_id,
+                historyTypes=['messageAdded'],
+                labelId='INBOX',
+                pageToken=page_token
+            ).execute()
+            
+            for record in results.get('history', []):
+                for added in record.get('messagesAdded', []):
+                    message = added.get('message', {})
+                    labels = message.get('labelIds', [])
+                    if 'INBOX' in labels and 'UNREAD' in labels:
+                        message_ids.append(message['id'])
+            
+            history_id = results.get('historyId', history_id)
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+        
+        return list(dict.fromkeys(message_ids)), history_id
+    
+    def _fetch_metadata(self, service, message_ids):
+        # One HTTP round trip per batch instead of one per message. A failed
+        # item only loses itself; the caller retries it on the next poll.
+        metadata = {}
+        failed = []
+        
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                print(f"⚠️ Could not fetch email {request_id}: {exception}")
+                self._check_unauthorized(exception)
+                # A 404 means the message was deleted - nothing left to retry
+                if not (isinstance(exception, HttpError) and exception.resp.status == 404):
+                    failed.append(request_id)
+            else:
+                metadata[request_id] = response
+        
+        for start in range(0, len(message_ids), METADATA_BATCH_SIZE):
+            batch = service.new_batch_http_request(callback=on_response)
+            for message_id in message_ids[start:start + METADATA_BATCH_SIZE]:
+                batch.add(
+                    service.users().messages().get(
+                        userId='me',
+                        id=message_id,
+                        format='metadata',
+                        metadataHeaders=['From', 'Subject']
+                    ),
+                    request_id=message_id
+                )
+            batch.execute()
+        
+        return metadata, failed
+    
+    def _sync_message_ids(self, service):
+        start_history_id = self.memory_manager.get_memory(HISTORY_ID_KEY) if self.incremental_sync else None
+        
+        if start_history_id:
+            try:
+                message_ids, history_id = self._incremental_sync(service, start_history_id)
+                return message_ids, history_id, 'incremental'
+            except HttpError as e:
+                # 404 means the stored historyId is too old for Gmail to replay
+                if e.resp.status != 404:
+                    raise
+                print("⚠️ Gmail history expired - falling back to a full resync")
+        
+        message_ids, history_id = self._full_sync(service)
+        return message_ids, history_id, 'full'
+    
     def check_emails(self):
         try:
             service = self._get_gmail_service()
             if not service:
                 return {'error': 'Gmail service not available'}
             
-            results = service.users().messages().list(
-                userId='me',
-                labelIds=['INBOX', 'UNREAD'],
-                maxResults=5
-            ).execute()
-            
-            messages = results.get('messages', [])
+            message_ids, history_id, sync_mode = self._sync_message_ids(service)
+            retry_ids = self.memory_manager.get_memory(RETRY_IDS_KEY) or []
+            messages = [{'id': message_id} for message_id in dict.fromkeys(retry_ids + message_ids)]
             
             if not messages:
+                self._save_history_id(history_id)
                 self.last_check_time = datetime.now().isoformat()
-                return {'count': 0, 'message': 'No new emails, babe! 💕'}
+                return {'count': 0, 'new_count': 0, 'sync': sync_mode, 'message': 'No new emails, babe! 💕'}
             
             urgent_emails = []
             
-            for msg in messages:
-                msg_data = service.users().messages().get(
-                    userId='me',
-                    id=msg['id'],
-                    format='metadata',
-                    metadataHeaders=['From', 'Subject']
-                ).execute()
-                
-                headers = msg_data['payload']['headers']
-                subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
-                sender = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown')
-                snippet = msg_data.get('snippet', '')
-                
-                last_checked = self.memory_manager.get_memory(f'email_checked_{msg["id"]}')
-                if last_checked:
+            # One indexed lookup for the whole page instead of a query per message
+            seen_ids = self.seen_store.seen_many('email', [msg['id'] for msg in messages])
+            
+            unseen_ids = [msg['id'] for msg in messages if msg['id'] not in seen_ids]
+            metadata, failed_ids = self._fetch_metadata(service, unseen_ids)
+            
+            if failed_ids or retry_ids:
+                self.memory_manager.store_memory(RETRY_IDS_KEY, failed_ids, category='sync')
+            
+            emails = []
+            for message_id in unseen_ids:
+                msg_data = metadata.get(message_id)
+                if msg_data is None:
                     continue
                 
-                decision = self.ai_brain.decide_email_urgency(subject, sender, snippet)
+                headers = msg_data['payload']['headers']
+                emails.append({
+                    'id': message_id,
+                    'subject': next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject'),
+                    'sender': next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown'),
+                    'snippet': msg_data.get('snippet', '')
+                })
+            
+            # Obvious newsletters/promotions are settled locally; the rest go to the LLM
+            decisions = [None] * len(emails)
+            llm_indexes = []
+            for i, email in enumerate(emails):
+                skip_llm, p_urgent = self.email_classifier.confident_not_urgent(email['sender'], email['subject'])
+                if skip_llm:
+                    decisions[i] = {
+                        'urgent': False,
+                        'reason': f'Local classifier (p_urgent={p_urgent:.2f})',
+                        'message': '',
+                        'source': 'classifier'
+                    }
+                else:
+                    llm_indexes.append(i)
+            
+            # One LLM call per batch of emails rather than one per email
+            triage_started = time.monotonic()
+            llm_decisions = self.ai_brain.decide_email_urgency_batch([emails[i] for i in llm_indexes]) if llm_indexes else []
+            triage_seconds = time.monotonic() - triage_started
+            
+            learned = 0
+            for i, decision in zip(llm_indexes, llm_decisions):
+                decisions[i] = decision
+                # Cache hits were learned from when the LLM first answered them;
+                # unparseable answers carry nothing to learn
+                if decision.get('source', 'llm') == 'llm':
+                    self.email_classifier.learn(emails[i]['sender'], emails[i]['subject'], decision.get('urgent', False))
+                    learned += 1
+            if learned:
+                self.email_classifier.save()
+            
+            avoided = len(emails) - len(llm_indexes)
+            classifier_report = {
+                'llm_calls_avoided': avoided,
+                'avoided_fraction': round(avoided / len(emails), 3) if emails else 0.0,
+                'est_seconds_saved': round(avoided * triage_seconds / len(llm_indexes), 3) if llm_indexes else 0.0
+            }
+            
+            for email, decision in zip(emails, decisions):
+                message_id = email['id']
+                subject = email['subject']
+                sender = email['sender']
                 
+                self.seen_store.mark_seen('email', message_id, EMAIL_SEEN_TTL)
                 self.memory_manager.store_memory(
-                    f'email_checked_{msg["id"]}',
-                    {'subject': subject, 'sender': sender, 'urgent': decision.get('urgent', False)},
+                    f'email_checked_{message_id}',
+                    {
+                        'subject': subject,
+                        'sender': sender,
+                        'urgent': decision.get('urgent', False),
+                        'source': decision.get('source', 'llm')
+                    },
                     category='emails'
                 )
                 
@@ -75,20 +251,33 @@ class GmailMonitor:
                     notification_text = f"📧 {decision.get('message', f'Urgent email from {sender}: {subject}')}"
                     self.notification_manager.send_notification(notification_text)
             
+            # Only advance the cursor once the batch is handled, so a failed run replays it
+            self._save_history_id(history_id)
             self.last_check_time = datetime.now().isoformat()
             
             if urgent_emails:
                 return {
                     'count': len(messages),
+                    'new_count': len(unseen_ids),
+                    'sync': sync_mode,
+                    'triaged': len(emails),
+                    'triage_seconds': round(triage_seconds, 3),
+                    'classifier': classifier_report,
                     'urgent_count': len(urgent_emails),
                     'urgent_emails': urgent_emails
                 }
             else:
                 return {
                     'count': len(messages),
+                    'new_count': len(unseen_ids),
+                    'sync': sync_mode,
+                    'triaged': len(emails),
+                    'triage_seconds': round(triage_seconds, 3),
+                    'classifier': classifier_report,
                     'message': f"Checked {len(messages)} emails - nothing urgent, you're good babe! 😊"
                 }
         
         except Exception as e:
             print(f"Email check error: {e}")
+            self._check_unauthorized(e)
             return {'error': str(e)}
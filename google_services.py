@@ -0,0 +1,40 @@
+import threading
+import httplib2
+from googleapiclient.discovery import build
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+
+HTTP_TIMEOUT = 30
+
+class GoogleServiceFactory:
+    # Builds each Google API client once and keeps reusing it, along with its
+    # authorized keep-alive transport. Discovery comes from the documents that
+    # ship with google-api-python-client, so a build never hits the network.
+    # httplib2 transports aren't thread-safe, so clients are cached per thread.
+    def __init__(self, timeout=HTTP_TIMEOUT):
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get_service(self, api, version, access_token):
+        services = getattr(self._local, 'services', None)
+        if services is None:
+            services = self._local.services = {}
+
+        entry = services.get((api, version))
+        if entry is not None:
+            service, credentials = entry
+            # Same transport and client, just swap in the fresh token
+            if credentials.token != access_token:
+                credentials.token = access_token
+            return service
+
+        credentials = Credentials(token=access_token)
+        http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=self.timeout))
+        service = build(api, version, http=http, static_discovery=True, cache_discovery=False)
+        services[(api, version)] = (service, credentials)
+        return service
+
+_factory = GoogleServiceFactory()
+
+def get_google_service(api, version, access_token):
+    return _factory.get_service(api, version, access_token)
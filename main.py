@@ -1,12 +1,19 @@
 import os
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
 import atexit
-from datetime import datetime
+import json
+import time
+from datetime import datetime, timedelta
 
 from modules.memory import MemoryManager
+from modules.seen_store import SeenStore, EMAIL_SEEN_TTL
+from modules.vector_store import VectorStore
+from modules.adaptive_scheduler import AdaptiveScheduler, AdaptivePolicy, parse_quiet_hours
+from modules.conversation_archive import ConversationArchiver, DEFAULT_ARCHIVE_AFTER_DAYS
 from modules.ai_brain import AIBrain
 from modules.gmail_monitor import GmailMonitor
 from modules.calendar_monitor import CalendarMonitor
@@ -21,6 +28,9 @@ app.config['SECRET_KEY'] = os.environ.get('SESSION_SECRET', 'grace-bot-secret-ke
 
 # Lazy-loaded manager instances
 _memory_manager = None
+_seen_store = None
+_vector_store = None
+_conversation_archiver = None
 _ai_brain = None
 _notification_manager = None
 _gmail_monitor = None
@@ -30,36 +40,69 @@ _weather_manager = None
 _wyze_manager = None
 _alexa_manager = None
 _scheduler = None
+_adaptive_scheduler = None
 _monitoring_started = False
 
 def get_memory_manager():
     global _memory_manager
     if _memory_manager is None:
-        _memory_manager = MemoryManager()
+        _memory_manager = MemoryManager(
+            cache_size=int(os.environ.get('MEMORY_CACHE_SIZE', 1024)),
+            cache_ttl=int(os.environ.get('MEMORY_CACHE_TTL', 300))
+        )
     return _memory_manager
 
+def get_seen_store():
+    global _seen_store
+    if _seen_store is None:
+        _seen_store = SeenStore(
+            get_memory_manager(),
+            use_bloom=os.environ.get('SEEN_BLOOM_FILTER', '').lower() in ('1', 'true', 'yes')
+        )
+    return _seen_store
+
+def get_vector_store():
+    global _vector_store
+    if _vector_store is None:
+        _vector_store = VectorStore(get_memory_manager())
+    return _vector_store
+
+def get_conversation_archiver():
+    global _conversation_archiver
+    if _conversation_archiver is None:
+        _conversation_archiver = ConversationArchiver(
+            get_memory_manager(),
+            max_age_days=int(os.environ.get('ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS))
+        )
+    return _conversation_archiver
+
 def get_ai_brain():
     global _ai_brain
     if _ai_brain is None:
-        _ai_brain = AIBrain(get_memory_manager())
+        vector_store = get_vector_store() if os.environ.get('VECTOR_RECALL', '1').lower() in ('1', 'true', 'yes') else None
+        _ai_brain = AIBrain(get_memory_manager(), vector_store=vector_store)
     return _ai_brain
 
 def get_notification_manager():
     global _notification_manager
     if _notification_manager is None:
-        _notification_manager = NotificationManager()
+        _notification_manager = NotificationManager(get_memory_manager())
     return _notification_manager
 
 def get_gmail_monitor():
     global _gmail_monitor
     if _gmail_monitor is None:
-        _gmail_monitor = GmailMonitor(get_memory_manager(), get_ai_brain(), get_notification_manager())
+        _gmail_monitor = GmailMonitor(get_memory_manager(), get_ai_brain(), get_notification_manager(), get_seen_store())
     return _gmail_monitor
 
 def get_calendar_monitor():
     global _calendar_monitor
     if _calendar_monitor is None:
-        _calendar_monitor = CalendarMonitor(get_memory_manager(), get_ai_brain(), get_notification_manager())
+        _calendar_monitor = CalendarMonitor(
+            get_memory_manager(), get_ai_brain(), get_notification_manager(), get_seen_store(),
+            scheduler=get_scheduler(),
+            lead_minutes=int(os.environ.get('CALENDAR_REMINDER_LEAD_MINUTES', 15))
+        )
     return _calendar_monitor
 
 def get_spotify_manager():
@@ -92,6 +135,29 @@ def get_scheduler():
         _scheduler = BackgroundScheduler()
     return _scheduler
 
+def get_adaptive_scheduler():
+    global _adaptive_scheduler
+    if _adaptive_scheduler is None:
+        _adaptive_scheduler = AdaptiveScheduler(
+            get_scheduler(),
+            quiet_hours=parse_quiet_hours(os.environ.get('QUIET_HOURS', ''))
+        )
+    return _adaptive_scheduler
+
+def _poll_policy(prefix, min_minutes, initial_minutes, max_minutes):
+    return AdaptivePolicy(
+        min_seconds=float(os.environ.get(f'{prefix}_POLL_MIN_MINUTES', min_minutes)) * 60,
+        max_seconds=float(os.environ.get(f'{prefix}_POLL_MAX_MINUTES', max_minutes)) * 60,
+        initial_seconds=initial_minutes * 60
+    )
+
+def sweep_expired_history():
+    get_seen_store().sweep_expired()
+    # Triage history outlives its seen ID by no more than the same TTL
+    pruned = get_memory_manager().prune_memories('emails', datetime.now() - timedelta(seconds=EMAIL_SEEN_TTL))
+    if pruned:
+        print(f"🧹 Pruned {pruned} old email triage records")
+
 def start_monitoring():
     global _monitoring_started
     if _monitoring_started:
@@ -99,19 +165,55 @@ def start_monitoring():
     
     scheduler = get_scheduler()
     
+    # Poll intervals adapt to activity between the configured bounds (minutes)
+    adaptive = get_adaptive_scheduler()
+    adaptive.add_job(
+        'email_monitor',
+        lambda: get_gmail_monitor().check_emails(),
+        _poll_policy('EMAIL', min_minutes=2, initial_minutes=10, max_minutes=30),
+        name='Check emails (adaptive interval)'
+    )
+    
+    # Reminders fire from their own one-shot jobs, so the calendar poll only
+    # has to discover events; it keeps running through quiet hours all the same
+    adaptive.add_job(
+        'calendar_monitor',
+        lambda: get_calendar_monitor().check_events(),
+        _poll_policy('CALENDAR', min_minutes=15, initial_minutes=30, max_minutes=90),
+        name='Check calendar events (adaptive interval)',
+        honor_quiet_hours=False
+    )
+    
+    # Re-register reminders saved before a restart, off the request path
     scheduler.add_job(
-        func=lambda: get_gmail_monitor().check_emails(),
-        trigger=IntervalTrigger(minutes=10),
-        id='email_monitor',
-        name='Check emails every 10 minutes',
+        func=lambda: get_calendar_monitor().restore_reminders(),
+        trigger=DateTrigger(),
+        id='calendar_reminder_restore',
+        name='Restore pending calendar reminders',
+        replace_existing=True
+    )
+    
+    scheduler.add_job(
+        func=sweep_expired_history,
+        trigger=IntervalTrigger(hours=1),
+        id='seen_id_sweeper',
+        name='Sweep expired seen IDs and email triage history hourly',
         replace_existing=True
     )
     
     scheduler.add_job(
-        func=lambda: get_calendar_monitor().check_events(),
-        trigger=IntervalTrigger(minutes=30),
-        id='calendar_monitor',
-        name='Check calendar events every 30 minutes',
+        func=lambda: get_conversation_archiver().archive(),
+        trigger=CronTrigger(hour=3, minute=30),
+        id='conversation_archiver',
+        name='Archive old conversations and compact the database nightly',
+        replace_existing=True
+    )
+    
+    scheduler.add_job(
+        func=lambda: _vector_store is not None and _vector_store.save(),
+        trigger=IntervalTrigger(minutes=10),
+        id='vector_index_saver',
+        name='Persist the semantic recall index every 10 minutes',
         replace_existing=True
     )
     
@@ -133,6 +235,13 @@ def status():
         
         stats = {
             'memory_count': memory_mgr.get_memory_count(),
+            'memory_cache': memory_mgr.get_cache_stats(),
+            'ai_usage': get_ai_brain().get_usage_stats(),
+            'decision_cache': get_ai_brain().get_decision_cache_stats(),
+            'email_classifier': gmail_mon.email_classifier.get_stats(),
+            'notifications': get_notification_manager().get_queue_stats(),
+            'polling': get_adaptive_scheduler().describe(),
+            'vector_index': _vector_store.stats() if _vector_store is not None else None,
             'last_email_check': gmail_mon.last_check_time,
             'last_calendar_check': calendar_mon.last_check_time,
             'status': 'online',
@@ -166,22 +275,96 @@ def trigger_weather():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/trigger/archive')
+def trigger_archive():
+    try:
+        result = get_conversation_archiver().archive()
+        return jsonify({'success': True, 'result': result})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/archive/search')
+def search_archive():
+    try:
+        query = request.args.get('q', '')
+        limit = min(int(request.args.get('limit', 5)), 50)
+        results = get_conversation_archiver().search(
+            query, limit,
+            since=request.args.get('since'),
+            until=request.args.get('until')
+        )
+        return jsonify({'query': query, 'results': results})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/chat', methods=['POST'])
 def chat():
     try:
         user_message = request.json.get('message', '') if request.json else ''
-        response = get_ai_brain().chat(user_message)
-        return jsonify({'success': True, 'response': response})
+        response, token_stats = get_ai_brain().chat_with_stats(user_message)
+        return jsonify({'success': True, 'response': response, 'tokens': token_stats})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/chat/stream', methods=['GET', 'POST'])
+def chat_stream():
+    """Stream Grace's reply as server-sent events, one token per event"""
+    if request.method == 'POST':
+        user_message = request.json.get('message', '') if request.is_json and request.json else ''
+    else:
+        user_message = request.args.get('message', '')
+    
+    def generate():
+        started = time.monotonic()
+        first_token_at = None
+        token_stats = {}
+        try:
+            for token in get_ai_brain().chat_stream(user_message, context_stats=token_stats):
+                if first_token_at is None:
+                    first_token_at = time.monotonic()
+                yield f"data: {json.dumps({'token': token})}\n\n"
+            
+            timing = {
+                'ttft_ms': round((first_token_at - started) * 1000) if first_token_at else None,
+                'total_ms': round((time.monotonic() - started) * 1000),
+                'tokens': token_stats
+            }
+            yield f"event: done\ndata: {json.dumps(timing)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/memory')
 def get_memory():
+    """Stream one page of memories as NDJSON; the last line carries next_cursor"""
     try:
-        memories = get_memory_manager().get_all_memories()
-        return jsonify({'memories': memories})
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        cursor = int(request.args.get('cursor', 0))
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+    except ValueError:
+        return jsonify({'error': 'cursor and limit must be integers'}), 400
+    
+    category = request.args.get('category')
+    prefix = request.args.get('prefix')
+    
+    def generate():
+        last_id = None
+        count = 0
+        for memory in get_memory_manager().iter_memories(
+            category=category, prefix=prefix, after_id=cursor, limit=limit
+        ):
+            last_id = memory['id']
+            count += 1
+            yield json.dumps(memory) + '\n'
+        
+        next_cursor = last_id if count == limit else None
+        yield json.dumps({'next_cursor': next_cursor, 'count': count}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 @app.route('/trigger/wyze')
 def trigger_wyze():
@@ -247,6 +430,10 @@ def cleanup_scheduler():
     global _scheduler
     if _scheduler is not None:
         _scheduler.shutdown()
+    if _vector_store is not None:
+        _vector_store.save()
+    if _notification_manager is not None:
+        _notification_manager.stop()
 
 atexit.register(cleanup_scheduler)
 
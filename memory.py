@@ -1,12 +1,156 @@
 import sqlite3
 import json
+import hashlib
+import hmac
+import re
+import threading
+import time
+import weakref
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
 import os
+from modules.db_migrations import run_migrations
+
+# Connection tuning: WAL lets readers run alongside the scheduler's writers,
+# NORMAL sync is durable under WAL, and the connect timeout (busy_timeout)
+# waits out short write locks instead of failing with "database is locked".
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-8000',
+    'PRAGMA temp_store=MEMORY',
+)
+
+# Stay well under SQLite's bound-parameter limit for IN (...) batches.
+MAX_BATCH_PARAMS = 500
+
+# Bulk reads: below PARALLEL_DECODE_MIN_ROWS uncached rows decode inline, up
+# to PROCESS_DECODE_MIN_ROWS on a thread pool, above that on spawned processes
+# (decrypt + json.loads mostly hold the GIL, so only processes scale fully).
+PARALLEL_DECODE_MIN_ROWS = 2000
+PROCESS_DECODE_MIN_ROWS = 20000
+DECODE_CHUNK_ROWS = 2000
+
+# Internal bookkeeping (model weights, sync cursors) never shows up in search
+UNSEARCHABLE_CATEGORIES = {'models', 'sync'}
+
+_WORD_RE = re.compile(r'\w{2,}')
+
+def _search_words(text):
+    return list(dict.fromkeys(w.lower() for w in _WORD_RE.findall(text or '')))
+
+def _value_text(value):
+    if isinstance(value, dict):
+        return ' '.join(_value_text(v) for v in value.values())
+    if isinstance(value, list):
+        return ' '.join(_value_text(v) for v in value)
+    return str(value) if value is not None else ''
+
+def _chunked(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _decrypt_chunk(fernet_key, rows):
+    # Module-level so spawned worker processes can import it
+    cipher = Fernet(fernet_key)
+    decoded = []
+    failed = []
+    for key, encrypted_value in rows:
+        try:
+            serialized = cipher.decrypt(encrypted_value).decode()
+            decoded.append((key, serialized, json.loads(serialized)))
+        except (InvalidToken, ValueError):
+            failed.append(key)
+    return decoded, failed
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+class _ConnectionHolder:
+    # Lives only in its thread's threading.local, so it is collected when the
+    # thread exits - and its finalizer closes the connection with it.
+    __slots__ = ('conn', 'pid', '__weakref__')
+    
+    def __init__(self, conn, pid):
+        self.conn = conn
+        self.pid = pid
+
+class DecryptedCache:
+    # Bounded in-process LRU of decrypted values. Each entry remembers the
+    # ciphertext it was decoded from, so a row rewritten by another worker is
+    # never served stale. Plaintext only ever lives in this process's memory.
+    # Entries hold the JSON text and every hit parses a fresh object: callers
+    # mutate what they read, and that must not leak into later reads. Parsing
+    # is cheap next to the Fernet decrypt the cache saves.
+    def __init__(self, max_size=1024, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, encrypted_value):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                cached_token, serialized, expires_at = entry
+                if cached_token == encrypted_value and expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, json.loads(serialized)
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+    
+    def put(self, key, encrypted_value, serialized):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (encrypted_value, serialized, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
 
 class MemoryManager:
-    def __init__(self, db_path='gracebot_memory.db'):
+    def __init__(self, db_path='gracebot_memory.db', busy_timeout=5.0, statement_cache_size=128,
+                 cache_size=1024, cache_ttl=300, decode_workers=None):
         self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self.statement_cache_size = statement_cache_size
+        self.cache = DecryptedCache(max_size=cache_size, ttl=cache_ttl)
+        self._local = threading.local()
+        self._holders = weakref.WeakSet()
+        self._holders_lock = threading.Lock()
+        self._write_listeners = []
+        self.decode_workers = decode_workers or min(4, os.cpu_count() or 1)
+        self._decode_pools = {}
+        self._decode_pools_lock = threading.Lock()
         self.cipher = self._get_or_create_cipher()
         self._init_db()
     
@@ -19,130 +163,401 @@ class MemoryManager:
             key = Fernet.generate_key()
             with open(key_file, 'wb') as f:
                 f.write(key)
+        # Separate key for the blind search index, derived so it never equals the Fernet key
+        self._search_key = hashlib.sha256(b'gracebot-search-index:' + key.strip()).digest()
+        self._fernet_key = key.strip()
         return Fernet(key)
     
+    def _connect(self):
+        # One long-lived connection per thread (and per process, so gunicorn
+        # forks never share a handle); sqlite3 keeps prepared statements in
+        # its per-connection statement cache.
+        holder = getattr(self._local, 'holder', None)
+        if holder is not None and holder.pid == os.getpid():
+            return holder.conn
+        
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            cached_statements=self.statement_cache_size,
+            check_same_thread=False
+        )
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        
+        holder = _ConnectionHolder(conn, os.getpid())
+        weakref.finalize(holder, _close_quietly, conn)
+        self._local.holder = holder
+        # Weak registry: close() can reach live threads' connections without
+        # keeping dead threads' connections open
+        with self._holders_lock:
+            self._holders.add(holder)
+        return conn
+    
+    def get_connection(self):
+        # For sibling stores (seen IDs, caches, queues) that share this database
+        return self._connect()
+    
+    def close(self):
+        with self._holders_lock:
+            holders = list(self._holders)
+            self._holders = weakref.WeakSet()
+        for holder in holders:
+            _close_quietly(holder.conn)
+        self._local = threading.local()
+        
+        with self._decode_pools_lock:
+            pools, self._decode_pools = self._decode_pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+    
+    def _decode(self, key, encrypted_value):
+        found, value = self.cache.get(key, encrypted_value)
+        if found:
+            return value
+        
+        serialized = self.cipher.decrypt(encrypted_value).decode()
+        value = json.loads(serialized)
+        self.cache.put(key, encrypted_value, serialized)
+        return value
+    
+    def _decode_pool(self, kind):
+        with self._decode_pools_lock:
+            pool = self._decode_pools.get(kind)
+            if pool is None:
+                if kind == 'process':
+                    # spawn, not fork: forking a process that holds sqlite
+                    # handles and scheduler threads is unsafe
+                    pool = ProcessPoolExecutor(
+                        max_workers=self.decode_workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+                else:
+                    pool = ThreadPoolExecutor(max_workers=self.decode_workers, thread_name_prefix='memory-decode')
+                self._decode_pools[kind] = pool
+            return pool
+    
+    def _decode_many(self, rows):
+        # rows: [(key, encrypted_value)] -> {key: value}, in row order. Cached
+        # rows skip decryption; unreadable rows are skipped and counted.
+        values = {}
+        misses = []
+        for key, encrypted_value in rows:
+            found, value = self.cache.get(key, encrypted_value)
+            if found:
+                values[key] = value
+            else:
+                misses.append((key, encrypted_value))
+        
+        if len(misses) < PARALLEL_DECODE_MIN_ROWS or self.decode_workers < 2:
+            results = [_decrypt_chunk(self._fernet_key, misses)]
+        else:
+            kind = 'process' if len(misses) >= PROCESS_DECODE_MIN_ROWS else 'thread'
+            try:
+                pool = self._decode_pool(kind)
+                results = list(pool.map(
+                    _decrypt_chunk,
+                    [self._fernet_key] * ((len(misses) + DECODE_CHUNK_ROWS - 1) // DECODE_CHUNK_ROWS),
+                    _chunked(misses, DECODE_CHUNK_ROWS)
+                ))
+            except (OSError, RuntimeError) as e:
+                # Broken pool or no process support on this host: decode
+                # inline and let the next bulk read build a fresh pool
+                print(f"⚠️ Parallel decode unavailable ({kind}): {e}")
+                with self._decode_pools_lock:
+                    broken = self._decode_pools.pop(kind, None)
+                if broken is not None:
+                    broken.shutdown(wait=False, cancel_futures=True)
+                results = [_decrypt_chunk(self._fernet_key, misses)]
+        
+        encrypted = dict(misses)
+        failed = 0
+        for decoded, failed_keys in results:
+            for key, serialized, value in decoded:
+                self.cache.put(key, encrypted[key], serialized)
+                values[key] = value
+            failed += len(failed_keys)
+        if failed:
+            print(f"⚠️ Skipped {failed} memories that failed to decrypt")
+        
+        return {key: values[key] for key, _ in rows if key in values}
+    
+    def get_cache_stats(self):
+        return self.cache.stats()
+    
     def _init_db(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS memories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                key TEXT UNIQUE,
-                encrypted_value BLOB,
-                category TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS conversations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_message TEXT,
-                bot_response TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        applied = run_migrations(self._connect())
+        if 5 in applied:
+            self.rebuild_memory_search_index()
+        return applied
+    
+    def _blind_terms(self, text):
+        # Keyed hashes of each word: searchable by exact word, but the index on
+        # disk never holds memory plaintext.
+        return [
+            hmac.new(self._search_key, word.encode(), hashlib.sha256).hexdigest()[:16]
+            for word in _search_words(text)
+        ]
+    
+    @staticmethod
+    def memory_search_text(key, value, category):
+        if category in UNSEARCHABLE_CATEGORIES:
+            return None
+        return f'{key.replace("_", " ")} {category} {_value_text(value)}'
+    
+    def add_write_listener(self, callback):
+        # callback(kind, ref, text) runs after each committed memory or
+        # conversation write; text is None when the row should not be recalled.
+        self._write_listeners.append(callback)
+    
+    def notify_write(self, kind, ref, text):
+        # Also called by sibling stores that delete rows behind our back
+        for callback in self._write_listeners:
+            try:
+                callback(kind, ref, text)
+            except Exception as e:
+                print(f"⚠️ Memory write listener failed: {e}")
+    
+    def _index_memory(self, conn, old_id, new_id, key, value, category):
+        if old_id is not None:
+            conn.execute('DELETE FROM memories_fts WHERE rowid = ?', (old_id,))
+        text = self.memory_search_text(key, value, category)
+        if text is None:
+            return
+        terms = self._blind_terms(text)
+        if terms:
+            conn.execute('INSERT INTO memories_fts (rowid, terms) VALUES (?, ?)', (new_id, ' '.join(terms)))
+    
+    def rebuild_memory_search_index(self):
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM memories_fts')
+            for memory in self.iter_memories():
+                self._index_memory(conn, None, memory['id'], memory['key'], memory['value'], memory['category'])
     
     def store_memory(self, key, value, category='general'):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._connect()
         
-        encrypted_value = self.cipher.encrypt(json.dumps(value).encode())
+        serialized = json.dumps(value)
+        encrypted_value = self.cipher.encrypt(serialized.encode())
         
-        cursor.execute('''
-            INSERT OR REPLACE INTO memories (key, encrypted_value, category, updated_at)
-            VALUES (?, ?, ?, ?)
-        ''', (key, encrypted_value, category, datetime.now()))
+        with conn:
+            previous = conn.execute('SELECT id FROM memories WHERE key = ?', (key,)).fetchone()
+            cursor = conn.execute('''
+                INSERT OR REPLACE INTO memories (key, encrypted_value, category, updated_at)
+                VALUES (?, ?, ?, ?)
+            ''', (key, encrypted_value, category, datetime.now()))
+            self._index_memory(conn, previous[0] if previous else None, cursor.lastrowid, key, value, category)
         
-        conn.commit()
-        conn.close()
+        # Write-through; the cache keeps the JSON text, so caller mutations can't leak in
+        self.cache.put(key, encrypted_value, serialized)
+        self.notify_write('memory', key, self.memory_search_text(key, value, category))
     
     def get_memory(self, key):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._connect()
         
-        cursor.execute('SELECT encrypted_value FROM memories WHERE key = ?', (key,))
-        result = cursor.fetchone()
-        conn.close()
+        result = conn.execute('SELECT encrypted_value FROM memories WHERE key = ?', (key,)).fetchone()
         
         if result:
-            decrypted_value = self.cipher.decrypt(result[0])
-            return json.loads(decrypted_value.decode())
+            return self._decode(key, result[0])
         return None
     
-    def get_memories_by_category(self, category):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT key, encrypted_value FROM memories WHERE category = ?', (category,))
-        results = cursor.fetchall()
-        conn.close()
+    def get_memories_many(self, keys):
+        conn = self._connect()
+        keys = list(dict.fromkeys(keys))
         
         memories = {}
-        for key, encrypted_value in results:
-            decrypted_value = self.cipher.decrypt(encrypted_value)
-            memories[key] = json.loads(decrypted_value.decode())
+        for batch in _chunked(keys, MAX_BATCH_PARAMS):
+            placeholders = ','.join('?' * len(batch))
+            results = conn.execute(
+                f'SELECT key, encrypted_value FROM memories WHERE key IN ({placeholders})',
+                batch
+            ).fetchall()
+            
+            for key, encrypted_value in results:
+                memories[key] = self._decode(key, encrypted_value)
         
         return memories
     
+    def get_memories_by_category(self, category):
+        conn = self._connect()
+        
+        results = conn.execute('SELECT key, encrypted_value FROM memories WHERE category = ?', (category,)).fetchall()
+        
+        return self._decode_many(results)
+    
+    def prune_memories(self, category, older_than):
+        # Drops a category's rows last written before older_than (a datetime)
+        conn = self._connect()
+        
+        with conn:
+            rows = conn.execute(
+                'SELECT id, key FROM memories WHERE category = ? AND updated_at < ?',
+                (category, older_than)
+            ).fetchall()
+            for batch in _chunked([r[0] for r in rows], MAX_BATCH_PARAMS):
+                placeholders = ','.join('?' * len(batch))
+                conn.execute(f'DELETE FROM memories_fts WHERE rowid IN ({placeholders})', batch)
+                conn.execute(f'DELETE FROM memories WHERE id IN ({placeholders})', batch)
+        
+        for _, key in rows:
+            self.cache.invalidate(key)
+            self.notify_write('memory', key, None)
+        return len(rows)
+    
     def store_conversation(self, user_message, bot_response):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._connect()
         
-        cursor.execute('''
-            INSERT INTO conversations (user_message, bot_response, timestamp)
-            VALUES (?, ?, ?)
-        ''', (user_message, bot_response, datetime.now()))
+        with conn:
+            cursor = conn.execute('''
+                INSERT INTO conversations (user_message, bot_response, timestamp)
+                VALUES (?, ?, ?)
+            ''', (user_message, bot_response, datetime.now()))
         
-        conn.commit()
-        conn.close()
+        self.notify_write('conversation', cursor.lastrowid, f'{user_message} {bot_response}')
     
     def get_recent_conversations(self, limit=10):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._connect()
         
-        cursor.execute('''
-            SELECT user_message, bot_response, timestamp 
+        results = conn.execute('''
+            SELECT user_message, bot_response, timestamp, id 
             FROM conversations 
             ORDER BY timestamp DESC 
             LIMIT ?
-        ''', (limit,))
+        ''', (limit,)).fetchall()
         
-        results = cursor.fetchall()
-        conn.close()
+        return [{'user': r[0], 'bot': r[1], 'timestamp': r[2], 'id': r[3]} for r in reversed(results)]
+    
+    def get_conversations_between(self, after_id, before_id=None, limit=50):
+        conn = self._connect()
         
-        return [{'user': r[0], 'bot': r[1], 'timestamp': r[2]} for r in reversed(results)]
+        results = conn.execute('''
+            SELECT user_message, bot_response, timestamp, id
+            FROM conversations
+            WHERE id > ? AND id < ?
+            ORDER BY id
+            LIMIT ?
+        ''', (after_id, before_id if before_id is not None else 2 ** 63 - 1, limit)).fetchall()
+        
+        return [{'user': r[0], 'bot': r[1], 'timestamp': r[2], 'id': r[3]} for r in results]
     
-    def get_all_memories(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def get_conversations_by_ids(self, ids):
+        conn = self._connect()
+        ids = list(dict.fromkeys(int(i) for i in ids))
         
-        cursor.execute('SELECT key, encrypted_value, category FROM memories')
-        results = cursor.fetchall()
-        conn.close()
+        conversations = {}
+        for batch in _chunked(ids, MAX_BATCH_PARAMS):
+            placeholders = ','.join('?' * len(batch))
+            results = conn.execute(
+                f'SELECT user_message, bot_response, timestamp, id FROM conversations WHERE id IN ({placeholders})',
+                batch
+            ).fetchall()
+            for r in results:
+                conversations[r[3]] = {'user': r[0], 'bot': r[1], 'timestamp': r[2], 'id': r[3]}
+        
+        return conversations
+    
+    def search_conversations(self, query, limit=5, exclude_ids=()):
+        words = _search_words(query)
+        if not words:
+            return []
+        
+        conn = self._connect()
+        match = ' OR '.join(f'"{word}"' for word in words)
+        results = conn.execute('''
+            SELECT c.id, c.user_message, c.bot_response, c.timestamp,
+                   snippet(conversations_fts, -1, '', '', '…', 16)
+            FROM conversations_fts
+            JOIN conversations c ON c.id = conversations_fts.rowid
+            WHERE conversations_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        ''', (match, limit + len(exclude_ids))).fetchall()
+        
+        excluded = set(exclude_ids)
+        return [
+            {'id': r[0], 'user': r[1], 'bot': r[2], 'timestamp': r[3], 'snippet': r[4]}
+            for r in results if r[0] not in excluded
+        ][:limit]
+    
+    def search_memories(self, query, limit=5):
+        terms = self._blind_terms(query)
+        if not terms:
+            return []
+        
+        conn = self._connect()
+        match = ' OR '.join(f'"{term}"' for term in terms)
+        results = conn.execute('''
+            SELECT m.key, m.encrypted_value, m.category
+            FROM memories_fts
+            JOIN memories m ON m.id = memories_fts.rowid
+            WHERE memories_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        ''', (match, limit)).fetchall()
         
         memories = []
         for key, encrypted_value, category in results:
             try:
-                decrypted_value = self.cipher.decrypt(encrypted_value)
-                value = json.loads(decrypted_value.decode())
-                memories.append({'key': key, 'value': value, 'category': category})
-            except:
-                pass
-        
+                value = self._decode(key, encrypted_value)
+            except (InvalidToken, ValueError):
+                continue
+            memories.append({'key': key, 'value': value, 'category': category, 'snippet': _value_text(value)[:200]})
         return memories
     
+    def iter_memories(self, category=None, prefix=None, after_id=0, limit=None, batch_size=500):
+        # Keyset pagination on id: each page is an index range scan, so memory
+        # and per-page cost stay flat however large the table grows.
+        conn = self._connect()
+        
+        clauses = ['id > ?']
+        filter_params = []
+        if category is not None:
+            clauses.append('category = ?')
+            filter_params.append(category)
+        if prefix:
+            clauses.append('key >= ? AND key < ?')
+            filter_params.extend([prefix, prefix + '\U0010ffff'])
+        query = f'''
+            SELECT id, key, encrypted_value, category
+            FROM memories
+            WHERE {' AND '.join(clauses)}
+            ORDER BY id
+            LIMIT ?
+        '''
+        
+        yielded = 0
+        last_id = after_id
+        while limit is None or yielded < limit:
+            page_size = batch_size if limit is None else min(batch_size, limit - yielded)
+            rows = conn.execute(query, [last_id, *filter_params, page_size]).fetchall()
+            
+            for row_id, key, encrypted_value, row_category in rows:
+                last_id = row_id
+                try:
+                    value = self._decode(key, encrypted_value)
+                except (InvalidToken, ValueError):
+                    continue
+                yielded += 1
+                yield {'id': row_id, 'key': key, 'value': value, 'category': row_category}
+            
+            if len(rows) < page_size:
+                break
+    
+    def get_all_memories(self):
+        conn = self._connect()
+        
+        results = conn.execute('SELECT key, encrypted_value, category FROM memories ORDER BY id').fetchall()
+        
+        values = self._decode_many([(key, encrypted_value) for key, encrypted_value, _ in results])
+        return [
+            {'key': key, 'value': values[key], 'category': category}
+            for key, _, category in results if key in values
+        ]
+    
     def get_memory_count(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._connect()
         
-        cursor.execute('SELECT COUNT(*) FROM memories')
-        count = cursor.fetchone()[0]
-        conn.close()
+        count = conn.execute('SELECT COUNT(*) FROM memories').fetchone()[0]
         
         return count
@@ -1,26 +1,37 @@
-from twilio.rest import Client
-from modules.replit_connector import ReplitConnector
+from modules.twilio_transport import get_twilio_transport
+from modules.notification_queue import NotificationQueue
 import os
 
 class NotificationManager:
-    def __init__(self):
+    def __init__(self, memory_manager=None):
         self.phone_number = os.environ.get('USER_PHONE_NUMBER')
-        self.twilio_client = None
+        self.transport = get_twilio_transport()
         self.from_number = None
         self._init_twilio()
+        
+        # With a memory manager, SMS goes through the persistent queue so a
+        # slow Twilio call never blocks the monitors; without one it's inline.
+        self.queue = None
+        if memory_manager is not None:
+            self.queue = NotificationQueue(
+                memory_manager,
+                self._deliver,
+                rate_limits={'sms': (
+                    int(os.environ.get('NOTIFY_SMS_BURST', 3)),
+                    int(os.environ.get('NOTIFY_SMS_PER_HOUR', 10))
+                )},
+                coalesce_windows={'sms': int(os.environ.get('NOTIFY_COALESCE_SECONDS', 30))},
+                deliver_many=self._deliver_many
+            )
+            self.queue.start()
     
     def _init_twilio(self):
         try:
-            creds = ReplitConnector.get_twilio_credentials()
-            self.twilio_client = Client(
-                creds['api_key'],
-                creds['api_key_secret'],
-                creds['account_sid']
-            )
-            self.from_number = creds.get('phone_number')
+            self.from_number = self.transport.ensure_ready()
             print(f"✅ Twilio initialized with phone: {self.from_number}")
         except Exception as e:
             print(f"⚠️ Twilio initialization warning: {e}")
+        return bool(self.from_number)
     
     def send_notification(self, message, force_sms=False):
         print(f"📱 Notification: {message}")
@@ -29,17 +40,38 @@ class NotificationManager:
             print("⚠️ USER_PHONE_NUMBER not set - skipping SMS")
             return {'success': True, 'method': 'console', 'message': message}
         
-        if self.twilio_client and self.from_number and force_sms:
-            try:
-                msg = self.twilio_client.messages.create(
-                    body=message,
-                    from_=self.from_number,
-                    to=self.phone_number
-                )
-                print(f"✅ SMS sent: {msg.sid}")
-                return {'success': True, 'method': 'sms', 'sid': msg.sid}
-            except Exception as e:
-                print(f"❌ SMS error: {e}")
-                return {'success': False, 'error': str(e)}
+        if force_sms and (self.from_number or self._init_twilio()):
+            if self.queue is not None:
+                queue_id = self.queue.enqueue('sms', message)
+                return {'success': True, 'method': 'queued', 'channel': 'sms', 'id': queue_id}
+            return self._deliver('sms', message)
         
         return {'success': True, 'method': 'console', 'message': message}
+    
+    def _deliver(self, channel, message):
+        try:
+            msg = self.transport.send(self.phone_number, message)
+            print(f"✅ SMS sent: {msg.sid}")
+            return {'success': True, 'method': 'sms', 'sid': msg.sid}
+        except Exception as e:
+            print(f"❌ SMS error: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def _deliver_many(self, channel, messages):
+        # Concurrent sends over the shared Twilio connection pool
+        results = []
+        for msg, error in self.transport.send_many(self.phone_number, messages):
+            if error is not None:
+                print(f"❌ SMS error: {error}")
+                results.append({'success': False, 'error': str(error)})
+            else:
+                print(f"✅ SMS sent: {msg.sid}")
+                results.append({'success': True, 'method': 'sms', 'sid': msg.sid})
+        return results
+    
+    def get_queue_stats(self):
+        return self.queue.get_stats() if self.queue is not None else None
+    
+    def stop(self):
+        if self.queue is not None:
+            self.queue.stop()
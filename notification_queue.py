@@ -0,0 +1,283 @@
+import random
+import threading
+import time
+from cryptography.fernet import InvalidToken
+
+# Per-channel (burst, messages per hour); a digest counts as one message,
+# even when it is too long for one SMS and goes out split
+DEFAULT_RATE_LIMITS = {
+    'sms': (3, 10),
+}
+# Seconds to hold a channel's first pending message so a burst leaves as one digest
+DEFAULT_COALESCE_WINDOWS = {
+    'sms': 30,
+}
+SENT_RETENTION = 86400
+# Rows claimed per channel per pass; a full claim means more may be waiting
+CLAIM_BATCH = 20
+# Twilio rejects SMS bodies longer than this; bigger digests are split
+MAX_BODY_CHARS = 1600
+
+class TokenBucket:
+    def __init__(self, capacity, per_hour):
+        self.capacity = capacity
+        self.rate = per_hour / 3600
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self):
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def seconds_until_token(self):
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+class NotificationQueue:
+    # Outbound messages persisted in SQLite and drained by one background
+    # thread per process. Rows are claimed under BEGIN IMMEDIATE with a lease,
+    # so several workers never send the same row and a crashed sender's rows
+    # come back after the lease runs out. Rate limits are per process.
+    # deliver(channel, body) returns a result dict; the optional
+    # deliver_many(channel, bodies) returns one per body and lets a digest
+    # split over several bodies go out concurrently.
+    def __init__(self, memory_manager, deliver, rate_limits=None, coalesce_windows=None,
+                 max_attempts=5, base_backoff=30, lease_seconds=120, poll_interval=5,
+                 deliver_many=None, max_body_chars=MAX_BODY_CHARS):
+        self.memory_manager = memory_manager
+        self.deliver = deliver
+        self.deliver_many = deliver_many
+        self.max_body_chars = max_body_chars
+        self.buckets = {
+            channel: TokenBucket(burst, per_hour)
+            for channel, (burst, per_hour) in dict(DEFAULT_RATE_LIMITS, **(rate_limits or {})).items()
+        }
+        self.coalesce_windows = dict(DEFAULT_COALESCE_WINDOWS, **(coalesce_windows or {}))
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.stats = {'enqueued': 0, 'enqueue_ms_total': 0.0, 'delivered': 0, 'digests': 0, 'retries': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._last_purge = 0.0
+
+    def enqueue(self, channel, message):
+        started = time.perf_counter()
+        now = time.time()
+        conn = self.memory_manager.get_connection()
+        with conn:
+            cursor = conn.execute('''
+                INSERT INTO notification_queue (channel, encrypted_message, created_at, available_at)
+                VALUES (?, ?, ?, ?)
+            ''', (channel, self.memory_manager.cipher.encrypt(message.encode()), now, now))
+        self._wake.set()
+
+        with self._stats_lock:
+            self.stats['enqueued'] += 1
+            self.stats['enqueue_ms_total'] += (time.perf_counter() - started) * 1000
+        return cursor.lastrowid
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='notification-queue', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                wait = self.drain_once()
+            except Exception as e:
+                print(f"⚠️ Notification queue error: {e}")
+                wait = self.poll_interval
+            self._wake.wait(min(wait, self.poll_interval))
+            self._wake.clear()
+
+    def _due_channels(self, conn, now):
+        return conn.execute('''
+            SELECT channel, MIN(created_at), MAX(attempts)
+            FROM notification_queue
+            WHERE (status = 'pending' AND available_at <= ?)
+               OR (status = 'sending' AND lease_expires_at <= ?)
+            GROUP BY channel
+        ''', (now, now)).fetchall()
+
+    def drain_once(self):
+        # Sends whatever is due and returns how long the caller may sleep
+        conn = self.memory_manager.get_connection()
+        now = time.time()
+        next_wake = self.poll_interval
+
+        for channel, oldest, attempts in self._due_channels(conn, now):
+            # Retries skip the window - they already waited out their backoff
+            window = self.coalesce_windows.get(channel, 0)
+            if attempts == 0 and now < oldest + window:
+                next_wake = min(next_wake, oldest + window - now)
+                continue
+
+            bucket = self.buckets.get(channel)
+            if bucket is not None and not bucket.try_take():
+                next_wake = min(next_wake, bucket.seconds_until_token())
+                continue
+
+            claimed = self._claim(conn, channel, now)
+            if claimed:
+                self._send(conn, channel, claimed)
+            if len(claimed) == CLAIM_BATCH:
+                next_wake = 0
+
+        self._purge_sent(conn, now)
+        return max(next_wake, 0.05)
+
+    def _claim(self, conn, channel, now):
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute('''
+                SELECT id, encrypted_message, attempts
+                FROM notification_queue
+                WHERE channel = ?
+                  AND ((status = 'pending' AND available_at <= ?)
+                       OR (status = 'sending' AND lease_expires_at <= ?))
+                ORDER BY id
+                LIMIT ?
+            ''', (channel, now, now, CLAIM_BATCH)).fetchall()
+            if rows:
+                ids = [r[0] for r in rows]
+                conn.execute(
+                    f"UPDATE notification_queue SET status = 'sending', lease_expires_at = ? "
+                    f"WHERE id IN ({','.join('?' * len(ids))})",
+                    [now + self.lease_seconds, *ids]
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return rows
+
+    def _digest(self, messages):
+        if len(messages) == 1:
+            return messages[0]
+        return f"💌 {len(messages)} updates from Grace:\n" + "\n".join(f"• {m}" for m in messages)
+
+    def _pack(self, claimed):
+        # Greedily packs (row_id, message) pairs into as few bodies as fit
+        # max_body_chars; returns (body, row_ids) pairs in queue order
+        packed = []
+        group = []
+        for row_id, message in claimed:
+            if group and len(self._digest([m for _, m in group] + [message])) > self.max_body_chars:
+                packed.append(group)
+                group = []
+            group.append((row_id, message))
+        if group:
+            packed.append(group)
+        return [(self._digest([m for _, m in group]), [row_id for row_id, _ in group]) for group in packed]
+
+    def _deliver_bodies(self, channel, bodies):
+        try:
+            if self.deliver_many is not None and len(bodies) > 1:
+                results = self.deliver_many(channel, bodies)
+            else:
+                results = [self.deliver(channel, body) for body in bodies]
+        except Exception as e:
+            return [str(e)] * len(bodies)
+        return [None if result.get('success') else result.get('error', 'delivery failed') for result in results]
+
+    def _send(self, conn, channel, rows):
+        claimed = []
+        unreadable = []
+        for row_id, encrypted_message, _ in rows:
+            try:
+                claimed.append((row_id, self.memory_manager.cipher.decrypt(encrypted_message).decode()))
+            except (InvalidToken, UnicodeDecodeError):
+                unreadable.append(row_id)
+        if unreadable:
+            self._mark_failed(conn, unreadable, 'unreadable message')
+        if not claimed:
+            return
+
+        packed = self._pack(claimed)
+        errors = self._deliver_bodies(channel, [body for body, _ in packed])
+
+        sent_ids = [row_id for (_, ids), error in zip(packed, errors) if error is None for row_id in ids]
+        if sent_ids:
+            with conn:
+                conn.execute(
+                    f"UPDATE notification_queue SET status = 'sent', sent_at = ?, lease_expires_at = NULL "
+                    f"WHERE id IN ({','.join('?' * len(sent_ids))})",
+                    [time.time(), *sent_ids]
+                )
+            with self._stats_lock:
+                self.stats['delivered'] += len(sent_ids)
+                self.stats['digests'] += sum(1 for (_, ids), error in zip(packed, errors) if error is None and len(ids) > 1)
+
+        attempts_by_id = {r[0]: r[2] for r in rows}
+        for (_, ids), error in zip(packed, errors):
+            if error is not None:
+                self._retry(conn, ids, max(attempts_by_id[row_id] for row_id in ids) + 1, error)
+
+    def _retry(self, conn, ids, attempts, error):
+        if attempts >= self.max_attempts:
+            self._mark_failed(conn, ids, error)
+            return
+        # Exponential backoff with jitter so workers don't retry in lockstep
+        delay = self.base_backoff * 2 ** (attempts - 1) * random.uniform(0.8, 1.2)
+        with conn:
+            conn.execute(
+                f"UPDATE notification_queue SET status = 'pending', attempts = ?, available_at = ?, "
+                f"lease_expires_at = NULL, last_error = ? WHERE id IN ({','.join('?' * len(ids))})",
+                [attempts, time.time() + delay, error, *ids]
+            )
+        with self._stats_lock:
+            self.stats['retries'] += 1
+        print(f"⚠️ Notification send failed (attempt {attempts}), retrying in {delay:.0f}s: {error}")
+
+    def _mark_failed(self, conn, ids, error):
+        with conn:
+            conn.execute(
+                f"UPDATE notification_queue SET status = 'failed', lease_expires_at = NULL, last_error = ? "
+                f"WHERE id IN ({','.join('?' * len(ids))})",
+                [error, *ids]
+            )
+        with self._stats_lock:
+            self.stats['failed'] += len(ids)
+        print(f"❌ Gave up on {len(ids)} notifications: {error}")
+
+    def _purge_sent(self, conn, now):
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        with conn:
+            conn.execute(
+                "DELETE FROM notification_queue WHERE status = 'sent' AND sent_at < ?",
+                (now - SENT_RETENTION,)
+            )
+
+    def get_stats(self):
+        conn = self.memory_manager.get_connection()
+        counts = dict(conn.execute('SELECT status, COUNT(*) FROM notification_queue GROUP BY status').fetchall())
+        with self._stats_lock:
+            enqueued = self.stats['enqueued']
+            return dict(
+                {k: v for k, v in self.stats.items() if k != 'enqueue_ms_total'},
+                avg_enqueue_ms=round(self.stats['enqueue_ms_total'] / enqueued, 3) if enqueued else 0.0,
+                queued={status: counts.get(status, 0) for status in ('pending', 'sending', 'sent', 'failed')}
+            )
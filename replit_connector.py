@@ -1,11 +1,74 @@
 import os
+import threading
+import time
 import requests
 import json
+from datetime import datetime
+from requests.adapters import HTTPAdapter
+
+REQUEST_TIMEOUT = 10
+# Refresh this long before a token's expires_at so callers never get a dying token
+TOKEN_SAFETY_MARGIN = 120
+# Connectors without an expiry (e.g. Twilio API keys) are re-fetched this often
+DEFAULT_SETTINGS_TTL = 900
+
+# Process-wide: one pooled keep-alive session and one settings cache shared by
+# every manager, with a lock per connector so concurrent misses make one call.
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+_settings_cache = {}
+_cache_lock = threading.Lock()
+_refresh_locks = {}
+
+def _parse_expiry(settings):
+    expires_at = settings.get('settings', {}).get('expires_at')
+    if expires_at:
+        try:
+            return datetime.fromisoformat(str(expires_at).replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            pass
+    return time.time() + DEFAULT_SETTINGS_TTL
 
 class ReplitConnector:
+    @staticmethod
+    def _cached_settings(connector_name):
+        with _cache_lock:
+            entry = _settings_cache.get(connector_name)
+        if entry and entry[1] - TOKEN_SAFETY_MARGIN > time.time():
+            return entry[0]
+        return None
+    
+    @staticmethod
+    def invalidate(connector_name=None):
+        with _cache_lock:
+            if connector_name is None:
+                _settings_cache.clear()
+            else:
+                _settings_cache.pop(connector_name, None)
+    
     @staticmethod
     def get_connection_settings(connector_name):
-        hostname = os.environ.get('REPLIT_CONNECTORS_HOSTNAME')
+        settings = ReplitConnector._cached_settings(connector_name)
+        if settings is not None:
+            return settings
+        
+        with _cache_lock:
+            refresh_lock = _refresh_locks.setdefault(connector_name, threading.Lock())
+        
+        with refresh_lock:
+            # Whoever held the lock before us may already have refreshed it
+            settings = ReplitConnector._cached_settings(connector_name)
+            if settings is not None:
+                return settings
+            
+            settings = ReplitConnector._fetch_connection_settings(connector_name)
+            with _cache_lock:
+                _settings_cache[connector_name] = (settings, _parse_expiry(settings))
+            return settings
+    
+    @staticmethod
+    def _fetch_connection_settings(connector_name):
+        hostname = os.environ.get('REPLIT_CONNECTORS_HOSTNAME', '')
         
         repl_identity = os.environ.get('REPL_IDENTITY')
         web_repl_renewal = os.environ.get('WEB_REPL_RENEWAL')
@@ -17,14 +80,16 @@ class ReplitConnector:
         else:
             raise Exception('X_REPLIT_TOKEN not found for repl/depl')
         
-        url = f'https://{hostname}/api/v2/connection?include_secrets=true&connector_names={connector_name}'
+        # A full base URL is accepted too, e.g. a local stand-in server for tests
+        base_url = hostname if '://' in hostname else f'https://{hostname}'
+        url = f'{base_url}/api/v2/connection?include_secrets=true&connector_names={connector_name}'
         
         headers = {
             'Accept': 'application/json',
             'X_REPLIT_TOKEN': x_replit_token
         }
         
-        response = requests.get(url, headers=headers)
+        response = _session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         
         data = response.json()
@@ -0,0 +1,110 @@
+import hashlib
+import math
+import threading
+import time
+
+EMAIL_SEEN_TTL = 90 * 86400
+CALENDAR_SEEN_TTL = 2 * 86400
+
+# Same bound as MemoryManager's IN (...) batches
+MAX_BATCH_PARAMS = 500
+
+class BloomFilter:
+    def __init__(self, capacity=100000, error_rate=0.01):
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+class SeenStore:
+    # Compact "have I processed this?" set for Gmail message / Calendar event
+    # IDs, kept out of the encrypted memories table. Entries expire after a
+    # per-entry TTL and are removed by sweep_expired().
+    #
+    # The optional Bloom filter only knows about IDs this process has loaded
+    # or marked, so leave it off when several workers poll the same account.
+    def __init__(self, memory_manager, use_bloom=False, bloom_capacity=100000, bloom_error_rate=0.01):
+        self.memory_manager = memory_manager
+        self.bloom = None
+        self._bloom_lock = threading.Lock()
+
+        if use_bloom:
+            self.bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+            self._load_bloom()
+
+    def _load_bloom(self):
+        conn = self.memory_manager.get_connection()
+        rows = conn.execute('SELECT namespace, item_id FROM seen_ids WHERE expires_at > ?', (time.time(),))
+        with self._bloom_lock:
+            for namespace, item_id in rows:
+                self.bloom.add(f'{namespace}:{item_id}')
+
+    def seen_many(self, namespace, item_ids):
+        item_ids = list(dict.fromkeys(item_ids))
+
+        if self.bloom is not None:
+            with self._bloom_lock:
+                item_ids = [i for i in item_ids if f'{namespace}:{i}' in self.bloom]
+
+        conn = self.memory_manager.get_connection()
+        now = time.time()
+        seen = set()
+        for start in range(0, len(item_ids), MAX_BATCH_PARAMS):
+            batch = item_ids[start:start + MAX_BATCH_PARAMS]
+            placeholders = ','.join('?' * len(batch))
+            rows = conn.execute(
+                f'SELECT item_id FROM seen_ids WHERE namespace = ? AND expires_at > ? AND item_id IN ({placeholders})',
+                [namespace, now, *batch]
+            ).fetchall()
+            seen.update(r[0] for r in rows)
+
+        return seen
+
+    def is_seen(self, namespace, item_id):
+        return item_id in self.seen_many(namespace, [item_id])
+
+    def mark_seen_many(self, namespace, item_ids, ttl):
+        item_ids = list(item_ids)
+        expires_at = time.time() + ttl
+
+        conn = self.memory_manager.get_connection()
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO seen_ids (namespace, item_id, expires_at) VALUES (?, ?, ?)',
+                [(namespace, item_id, expires_at) for item_id in item_ids]
+            )
+
+        if self.bloom is not None:
+            with self._bloom_lock:
+                for item_id in item_ids:
+                    self.bloom.add(f'{namespace}:{item_id}')
+
+    def mark_seen(self, namespace, item_id, ttl):
+        self.mark_seen_many(namespace, [item_id], ttl)
+
+    def sweep_expired(self):
+        conn = self.memory_manager.get_connection()
+        with conn:
+            cursor = conn.execute('DELETE FROM seen_ids WHERE expires_at <= ?', (time.time(),))
+
+        if cursor.rowcount:
+            print(f"🧹 Swept {cursor.rowcount} expired seen IDs")
+        return cursor.rowcount
+
+    def count(self, namespace=None):
+        conn = self.memory_manager.get_connection()
+        if namespace is None:
+            return conn.execute('SELECT COUNT(*) FROM seen_ids').fetchone()[0]
+        return conn.execute('SELECT COUNT(*) FROM seen_ids WHERE namespace = ?', (namespace,)).fetchone()[0]
@@ -0,0 +1,50 @@
+import pathlib
+import sys
+import types
+
+import pytest
+
+# The app imports its modules as `modules.<name>` (they live in modules/ when
+# deployed); map that package onto the repository root for the tests.
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+if 'modules' not in sys.modules:
+    package = types.ModuleType('modules')
+    package.__path__ = [str(ROOT)]
+    sys.modules['modules'] = package
+sys.path.insert(0, str(ROOT / 'tests'))
+
+@pytest.fixture
+def openai_server(monkeypatch):
+    from fakes.openai_server import FakeOpenAIServer
+
+    # AIBrain picks xAI when its key is set; point the OpenAI client at the fake
+    with FakeOpenAIServer() as server:
+        monkeypatch.delenv('XAI_API_KEY', raising=False)
+        monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+        monkeypatch.setenv('OPENAI_BASE_URL', server.base_url)
+        yield server
+
+@pytest.fixture
+def gmail():
+    from fakes.gmail import FakeGmailService
+    return FakeGmailService()
+
+@pytest.fixture
+def calendar():
+    from fakes.calendar import FakeCalendarService
+    return FakeCalendarService()
+
+@pytest.fixture
+def notifier():
+    from fakes.notifier import RecordingNotifier
+    return RecordingNotifier()
+
+@pytest.fixture
+def memory_manager(tmp_path, monkeypatch):
+    from modules.memory import MemoryManager
+
+    # MemoryManager keeps its key file in the working directory
+    monkeypatch.chdir(tmp_path)
+    manager = MemoryManager(str(tmp_path / 'test_memory.db'))
+    yield manager
+    manager.close()
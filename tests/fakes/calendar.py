@@ -0,0 +1,109 @@
+import itertools
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from fakes.gmail import _Request, _Resource, http_error
+
+def _event_end(event):
+    end = event['end']
+    if 'dateTime' in end:
+        return datetime.fromisoformat(end['dateTime'].replace('Z', '+00:00'))
+    return datetime.fromisoformat(end['date']).astimezone(timezone.utc)
+
+class FakeCalendarService:
+    # In-memory calendar behind events().list as CalendarSync calls it:
+    # pagination, nextSyncToken change feeds with cancelled tombstones, and
+    # 410 Gone for sync tokens older than invalidate_sync_tokens().
+    def __init__(self, rtt=0.0, max_page_size=250):
+        self.rtt = rtt
+        self.max_page_size = max_page_size
+        self.requests = Counter()
+        self.revoked = False
+        self.stored = {}
+        self.changes = {}
+        self.sequence = 0
+        self.token_epoch = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # Calendar manipulation
+
+    def _touch(self, event):
+        self.sequence += 1
+        self.changes[event['id']] = (self.sequence, dict(event))
+
+    def add_event(self, summary, start, end, description=''):
+        # start/end are aware datetimes, or dates for all-day events
+        event_id = f'evt{next(self._ids):05d}'
+        if isinstance(start, datetime):
+            span = {'start': {'dateTime': start.isoformat()}, 'end': {'dateTime': end.isoformat()}}
+        else:
+            span = {'start': {'date': start.isoformat()}, 'end': {'date': end.isoformat()}}
+        event = dict(span, id=event_id, summary=summary, description=description, status='confirmed')
+        with self._lock:
+            self.stored[event_id] = event
+            self._touch(event)
+        return event_id
+
+    def move_event(self, event_id, start, end):
+        with self._lock:
+            event = self.stored[event_id]
+            event['start'] = {'dateTime': start.isoformat()}
+            event['end'] = {'dateTime': end.isoformat()}
+            self._touch(event)
+
+    def cancel_event(self, event_id):
+        with self._lock:
+            del self.stored[event_id]
+            self._touch({'id': event_id, 'status': 'cancelled'})
+
+    def invalidate_sync_tokens(self):
+        with self._lock:
+            self.token_epoch += 1
+
+    def revoke_token(self, revoked=True):
+        # Every call answers 401 until the token is restored
+        self.revoked = revoked
+
+    def reset_counts(self):
+        self.requests.clear()
+
+    # Client surface
+
+    def _round_trip(self):
+        if self.rtt:
+            time.sleep(self.rtt)
+        if self.revoked:
+            raise http_error(401, 'Invalid Credentials')
+
+    def events(self):
+        return _Resource(list=self._list)
+
+    def _list(self, calendarId, singleEvents=False, maxResults=250, pageToken=None, timeMin=None, syncToken=None,
+              **unused):
+        def handler():
+            with self._lock:
+                if syncToken is not None:
+                    _, epoch, since = syncToken.split('-')
+                    since = int(since)
+                    if int(epoch) != self.token_epoch:
+                        raise http_error(410, 'Sync token is no longer valid, a full sync is required.')
+                    items = [event for sequence, event in sorted(self.changes.values(), key=lambda c: c[0])
+                             if sequence > since]
+                else:
+                    cutoff = datetime.fromisoformat(timeMin) if timeMin else None
+                    items = [dict(event) for _, event in sorted(self.stored.items())
+                             if cutoff is None or _event_end(event) > cutoff]
+                next_token = f'sync-{self.token_epoch}-{self.sequence}'
+
+            offset = int(pageToken or 0)
+            size = min(maxResults, self.max_page_size)
+            response = {'items': items[offset:offset + size]}
+            if offset + size < len(items):
+                response['nextPageToken'] = str(offset + size)
+            else:
+                response['nextSyncToken'] = next_token
+            return response
+        return _Request(self, 'events.list', handler)
@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+class FakeConnectorServer:
+    # Local stand-in for the Replit connectors API on 127.0.0.1. Point
+    # REPLIT_CONNECTORS_HOSTNAME at `url`. Each fetch is counted per
+    # connector; `delay` slows responses down so concurrent misses overlap,
+    # and `expires_in` (seconds, or None for no expiry) sets expires_at.
+    def __init__(self, delay=0.0, expires_in=3600):
+        self.delay = delay
+        self.expires_in = expires_in
+        self.requests = Counter()
+        self.connections = {
+            'google-mail': {'access_token': 'gmail-token'},
+            'google-calendar': {'access_token': 'calendar-token'},
+            'spotify': {'access_token': 'spotify-token', 'oauth': {'credentials': {'refresh_token': 'refresh'}}},
+            'twilio': {'account_sid': 'AC123', 'api_key': 'SK123', 'api_key_secret': 'secret', 'phone_number': '+15550000000'}
+        }
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def rotate(self):
+        # New tokens for every connector from the next fetch on
+        with self._lock:
+            self.generation += 1
+
+    def _settings(self, connector_name):
+        with self._lock:
+            self.requests[connector_name] += 1
+            settings = self.connections.get(connector_name)
+            generation = self.generation
+        if settings is None:
+            return []
+        settings = {
+            key: f'{value}-{generation}' if key == 'access_token' else value
+            for key, value in settings.items()
+        }
+        if self.expires_in is not None:
+            expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.expires_in)
+            settings['expires_at'] = expires_at.isoformat().replace('+00:00', 'Z')
+        return [{'connector_name': connector_name, 'settings': settings}]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path != '/api/v2/connection' or not self.headers.get('X_REPLIT_TOKEN'):
+                    self.send_error(404 if parsed.path != '/api/v2/connection' else 401)
+                    return
+                if server.delay:
+                    time.sleep(server.delay)
+                connector_name = parse_qs(parsed.query).get('connector_names', [''])[0]
+                body = json.dumps({'items': server._settings(connector_name)}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, name='fake-connectors', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
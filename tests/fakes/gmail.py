@@ -0,0 +1,169 @@
+import itertools
+import threading
+import time
+from collections import Counter
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+def http_error(status, reason=''):
+    return HttpError(httplib2.Response({'status': status, 'reason': reason}), reason.encode())
+
+class _Request:
+    # Stands in for googleapiclient's HttpRequest: nothing happens until execute()
+    def __init__(self, service, name, handler):
+        self.service = service
+        self.name = name
+        self.handler = handler
+
+    def execute(self):
+        self.service._round_trip()
+        self.service.requests[self.name] += 1
+        return self.handler()
+
+class _Batch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append((request_id or str(len(self.requests)), request))
+
+    def execute(self):
+        # However many calls it carries, a batch is one HTTP round trip
+        self.service._round_trip()
+        self.service.requests['batch'] += 1
+        for request_id, request in self.requests:
+            self.service.requests[request.name] += 1
+            try:
+                response, exception = request.handler(), None
+            except HttpError as e:
+                response, exception = None, e
+            self.callback(request_id, response, exception)
+
+class _Resource:
+    def __init__(self, **methods):
+        self.__dict__.update(methods)
+
+class FakeGmailService:
+    # In-memory mailbox behind the slice of the Gmail v1 client GmailMonitor
+    # uses. Every executed call is tallied in `requests` by method name, and
+    # `rtt` seconds are slept per HTTP round trip to model network latency.
+    def __init__(self, rtt=0.0, page_size=100):
+        self.rtt = rtt
+        self.page_size = page_size
+        self.requests = Counter()
+        self.revoked = False
+        self.messages = {}
+        self.history = []
+        self.history_id = 1000
+        self.oldest_history_id = self.history_id
+        self.failing = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # Mailbox manipulation
+
+    def deliver(self, sender, subject, snippet='', unread=True):
+        message_id = f'msg{next(self._ids):05d}'
+        labels = ['INBOX', 'UNREAD'] if unread else ['INBOX']
+        with self._lock:
+            self.messages[message_id] = {'from': sender, 'subject': subject, 'snippet': snippet, 'labels': labels}
+            self.history_id += 1
+            self.history.append((self.history_id, message_id, list(labels)))
+        return message_id
+
+    def delete(self, message_id):
+        with self._lock:
+            self.messages.pop(message_id, None)
+
+    def expire_history(self):
+        # Gmail only keeps about a week of history; older startHistoryIds 404
+        with self._lock:
+            self.oldest_history_id = self.history_id + 1
+
+    def fail_next_get(self, message_id, status=500):
+        self.failing[message_id] = status
+
+    def revoke_token(self, revoked=True):
+        # Every call answers 401 until the token is restored
+        self.revoked = revoked
+
+    def reset_counts(self):
+        self.requests.clear()
+
+    # Client surface
+
+    def _round_trip(self):
+        if self.rtt:
+            time.sleep(self.rtt)
+        if self.revoked:
+            raise http_error(401, 'Invalid Credentials')
+
+    def users(self):
+        return _Resource(
+            getProfile=self._get_profile,
+            messages=lambda: _Resource(list=self._list_messages, get=self._get_message),
+            history=lambda: _Resource(list=self._list_history)
+        )
+
+    def new_batch_http_request(self, callback=None):
+        return _Batch(self, callback)
+
+    def _get_profile(self, userId):
+        return _Request(self, 'getProfile', lambda: {'emailAddress': 'me@example.com', 'historyId': str(self.history_id)})
+
+    def _list_messages(self, userId, labelIds=(), maxResults=100, pageToken=None):
+        def handler():
+            with self._lock:
+                matching = [
+                    message_id for message_id, message in sorted(self.messages.items(), reverse=True)
+                    if all(label in message['labels'] for label in labelIds)
+                ]
+            start = int(pageToken or 0)
+            page = matching[start:start + min(maxResults, self.page_size)]
+            response = {'messages': [{'id': message_id} for message_id in page], 'resultSizeEstimate': len(matching)}
+            if start + len(page) < len(matching):
+                response['nextPageToken'] = str(start + len(page))
+            return response
+        return _Request(self, 'messages.list', handler)
+
+    def _list_history(self, userId, startHistoryId, historyTypes=None, labelId=None, pageToken=None):
+        def handler():
+            start_id = int(startHistoryId)
+            with self._lock:
+                if start_id < self.oldest_history_id:
+                    raise http_error(404, 'Requested entity was not found.')
+                records = [
+                    {'id': str(history_id), 'messagesAdded': [{'message': {'id': message_id, 'labelIds': labels}}]}
+                    for history_id, message_id, labels in self.history
+                    if history_id > start_id and (labelId is None or labelId in labels)
+                ]
+                current = str(self.history_id)
+            offset = int(pageToken or 0)
+            response = {'history': records[offset:offset + self.page_size], 'historyId': current}
+            if offset + self.page_size < len(records):
+                response['nextPageToken'] = str(offset + self.page_size)
+            return response
+        return _Request(self, 'history.list', handler)
+
+    def _get_message(self, userId, id, format='full', metadataHeaders=()):
+        def handler():
+            status = self.failing.pop(id, None)
+            if status is not None:
+                raise http_error(status, 'Backend Error')
+            with self._lock:
+                message = self.messages.get(id)
+            if message is None:
+                raise http_error(404, 'Requested entity was not found.')
+            return {
+                'id': id,
+                'labelIds': message['labels'],
+                'snippet': message['snippet'],
+                'payload': {'headers': [
+                    {'name': 'From', 'value': message['from']},
+                    {'name': 'Subject', 'value': message['subject']}
+                ]}
+            }
+        return _Request(self, 'messages.get', handler)
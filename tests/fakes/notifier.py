@@ -0,0 +1,9 @@
+class RecordingNotifier:
+    # Stands in for NotificationManager in monitor tests: keeps what would
+    # have been sent instead of queueing it
+    def __init__(self):
+        self.sent = []
+
+    def send_notification(self, message, force_sms=False):
+        self.sent.append(message)
+        return {'success': True}
@@ -0,0 +1,195 @@
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_ENTRY_RE = re.compile(r'(?:\[(\d+)\]\n)?From: (.*)\nSubject: (.*)\nSnippet: (.*)')
+
+def _tokens(text):
+    # Close enough to tiktoken for English prompts: ~4 characters a token
+    return max(1, len(text) // 4)
+
+class FakeOpenAIServer:
+    # Local OpenAI-compatible /v1/chat/completions on 127.0.0.1 that answers
+    # AIBrain's email triage prompts. Set OPENAI_BASE_URL to `base_url`.
+    # An email is urgent when is_urgent(subject) says so. `latency` delays
+    # every response, either a number of seconds or a function of the last
+    # message's content; `max_in_flight` records peak concurrency. `faults`
+    # is a list consumed one per multi-email batch ('garbage' or 'partial')
+    # to exercise the split-on-failure path, and `email_faults` one per
+    # single-email request ('garbage' only). Usage figures are estimated
+    # from the prompt and reply lengths.
+    #
+    # stream=True requests get `chat_reply` word by word as SSE chunks,
+    # `stream_delay` apart, plus a usage chunk when stream_options asks for
+    # one; `streams` records 'completed' or 'aborted' (client hung up).
+    def __init__(self, latency=0.0, is_urgent=None):
+        self.latency = latency
+        self.is_urgent = is_urgent or (lambda subject: 'urgent' in subject.lower())
+        self.faults = []
+        self.email_faults = []
+        self.requests = Counter()
+        self.batch_sizes = []
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chat_reply = 'Pizza night sounds perfect, babe!'
+        self.stream_delay = 0.0
+        self.streams = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/v1'
+
+    def _decision(self, subject):
+        urgent = self.is_urgent(subject)
+        return {
+            'urgent': urgent,
+            'reason': 'deadline' if urgent else 'routine',
+            'message': f'Heads up babe: {subject}' if urgent else ''
+        }
+
+    def _answer(self, messages):
+        prompt = messages[-1]['content']
+        entries = _ENTRY_RE.findall(prompt)
+        if not entries:
+            return 'request', '{"remind": false, "alert": false, "message": ""}'
+
+        if not prompt.startswith('Analyze these'):
+            with self._lock:
+                fault = self.email_faults.pop(0) if self.email_faults else None
+            if fault == 'garbage':
+                return 'email', 'Hmm, that one looks important babe!'
+            return 'email', json.dumps(self._decision(entries[0][2]))
+
+        with self._lock:
+            self.batch_sizes.append(len(entries))
+            fault = self.faults.pop(0) if self.faults else None
+        if fault == 'garbage':
+            return 'email_batch', 'Sure babe! Here is what I think about those emails...'
+        items = [dict(self._decision(subject), id=int(index)) for index, _, subject, _ in entries]
+        if fault == 'partial':
+            items = items[:-1]
+        return 'email_batch', '```json\n' + json.dumps(items) + '\n```'
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path != '/v1/chat/completions':
+                    self.send_error(404)
+                    return
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                with server._lock:
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    latency = server.latency
+                    if callable(latency):
+                        latency = latency(request['messages'][-1]['content'])
+                    if latency:
+                        time.sleep(latency)
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+                if request.get('stream'):
+                    self._stream(request)
+                    return
+
+                kind, content = server._answer(request['messages'])
+                prompt_tokens = sum(_tokens(m['content']) for m in request['messages'])
+                completion_tokens = _tokens(content)
+                with server._lock:
+                    server.requests[kind] += 1
+                    server.prompt_tokens += prompt_tokens
+                    server.completion_tokens += completion_tokens
+
+                body = json.dumps({
+                    'id': 'chatcmpl-fake',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': request.get('model', 'fake'),
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': content},
+                        'finish_reason': 'stop'
+                    }],
+                    'usage': {
+                        'prompt_tokens': prompt_tokens,
+                        'completion_tokens': completion_tokens,
+                        'total_tokens': prompt_tokens + completion_tokens
+                    }
+                }).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, request):
+                words = server.chat_reply.split(' ')
+                prompt_tokens = sum(_tokens(m['content']) for m in request['messages'])
+                chunks = [
+                    {'choices': [{'index': 0, 'delta': {'content': word if i == 0 else f' {word}'}}]}
+                    for i, word in enumerate(words)
+                ]
+                chunks.append({'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})
+                if (request.get('stream_options') or {}).get('include_usage'):
+                    completion_tokens = _tokens(server.chat_reply)
+                    chunks.append({'choices': [], 'usage': {
+                        'prompt_tokens': prompt_tokens,
+                        'completion_tokens': completion_tokens,
+                        'total_tokens': prompt_tokens + completion_tokens
+                    }})
+                with server._lock:
+                    server.requests['chat_stream'] += 1
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.end_headers()
+                outcome = 'completed'
+                try:
+                    for chunk in chunks:
+                        chunk.update(id='chatcmpl-fake', object='chat.completion.chunk',
+                                     created=int(time.time()), model=request.get('model', 'fake'))
+                        self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+                        self.wfile.flush()
+                        time.sleep(server.stream_delay)
+                    self.wfile.write(b'data: [DONE]\n\n')
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    outcome = 'aborted'
+                with server._lock:
+                    server.streams.append(outcome)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, name='fake-openai', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,50 @@
+import itertools
+import threading
+import time
+from types import SimpleNamespace
+
+from twilio.base.exceptions import TwilioRestException
+
+class TwilioStub:
+    # Stands in for twilio.rest.Client: patch `client` over
+    # modules.twilio_transport.Client. messages.create sleeps `latency`
+    # seconds like a real API round trip and records what was sent; bodies
+    # listed in `fail_bodies` (or any body when fail_all is set) get a 500.
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.sent = []
+        self.fail_bodies = set()
+        self.fail_all = False
+        self.clients_built = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._sids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def client(self, username, password, account_sid=None, http_client=None):
+        with self._lock:
+            self.clients_built += 1
+        return SimpleNamespace(messages=SimpleNamespace(create=self._create))
+
+    def _create(self, body, from_, to):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if self.fail_all or body in self.fail_bodies:
+                raise TwilioRestException(500, '/Messages.json', msg='Service unavailable')
+            with self._lock:
+                self.sent.append({'body': body, 'from': from_, 'to': to})
+                return SimpleNamespace(sid=f'SM{next(self._sids):032d}')
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+TEST_CREDENTIALS = {
+    'account_sid': 'AC123',
+    'api_key': 'SK123',
+    'api_key_secret': 'secret',
+    'phone_number': '+15550000000'
+}
@@ -0,0 +1,82 @@
+from datetime import datetime, time as dt_time, timedelta, timezone
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from modules.adaptive_scheduler import AdaptivePolicy, AdaptiveScheduler, parse_quiet_hours, quiet_until
+from modules.calendar_monitor import CalendarMonitor
+
+QUIET = (dt_time(23, 0), dt_time(7, 0))
+
+def _scheduler(policy, honor_quiet_hours=True):
+    adaptive = AdaptiveScheduler(BackgroundScheduler(), QUIET)
+    adaptive.add_job('poll', lambda: {'new_count': 0}, policy, 'Poll', honor_quiet_hours=honor_quiet_hours)
+    return adaptive
+
+def test_parse_quiet_hours():
+    assert parse_quiet_hours('23:00-07:00') == QUIET
+    assert parse_quiet_hours('') is None
+    assert parse_quiet_hours('late-early') is None
+
+def test_quiet_until_wraps_midnight():
+    assert quiet_until(QUIET, datetime(2026, 1, 1, 23, 30)) == datetime(2026, 1, 2, 7, 0)
+    assert quiet_until(QUIET, datetime(2026, 1, 2, 3, 0)) == datetime(2026, 1, 2, 7, 0)
+    assert quiet_until(QUIET, datetime(2026, 1, 2, 12, 0)) is None
+
+def test_policy_backs_off_and_speeds_up():
+    policy = AdaptivePolicy(60, 600, initial_seconds=120)
+    assert policy.observe(0) == 180
+    assert policy.observe(0) == 270
+    assert policy.observe(2) == 67.5
+    assert policy.observe(5) == 60
+    for _ in range(20):
+        policy.observe(0)
+    assert policy.interval == 600
+
+def test_next_run_landing_in_quiet_hours_is_deferred():
+    adaptive = _scheduler(AdaptivePolicy(600, 3600, initial_seconds=3600, jitter=0))
+    # 22:30 + 1h lands at 23:30, inside the window
+    trigger = adaptive._trigger('poll', datetime(2026, 1, 1, 22, 30))
+    assert trigger.start_date.replace(tzinfo=None) == datetime(2026, 1, 2, 7, 0)
+
+def test_next_run_outside_quiet_hours_is_untouched():
+    adaptive = _scheduler(AdaptivePolicy(600, 3600, initial_seconds=600, jitter=0))
+    # 22:30 + 10 min is still before the window
+    trigger = adaptive._trigger('poll', datetime(2026, 1, 1, 22, 30))
+    assert trigger.start_date.replace(tzinfo=None) != datetime(2026, 1, 2, 7, 0)
+
+def test_jobs_can_opt_out_of_quiet_hours():
+    adaptive = _scheduler(AdaptivePolicy(600, 3600, initial_seconds=3600, jitter=0), honor_quiet_hours=False)
+    trigger = adaptive._trigger('poll', datetime(2026, 1, 1, 22, 30))
+    assert trigger.start_date.replace(tzinfo=None) != datetime(2026, 1, 2, 7, 0)
+
+class DeclineAll:
+    def decide_calendar_reminders(self, events):
+        return [{'remind': False, 'message': ''} for _ in events]
+
+def test_calendar_poll_backs_off_while_only_declined_events_are_upcoming(memory_manager, calendar, notifier):
+    start = datetime.now(timezone.utc) + timedelta(hours=2)
+    calendar.add_event('Coffee with Sam', start, start + timedelta(minutes=30))
+    monitor = CalendarMonitor(memory_manager, DeclineAll(), notifier)
+    monitor._get_calendar_service = lambda: calendar
+
+    adaptive = AdaptiveScheduler(BackgroundScheduler(), QUIET)
+    policy = AdaptivePolicy(60, 3600, initial_seconds=600, jitter=0)
+    adaptive.add_job('calendar_monitor', monitor.check_events, policy, 'Calendar', honor_quiet_hours=False)
+    poll = adaptive.scheduler.get_job('calendar_monitor').func
+
+    # The first sync pulls the event in: real activity
+    assert poll()['pending'] == 1
+    assert policy.interval < 600
+
+    # Afterwards the declined event is still pending each time, but nothing changed
+    intervals = []
+    for _ in range(3):
+        result = poll()
+        assert result['pending'] == 1 and result['new_count'] == 0
+        intervals.append(policy.interval)
+    assert intervals == sorted(intervals) and intervals[-1] > 600
+
+    calendar.add_event('Dentist', start, start + timedelta(hours=1))
+    backed_off = policy.interval
+    assert poll()['new_count'] == 1
+    assert policy.interval < backed_off
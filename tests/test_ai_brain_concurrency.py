@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from modules import ai_brain
+from modules.ai_brain import AIBrain
+
+@pytest.fixture
+def brain(memory_manager, openai_server, monkeypatch):
+    # A fresh slot table, so the cap under test isn't one an earlier brain set
+    monkeypatch.setattr(ai_brain, '_provider_slots', {})
+    monkeypatch.setenv('OPENAI_MAX_CONCURRENCY', '3')
+    return AIBrain(memory_manager)
+
+def decide_all(subjects):
+    return lambda brain: [brain.decide_email_urgency(s, 'boss@work.example', 'see subject') for s in subjects]
+
+def test_fan_out_results_keep_submission_order(brain, openai_server):
+    # Earlier emails answer last, so completion order is the reverse of submission order
+    subjects = [f'URGENT item {i}' if i % 2 else f'Newsletter {i}' for i in range(6)]
+    openai_server.latency = lambda prompt: 0.3 - 0.05 * next(i for i, s in enumerate(subjects) if s in prompt)
+
+    decisions = brain.run_concurrently(decide_all(subjects))
+    assert [d['urgent'] for d in decisions] == [i % 2 == 1 for i in range(6)]
+    assert [d['message'] for d in decisions][1] == 'Heads up babe: URGENT item 1'
+    assert openai_server.max_in_flight > 1
+
+def test_provider_cap_holds_across_threads(brain, memory_manager, openai_server):
+    openai_server.latency = 0.05
+    other = AIBrain(memory_manager)
+    assert other.slot is brain.slot
+
+    def fan_out(prefix):
+        brain.run_concurrently(decide_all([f'{prefix} {i}' for i in range(8)]))
+
+    def sequential():
+        for i in range(4):
+            other.decide_email_urgency(f'chat {i}', 'friend@example.com', 'hey')
+
+    workers = [threading.Thread(target=fan_out, args=(name,)) for name in ('poll', 'camera')]
+    workers.append(threading.Thread(target=sequential))
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert openai_server.requests == {'email': 20}
+    assert openai_server.max_in_flight == 3
+
+def test_fan_outs_reuse_one_async_client(brain):
+    brain.run_concurrently(decide_all(['first']))
+    client = brain._async_brain.client
+    brain.run_concurrently(decide_all(['second']))
+    assert brain._async_brain.client is client
@@ -0,0 +1,63 @@
+import pytest
+
+from modules.ai_brain import AIBrain
+
+@pytest.fixture
+def brain(memory_manager, openai_server):
+    return AIBrain(memory_manager)
+
+def inbox(count, urgent_every=3):
+    return [
+        {
+            'sender': f'person{i}@example.com',
+            'subject': f'URGENT invoice {i}' if i % urgent_every == 0 else f'Newsletter issue {i}',
+            'snippet': f'Snippet for message {i}'
+        }
+        for i in range(count)
+    ]
+
+def test_one_request_triages_the_whole_batch(brain, openai_server):
+    emails = inbox(8)
+    decisions = brain.decide_email_urgency_batch(emails)
+
+    assert [d['urgent'] for d in decisions] == [i % 3 == 0 for i in range(8)]
+    assert decisions[0]['message'] == 'Heads up babe: URGENT invoice 0'
+    assert openai_server.requests == {'email_batch': 1}
+
+    # The system prompt is paid once for all eight, not once per email
+    brain.decide_email_urgency('Lunch?', 'friend@example.com', 'Are you free at noon')
+    stats = brain.get_usage_stats()
+    assert stats['email_batch']['items'] == 8
+    assert stats['email_batch']['tokens_per_item'] < stats['email']['tokens_per_item'] / 2
+
+def test_large_backlogs_are_chunked(brain, openai_server):
+    decisions = brain.decide_email_urgency_batch(inbox(25), max_batch_size=10)
+    assert len(decisions) == 25
+    assert sorted(openai_server.batch_sizes) == [5, 10, 10]
+
+@pytest.mark.parametrize('fault', ['garbage', 'partial'])
+def test_unparseable_batch_is_split_and_retried(brain, openai_server, fault):
+    openai_server.faults = [fault]
+    emails = inbox(8)
+    decisions = brain.decide_email_urgency_batch(emails)
+
+    assert [d['urgent'] for d in decisions] == [i % 3 == 0 for i in range(8)]
+    assert openai_server.batch_sizes == [8, 4, 4]
+
+def test_single_leftover_uses_the_single_email_prompt(brain, openai_server):
+    openai_server.faults = ['garbage', 'garbage']
+    decisions = brain.decide_email_urgency_batch(inbox(3))
+
+    assert [d['urgent'] for d in decisions] == [True, False, False]
+    assert openai_server.batch_sizes == [3, 2]
+    # 3 -> 1 + 2, and the garbled pair splits again into singles
+    assert openai_server.requests == {'email_batch': 2, 'email': 3}
+
+def test_repeat_emails_come_from_the_decision_cache(brain, openai_server):
+    emails = inbox(6)
+    first = brain.decide_email_urgency_batch(emails)
+    openai_server.requests.clear()
+
+    second = brain.decide_email_urgency_batch(emails)
+    assert openai_server.requests == {}
+    assert [d['urgent'] for d in second] == [d['urgent'] for d in first]
@@ -0,0 +1,88 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from modules import replit_connector
+from modules.calendar_monitor import REMINDERS_KEY, CalendarMonitor
+
+class RemindAll:
+    def decide_calendar_reminders(self, events):
+        return [{'remind': True, 'message': f'Reminder: {title}'} for title, _, _ in events]
+
+@pytest.fixture
+def scheduler():
+    # Never started: jobs stay pending and can be inspected
+    return BackgroundScheduler()
+
+def make_monitor(memory_manager, scheduler, calendar, notifier):
+    monitor = CalendarMonitor(memory_manager, RemindAll(), notifier, scheduler=scheduler, lead_minutes=15)
+    monitor._get_calendar_service = lambda: calendar
+    return monitor
+
+def reminder_jobs(scheduler):
+    return {job.id: job for job in scheduler.get_jobs() if job.id.startswith('calendar_reminder_')}
+
+def test_reminders_are_scheduled_at_start_minus_lead(memory_manager, scheduler, calendar, notifier):
+    monitor = make_monitor(memory_manager, scheduler, calendar, notifier)
+    start = (datetime.now(timezone.utc) + timedelta(hours=2)).replace(microsecond=0)
+    event_id = calendar.add_event('Dentist', start, start + timedelta(hours=1))
+
+    result = monitor.check_events()
+    assert 'error' not in result
+    jobs = reminder_jobs(scheduler)
+    assert list(jobs) == [f'calendar_reminder_{event_id}']
+    assert jobs[f'calendar_reminder_{event_id}'].trigger.run_date == start - timedelta(minutes=15)
+
+    # Moved: the old job goes and the next poll schedules the new time
+    calendar.move_event(event_id, start + timedelta(hours=1), start + timedelta(hours=2))
+    monitor.check_events()
+    assert reminder_jobs(scheduler)[f'calendar_reminder_{event_id}'].trigger.run_date == start + timedelta(minutes=45)
+
+    calendar.cancel_event(event_id)
+    monitor.check_events()
+    assert reminder_jobs(scheduler) == {}
+    assert memory_manager.get_memory(REMINDERS_KEY) == {}
+
+def test_constructing_the_monitor_has_no_side_effects(memory_manager, scheduler, calendar, notifier):
+    overdue = (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+    memory_manager.store_memory(REMINDERS_KEY, {
+        'evt1': {'title': 'Standup', 'start': overdue, 'fire_at': overdue, 'message': 'Standup now!'}
+    }, category='sync')
+
+    # What /status does: build the monitor and read from it
+    make_monitor(memory_manager, scheduler, calendar, notifier)
+    assert notifier.sent == []
+    assert scheduler.get_jobs() == []
+    assert 'evt1' in memory_manager.get_memory(REMINDERS_KEY)
+
+def test_restore_fires_overdue_and_reschedules_future_reminders(memory_manager, scheduler, calendar, notifier):
+    now = datetime.now(timezone.utc)
+    overdue = (now - timedelta(minutes=5)).isoformat()
+    later = (now + timedelta(hours=1)).isoformat()
+    memory_manager.store_memory(REMINDERS_KEY, {
+        'evt1': {'title': 'Standup', 'start': overdue, 'fire_at': overdue, 'message': 'Standup now!'},
+        'evt2': {'title': 'Lunch', 'start': later, 'fire_at': later, 'message': 'Lunch soon!'}
+    }, category='sync')
+    monitor = make_monitor(memory_manager, scheduler, calendar, notifier)
+
+    assert monitor.restore_reminders() == 2
+    assert notifier.sent == ['Standup now!']
+    assert list(reminder_jobs(scheduler)) == ['calendar_reminder_evt2']
+    assert list(memory_manager.get_memory(REMINDERS_KEY)) == ['evt2']
+
+    # Running it again re-registers rather than duplicating or re-sending
+    monitor.restore_reminders()
+    assert notifier.sent == ['Standup now!']
+    assert list(reminder_jobs(scheduler)) == ['calendar_reminder_evt2']
+
+def test_rejected_token_drops_the_cached_connector_settings(memory_manager, scheduler, calendar, notifier, monkeypatch):
+    for name in ('google-mail', 'google-calendar'):
+        monkeypatch.setitem(replit_connector._settings_cache, name, ({'settings': {'access_token': 'old'}}, time.time() + 900))
+    monitor = make_monitor(memory_manager, scheduler, calendar, notifier)
+
+    calendar.revoke_token()
+    assert 'error' in monitor.check_events()
+    assert 'google-calendar' not in replit_connector._settings_cache
+    assert 'google-mail' in replit_connector._settings_cache
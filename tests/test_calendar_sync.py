@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from modules.calendar_sync import SYNC_TOKEN_KEY, CalendarSync
+
+@pytest.fixture
+def sync(memory_manager):
+    return CalendarSync(memory_manager)
+
+def sync_once(sync, calendar):
+    calendar.reset_counts()
+    result = sync.sync(calendar)
+    if result['mode'] == 'incremental':
+        assert result['requests'] == calendar.requests['events.list']
+    return result
+
+def test_full_sync_pages_through_every_event(sync, calendar):
+    now = datetime.now(timezone.utc)
+    for i in range(600):
+        start = now + timedelta(minutes=20 * i)
+        calendar.add_event(f'Meeting {i}', start, start + timedelta(minutes=15))
+    # Already over - outside the full sync window
+    calendar.add_event('Old', now - timedelta(days=3), now - timedelta(days=3, minutes=-30))
+
+    result = sync_once(sync, calendar)
+    assert result == {'mode': 'full', 'requests': 3, 'changed': 600, 'deleted': 0}
+    assert sync.count() == 600
+
+    upcoming = sync.upcoming(now, now + timedelta(hours=4))
+    # Starts at now, now+20m, ... now+3h40m
+    assert [event['summary'] for event in upcoming] == [f'Meeting {i}' for i in range(12)]
+
+def test_incremental_sync_only_fetches_changes(sync, calendar, memory_manager):
+    now = datetime.now(timezone.utc)
+    ids = []
+    for i in range(300):
+        start = now + timedelta(hours=1, minutes=i)
+        ids.append(calendar.add_event(f'Event {i}', start, start + timedelta(minutes=30)))
+    sync_once(sync, calendar)
+    first_token = memory_manager.get_memory(SYNC_TOKEN_KEY)
+
+    result = sync_once(sync, calendar)
+    assert result == {'mode': 'incremental', 'requests': 1, 'changed': 0, 'deleted': 0}
+
+    calendar.move_event(ids[0], now + timedelta(days=2), now + timedelta(days=2, hours=1))
+    calendar.cancel_event(ids[1])
+    calendar.add_event('Dentist', now + timedelta(minutes=30), now + timedelta(minutes=60))
+    result = sync_once(sync, calendar)
+    assert result == {'mode': 'incremental', 'requests': 1, 'changed': 2, 'deleted': 1}
+    assert memory_manager.get_memory(SYNC_TOKEN_KEY) != first_token
+    assert sync.count() == 300
+
+    summaries = [event['summary'] for event in sync.upcoming(now, now + timedelta(hours=1, minutes=5))]
+    assert summaries == ['Dentist', 'Event 2', 'Event 3', 'Event 4']
+
+def test_expired_sync_token_falls_back_to_full_resync(sync, calendar):
+    now = datetime.now(timezone.utc)
+    ids = [calendar.add_event(f'Event {i}', now + timedelta(hours=i), now + timedelta(hours=i, minutes=30))
+           for i in range(1, 6)]
+    sync_once(sync, calendar)
+
+    calendar.cancel_event(ids[0])
+    calendar.invalidate_sync_tokens()
+    result = sync_once(sync, calendar)
+    assert result['mode'] == 'full'
+    # The 410 plus one page of full listing
+    assert calendar.requests['events.list'] == 2
+    assert sync.count() == 4
+
+    result = sync_once(sync, calendar)
+    assert result == {'mode': 'incremental', 'requests': 1, 'changed': 0, 'deleted': 0}
+
+def test_all_day_events_stay_upcoming_while_under_way(sync, calendar):
+    today = datetime.now().date()
+    calendar.add_event('Holiday', today, today + timedelta(days=1))
+    sync_once(sync, calendar)
+
+    now = datetime.now(timezone.utc)
+    assert [event['summary'] for event in sync.upcoming(now, now + timedelta(hours=4))] == ['Holiday']
@@ -0,0 +1,95 @@
+import json
+import time
+
+import pytest
+
+from modules import main
+from modules.ai_brain import AIBrain
+
+@pytest.fixture
+def brain(memory_manager, openai_server):
+    return AIBrain(memory_manager)
+
+@pytest.fixture
+def client(brain, monkeypatch):
+    # The scheduler and monitors stay off; /chat/stream only needs the brain
+    monkeypatch.setattr(main, '_monitoring_started', True)
+    monkeypatch.setattr(main, '_ai_brain', brain)
+    return main.app.test_client()
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+def sse_events(body):
+    events = []
+    for block in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields.get('event', 'message'), json.loads(fields['data'])))
+    return events
+
+def test_stream_is_stored_once_complete_with_usage(brain, memory_manager, openai_server):
+    stats = {}
+    tokens = []
+    for token in brain.chat_stream('pizza tonight?', context_stats=stats):
+        tokens.append(token)
+        # Nothing is persisted while the reply is still arriving
+        assert memory_manager.get_recent_conversations() == []
+
+    assert ''.join(tokens) == openai_server.chat_reply
+    assert [(c['user'], c['bot']) for c in memory_manager.get_recent_conversations()] == \
+        [('pizza tonight?', openai_server.chat_reply)]
+    assert stats['completion_tokens'] > 0 and stats['prompt_tokens'] > 0
+
+    usage = brain.get_usage_stats()['chat_stream']
+    assert usage['calls'] == 1
+    assert (usage['prompt_tokens'], usage['completion_tokens']) == (stats['prompt_tokens'], stats['completion_tokens'])
+
+def test_abandoned_stream_closes_upstream_and_stores_nothing(brain, memory_manager, openai_server):
+    openai_server.chat_reply = ' '.join(f'word{i}' for i in range(40))
+    openai_server.stream_delay = 0.02
+
+    stream = brain.chat_stream('tell me a long story')
+    assert [next(stream), next(stream)] == ['word0', ' word1']
+    stream.close()
+
+    assert wait_for(lambda: openai_server.streams == ['aborted'])
+    assert memory_manager.get_recent_conversations() == []
+    assert brain.get_usage_stats()['chat_stream']['calls'] == 1
+
+def test_endpoint_frames_tokens_as_server_sent_events(client, memory_manager, openai_server):
+    response = client.post('/chat/stream', json={'message': 'pizza tonight?'})
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    events = sse_events(response.get_data(as_text=True))
+    tokens = [data['token'] for event, data in events if event == 'message']
+    assert ''.join(tokens) == openai_server.chat_reply
+    assert len(tokens) == len(openai_server.chat_reply.split(' '))
+
+    event, done = events[-1]
+    assert event == 'done'
+    assert done['ttft_ms'] is not None and done['total_ms'] >= done['ttft_ms']
+    assert done['tokens']['completion_tokens'] > 0
+    assert len(memory_manager.get_recent_conversations()) == 1
+
+def test_endpoint_disconnect_closes_the_upstream_stream(client, memory_manager, openai_server):
+    openai_server.chat_reply = ' '.join(f'word{i}' for i in range(40))
+    openai_server.stream_delay = 0.02
+
+    response = client.get('/chat/stream?message=story', buffered=False)
+    chunks = iter(response.response)
+    assert b'word0' in next(chunks)
+    response.close()
+
+    assert wait_for(lambda: openai_server.streams == ['aborted'])
+    assert memory_manager.get_recent_conversations() == []
+
+def test_endpoint_reports_upstream_errors_as_an_event(client, openai_server):
+    openai_server.stop()
+    events = sse_events(client.get('/chat/stream?message=hi').get_data(as_text=True))
+    assert [event for event, _ in events] == ['error']
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from modules.conversation_archive import ConversationArchiver
+from modules.conversation_context import SUMMARY_KEY
+from modules.vector_store import VectorStore
+
+TOPICS = ['sourdough starter', 'marathon training', 'tax return', 'guitar strings', 'tomato seedlings']
+
+@pytest.fixture
+def history(memory_manager):
+    # Ten turns from a year ago and two from today; returns their ids in order
+    for i in range(10):
+        memory_manager.store_conversation(f'old question about {TOPICS[i % 5]} {i}', f'old answer {i}')
+    conn = memory_manager.get_connection()
+    with conn:
+        conn.execute('UPDATE conversations SET timestamp = ?', (datetime.now() - timedelta(days=365),))
+    memory_manager.store_conversation('what about tonight', 'pizza night babe')
+    memory_manager.store_conversation('and tomorrow', 'gym day')
+    return [row[0] for row in conn.execute('SELECT id FROM conversations ORDER BY id')]
+
+def summarized_through(memory_manager, conversation_id):
+    memory_manager.store_memory(SUMMARY_KEY, {'summary': 'earlier chats', 'through_id': conversation_id},
+                                category='conversation')
+
+def test_only_summarized_turns_are_archived(memory_manager, history):
+    archiver = ConversationArchiver(memory_manager, max_age_days=90, chunk_size=4)
+    assert archiver.archive()['archived'] == 0
+
+    summarized_through(memory_manager, history[5])
+    result = archiver.archive()
+    assert result['archived'] == 6 and result['chunks'] == 2
+    remaining = [c['id'] for c in memory_manager.get_conversations_between(0, limit=100)]
+    # Old but not yet folded into the summary, and recent turns, both stay hot
+    assert remaining == history[6:]
+
+def test_archived_turns_round_trip_and_stay_searchable(memory_manager, history):
+    summarized_through(memory_manager, history[9])
+    archiver = ConversationArchiver(memory_manager, max_age_days=90, chunk_size=4)
+    assert archiver.archive()['chunks'] == 3
+
+    conn = memory_manager.get_connection()
+    chunks = conn.execute('SELECT encrypted_chunk, row_count FROM conversation_archive').fetchall()
+    assert sum(count for _, count in chunks) == 10
+    assert all(b'marathon' not in blob for blob, _ in chunks)
+
+    rows = [row for chunk in archiver._chunks() for row in chunk]
+    assert sorted(row[0] for row in rows) == history[:10]
+    assert {row[1] for row in rows} == {f'old question about {TOPICS[i % 5]} {i}' for i in range(10)}
+
+    hits = archiver.search('marathon training')
+    assert [hit['id'] for hit in hits] == [history[6], history[1]]
+    assert all(hit['archived'] for hit in hits)
+    assert archiver.search('marathon', until=datetime.now() - timedelta(days=400)) == []
+
+def test_archived_turns_leave_the_fts_and_vector_indexes(memory_manager, history, tmp_path):
+    vectors = VectorStore(memory_manager, path=str(tmp_path / 'test.vectors'))
+    assert memory_manager.search_conversations('seedlings')
+    assert vectors.search('tomato seedlings')
+
+    summarized_through(memory_manager, history[9])
+    ConversationArchiver(memory_manager, max_age_days=90).archive()
+
+    assert memory_manager.search_conversations('seedlings') == []
+    assert vectors.search('tomato seedlings') == []
+    assert [hit['ref'] for hit in vectors.search('pizza night')] == [str(history[10])]
+
+def test_report_shows_before_and_after(memory_manager, history):
+    summarized_through(memory_manager, history[9])
+    archiver = ConversationArchiver(memory_manager, max_age_days=90, chunk_size=4)
+    result = archiver.archive()
+
+    before, after = result['before'], result['after']
+    assert (before['conversations'], after['conversations']) == (12, 2)
+    assert (before['archived_conversations'], after['archived_conversations']) == (0, 10)
+    assert (before['archive_chunks'], after['archive_chunks']) == (0, 3)
+    assert after['memories'] == before['memories']
+    # The first run switches on incremental auto-vacuum with a full VACUUM
+    assert after['free_pages'] == 0
+    assert after['wal_bytes'] == 0
+    assert memory_manager.get_connection().execute('PRAGMA auto_vacuum').fetchone()[0] == 2
@@ -0,0 +1,62 @@
+import threading
+import time
+
+from modules.conversation_context import SUMMARY_KEY, ConversationContext
+
+class SlowBrain:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+
+    def complete_text(self, purpose, prompt, max_tokens=None, items=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        return f'summary {self.calls}'
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+def test_one_worker_serves_every_turn(memory_manager):
+    brain = SlowBrain()
+    context = ConversationContext(memory_manager, brain, recent_turns=2, summarize_every=1)
+    for i in range(10):
+        memory_manager.store_conversation(f'question {i}', f'answer {i}')
+
+    threads_before = threading.active_count()
+    for _ in range(50):
+        context.maybe_summarize_async()
+    assert threading.active_count() <= threads_before + 1
+
+    assert _wait_for(lambda: memory_manager.get_memory(SUMMARY_KEY) is not None)
+    worker = context._worker
+    # A burst of requests collapses into a couple of passes, not one per turn
+    assert _wait_for(lambda: not context._summary_wanted.is_set())
+    assert brain.calls <= 3
+
+    memory_manager.store_conversation('later question', 'later answer')
+    context.maybe_summarize_async()
+    assert context._worker is worker
+
+def test_worker_survives_a_failed_pass(memory_manager):
+    class FlakyBrain(SlowBrain):
+        def complete_text(self, *args, **kwargs):
+            self.calls += 1
+            if self.calls == 1:
+                raise RuntimeError('model unavailable')
+            return 'recovered summary'
+
+    brain = FlakyBrain()
+    context = ConversationContext(memory_manager, brain, recent_turns=2, summarize_every=1)
+    for i in range(6):
+        memory_manager.store_conversation(f'question {i}', f'answer {i}')
+
+    context.maybe_summarize_async()
+    assert _wait_for(lambda: brain.calls == 1)
+    context.maybe_summarize_async()
+    assert _wait_for(lambda: memory_manager.get_memory(SUMMARY_KEY) is not None)
+    assert memory_manager.get_memory(SUMMARY_KEY)['summary'] == 'recovered summary'
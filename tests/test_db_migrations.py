@@ -0,0 +1,79 @@
+import sqlite3
+
+from modules.db_migrations import MIGRATIONS, get_schema_version, run_migrations
+from modules.memory import MemoryManager
+
+LATEST = MIGRATIONS[-1][0]
+
+def legacy_database(path):
+    # The schema _init_db used to create, with no version recorded
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE memories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT UNIQUE,
+            encrypted_value BLOB,
+            category TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE conversations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_message TEXT,
+            bot_response TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+    return conn
+
+def test_legacy_database_is_upgraded_in_place(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db_path = str(tmp_path / 'legacy.db')
+    # A manager on a scratch file only to get at its cipher for the legacy rows
+    scratch = MemoryManager(str(tmp_path / 'scratch.db'))
+    cipher = scratch.cipher
+    scratch.close()
+
+    conn = legacy_database(db_path)
+    with conn:
+        conn.executemany(
+            'INSERT INTO memories (key, encrypted_value, category) VALUES (?, ?, ?)',
+            [
+                ('email_checked_abc', cipher.encrypt(b'{"subject": "Hi", "urgent": false}'), 'emails'),
+                ('calendar_reminder_evt1', cipher.encrypt(b'true'), 'reminders'),
+                ('favourite_colour', cipher.encrypt(b'"green"'), 'preferences'),
+            ]
+        )
+        conn.execute("INSERT INTO conversations (user_message, bot_response) VALUES ('hello there', 'hey babe')")
+    conn.close()
+
+    manager = MemoryManager(db_path)
+    conn = manager.get_connection()
+    assert get_schema_version(conn) == LATEST
+
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_memories_category', 'idx_memories_updated_at', 'idx_conversations_timestamp'} <= indexes
+
+    # Data survives; dedup markers moved into seen_ids
+    assert manager.get_memory('favourite_colour') == 'green'
+    assert manager.get_memory('email_checked_abc') == {'subject': 'Hi', 'urgent': False}
+    assert manager.get_memory('calendar_reminder_evt1') is None
+    seen = set(conn.execute('SELECT namespace, item_id FROM seen_ids'))
+    assert seen == {('email', 'abc'), ('calendar', 'evt1')}
+    assert [c['user'] for c in manager.search_conversations('hello')] == ['hello there']
+    manager.close()
+
+def test_migrations_are_idempotent(memory_manager):
+    conn = memory_manager.get_connection()
+    assert run_migrations(conn) == []
+    assert get_schema_version(conn) == LATEST
+
+def test_hot_queries_use_the_indexes(memory_manager):
+    conn = memory_manager.get_connection()
+
+    def plan(sql, params):
+        return ' '.join(row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params))
+
+    assert 'idx_memories_category' in plan('SELECT key, encrypted_value FROM memories WHERE category = ?', ('emails',))
+    recent = plan('SELECT id FROM conversations ORDER BY timestamp DESC LIMIT ?', (10,))
+    assert 'idx_conversations_timestamp' in recent and 'TEMP B-TREE' not in recent
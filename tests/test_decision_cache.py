@@ -0,0 +1,95 @@
+import types
+
+import pytest
+
+from modules import decision_cache
+from modules.decision_cache import DEFAULT_DECISION_TTL, DecisionCache
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(decision_cache, 'time', types.SimpleNamespace(time=clock.time))
+    return clock
+
+def key(n):
+    return DecisionCache.make_key('gpt-test', 'email', {'subject': f'email {n}'})
+
+def test_keys_change_with_model_template_and_inputs():
+    base = DecisionCache.make_key('gpt-test', 'email', {'subject': 'hi', 'sender': 'a'})
+    assert DecisionCache.make_key('gpt-test', 'email', {'sender': 'a', 'subject': 'hi'}) == base
+    assert DecisionCache.make_key('gpt-other', 'email', {'subject': 'hi', 'sender': 'a'}) != base
+    assert DecisionCache.make_key('gpt-test', 'email v2', {'subject': 'hi', 'sender': 'a'}) != base
+
+def test_each_decision_type_expires_on_its_own_ttl(memory_manager, clock):
+    cache = DecisionCache(memory_manager, ttls={'camera': 60})
+    cache.put('email', 'e', {'urgent': True})
+    cache.put('camera', 'c', {'notify': False})
+    cache.put('unknown', 'u', {'ok': True})
+
+    clock.now += 61
+    assert cache.get('c') is None
+    assert cache.get('e') == {'urgent': True}
+    assert cache.get('u') == {'ok': True}
+
+    clock.now += DEFAULT_DECISION_TTL
+    assert cache.get('u') is None
+    assert cache.get('e') == {'urgent': True}
+
+    clock.now += decision_cache.DECISION_TTLS['email']
+    assert cache.get('e') is None
+
+def test_least_recently_used_entries_go_past_max_entries(memory_manager, clock):
+    cache = DecisionCache(memory_manager, max_entries=3, evict_every=1000)
+    for n in range(3):
+        cache.put('email', key(n), {'n': n})
+        clock.now += 1
+    # Reading 0 makes 1 the least recently used
+    assert cache.get(key(0)) == {'n': 0}
+    clock.now += 1
+
+    cache.put('email', key(3), {'n': 3})
+    cache.put('email', key(4), {'n': 4})
+    assert cache.stats()['entries'] == 5
+    cache.evict()
+    assert cache.stats()['entries'] == 3
+    assert [n for n in range(5) if cache.get(key(n)) is not None] == [0, 3, 4]
+
+def test_eviction_runs_every_evict_every_puts(memory_manager, clock):
+    cache = DecisionCache(memory_manager, max_entries=2, evict_every=3)
+    for n in range(5):
+        cache.put('email', key(n), {'n': n})
+        clock.now += 1
+        # Evicts after the 3rd put only; the 4th and 5th wait for the 6th
+        assert cache.stats()['entries'] == [1, 2, 2, 3, 4][n]
+
+def test_hits_count_the_tokens_they_saved(memory_manager, clock):
+    cache = DecisionCache(memory_manager)
+    cache.put('email', 'a', {'urgent': False}, tokens=120)
+    cache.put('calendar', 'b', {'remind': True}, tokens=80)
+
+    assert cache.get('a') and cache.get('a') and cache.get('b')
+    assert cache.get('missing') is None
+    clock.now += decision_cache.DECISION_TTLS['calendar'] + 1
+    assert cache.get('b') is None
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (3, 2)
+    assert stats['saved_tokens'] == 2 * 120 + 80
+    assert stats['hit_rate'] == 0.6
+
+def test_undecryptable_entries_are_misses(memory_manager, clock):
+    cache = DecisionCache(memory_manager)
+    cache.put('email', 'a', {'urgent': True}, tokens=50)
+    conn = memory_manager.get_connection()
+    with conn:
+        conn.execute("UPDATE decision_cache SET encrypted_value = ? WHERE cache_key = 'a'", (b'garbage',))
+
+    assert cache.get('a') is None
+    assert (cache.stats()['misses'], cache.stats()['saved_tokens']) == (1, 0)
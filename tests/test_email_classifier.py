@@ -0,0 +1,66 @@
+from fakes.notifier import RecordingNotifier
+from modules.ai_brain import AIBrain
+from modules.email_classifier import EmailClassifier
+from modules.gmail_monitor import GmailMonitor
+
+def make_monitor(memory_manager, gmail, classifier):
+    monitor = GmailMonitor(memory_manager, AIBrain(memory_manager), RecordingNotifier(), email_classifier=classifier)
+    monitor._get_gmail_service = lambda: gmail
+    return monitor
+
+def test_classifier_learns_from_fresh_answers_only(memory_manager, gmail, openai_server):
+    classifier = EmailClassifier(memory_manager, min_examples=1000)
+    monitor = make_monitor(memory_manager, gmail, classifier)
+
+    first = gmail.deliver('news@shop.example', 'Weekly deals')
+    monitor.check_emails()
+    assert sum(classifier.doc_counts.values()) == 1
+
+    # Same content again: the decision cache answers, and it is not counted twice
+    second = gmail.deliver('news@shop.example', 'Weekly deals')
+    openai_server.requests.clear()
+    monitor.check_emails()
+    assert openai_server.requests == {}
+    assert sum(classifier.doc_counts.values()) == 1
+
+    assert memory_manager.get_memory(f'email_checked_{first}')['source'] == 'llm'
+    assert memory_manager.get_memory(f'email_checked_{second}')['source'] == 'cache'
+
+    # A fresh classifier bootstrapping from history skips the cached record too
+    memory_manager.store_memory('email_classifier_model', None, category='models')
+    assert sum(EmailClassifier(memory_manager).doc_counts.values()) == 1
+
+def test_confident_newsletters_skip_the_llm(memory_manager, gmail, openai_server):
+    classifier = EmailClassifier(memory_manager, threshold=0.95, min_examples=30)
+    for i in range(40):
+        classifier.learn('deals@shop.example', f'Weekly deals issue {i}', False)
+    for i in range(10):
+        classifier.learn('boss@work.example', f'URGENT contract deadline {i}', True)
+    monitor = make_monitor(memory_manager, gmail, classifier)
+
+    gmail.deliver('deals@shop.example', 'Weekly deals issue 99')
+    gmail.deliver('boss@work.example', 'URGENT contract deadline moved')
+    result = monitor.check_emails()
+
+    assert result['classifier']['llm_calls_avoided'] == 1
+    assert result['classifier']['avoided_fraction'] == 0.5
+    assert openai_server.requests == {'email': 1}
+    assert result['urgent_count'] == 1
+
+def test_unparseable_answers_are_not_learned(memory_manager, gmail, openai_server):
+    classifier = EmailClassifier(memory_manager, min_examples=1000)
+    monitor = make_monitor(memory_manager, gmail, classifier)
+
+    openai_server.email_faults = ['garbage']
+    message_id = gmail.deliver('boss@work.example', 'Contract review')
+    result = monitor.check_emails()
+
+    assert openai_server.requests == {'email': 1}
+    assert 'urgent_count' not in result and 'error' not in result
+    assert sum(classifier.doc_counts.values()) == 0
+    record = memory_manager.get_memory(f'email_checked_{message_id}')
+    assert record['source'] == 'fallback'
+
+    # Nor picked up again when a fresh classifier bootstraps from history
+    memory_manager.store_memory('email_classifier_model', None, category='models')
+    assert sum(EmailClassifier(memory_manager).doc_counts.values()) == 0
@@ -0,0 +1,124 @@
+import time
+
+import pytest
+
+from modules import replit_connector
+from modules.gmail_monitor import HISTORY_ID_KEY, GmailMonitor
+
+class FakeBrain:
+    def __init__(self):
+        self.batches = []
+
+    def decide_email_urgency_batch(self, emails):
+        self.batches.append(len(emails))
+        return [
+            {'urgent': 'URGENT' in email['subject'], 'reason': 'test', 'message': f"Heads up: {email['subject']}"}
+            for email in emails
+        ]
+
+@pytest.fixture
+def monitor(memory_manager, gmail, notifier):
+    monitor = GmailMonitor(memory_manager, FakeBrain(), notifier)
+    monitor._get_gmail_service = lambda: gmail
+    return monitor
+
+def poll(monitor, gmail):
+    gmail.reset_counts()
+    result = monitor.check_emails()
+    assert 'error' not in result, result
+    return result, dict(gmail.requests)
+
+def test_full_then_incremental_then_expired_history(monitor, gmail, memory_manager):
+    for i in range(30):
+        gmail.deliver(f'sender{i}@example.com', f'Newsletter {i}')
+
+    # First run: a full listing, all 30 metadata gets in one batch
+    result, requests = poll(monitor, gmail)
+    assert result['sync'] == 'full'
+    assert result['new_count'] == 30
+    assert requests == {'getProfile': 1, 'messages.list': 1, 'batch': 1, 'messages.get': 30}
+    assert memory_manager.get_memory(HISTORY_ID_KEY) == str(gmail.history_id)
+
+    # Nothing new: a single history call and no gets
+    result, requests = poll(monitor, gmail)
+    assert result['sync'] == 'incremental'
+    assert result['new_count'] == 0
+    assert requests == {'history.list': 1}
+
+    # Only the deltas are fetched
+    gmail.deliver('boss@example.com', 'URGENT: contract due')
+    gmail.deliver('news@example.com', 'Weekly digest')
+    result, requests = poll(monitor, gmail)
+    assert result['sync'] == 'incremental'
+    assert result['new_count'] == 2
+    assert result['urgent_count'] == 1
+    assert requests == {'history.list': 1, 'batch': 1, 'messages.get': 2}
+    assert monitor.notification_manager.sent == ['📧 Heads up: URGENT: contract due']
+
+    # History expired: 404, then a full resync that only fetches the unseen mail
+    gmail.expire_history()
+    gmail.deliver('friend@example.com', 'Dinner?')
+    result, requests = poll(monitor, gmail)
+    assert result['sync'] == 'full'
+    assert result['new_count'] == 1
+    assert requests == {'history.list': 1, 'getProfile': 1, 'messages.list': 1, 'batch': 1, 'messages.get': 1}
+
+    # And incremental sync picks up again from the fresh historyId
+    result, requests = poll(monitor, gmail)
+    assert result['sync'] == 'incremental'
+    assert requests == {'history.list': 1}
+
+def test_more_than_one_page_of_unread_mail(memory_manager, gmail, notifier):
+    gmail.page_size = 20
+    for i in range(45):
+        gmail.deliver(f'sender{i}@example.com', f'Update {i}')
+
+    monitor = GmailMonitor(memory_manager, FakeBrain(), notifier, max_full_sync=100)
+    monitor._get_gmail_service = lambda: gmail
+    result, requests = poll(monitor, gmail)
+    # The old poll stopped after five messages; now every unread one is seen
+    assert result['new_count'] == 45
+    assert requests['messages.list'] == 3
+    assert requests['batch'] == 1
+
+def test_failed_get_is_retried_and_deleted_mail_is_dropped(monitor, gmail):
+    poll(monitor, gmail)
+    flaky = gmail.deliver('bank@example.com', 'Statement ready')
+    gone = gmail.deliver('spam@example.com', 'You won')
+    gmail.fail_next_get(flaky)
+    gmail.delete(gone)
+
+    result, requests = poll(monitor, gmail)
+    assert result['new_count'] == 2
+    assert result['triaged'] == 0
+    assert requests['messages.get'] == 2
+
+    # The 500 is retried on the next poll; the 404 is not
+    result, requests = poll(monitor, gmail)
+    assert result['triaged'] == 1
+    assert requests == {'history.list': 1, 'batch': 1, 'messages.get': 1}
+
+    result, requests = poll(monitor, gmail)
+    assert result['new_count'] == 0
+    assert requests == {'history.list': 1}
+
+def test_metadata_fetches_are_grouped_into_batches(monitor, gmail):
+    message_ids = [gmail.deliver(f'sender{i}@example.com', f'Subject {i}') for i in range(120)]
+
+    metadata, failed = monitor._fetch_metadata(gmail, message_ids)
+    assert set(metadata) == set(message_ids) and not failed
+    # METADATA_BATCH_SIZE of 50: three round trips rather than 120
+    assert gmail.requests == {'batch': 3, 'messages.get': 120}
+
+def test_rejected_token_drops_the_cached_connector_settings(monitor, gmail, monkeypatch):
+    # Settings without an expires_at stay cached for DEFAULT_SETTINGS_TTL
+    for name in ('google-mail', 'google-calendar'):
+        monkeypatch.setitem(replit_connector._settings_cache, name, ({'settings': {'access_token': 'old'}}, time.time() + 900))
+
+    gmail.revoke_token()
+    assert 'error' in monitor.check_emails()
+    assert 'google-mail' not in replit_connector._settings_cache
+    assert 'google-calendar' in replit_connector._settings_cache
+
+    gmail.revoke_token(False)
+    assert 'error' not in monitor.check_emails()
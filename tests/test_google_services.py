@@ -0,0 +1,26 @@
+import threading
+
+from modules.google_services import GoogleServiceFactory
+
+def test_second_call_reuses_the_client_and_swaps_the_token():
+    factory = GoogleServiceFactory()
+    first = factory.get_service('gmail', 'v1', 'token-1')
+    http = first._http
+    credentials = http.credentials
+
+    second = factory.get_service('gmail', 'v1', 'token-2')
+    assert second is first
+    # Same transport and credentials object, only the token changed
+    assert second._http is http and http.credentials is credentials
+    assert credentials.token == 'token-2'
+
+    assert factory.get_service('calendar', 'v3', 'token-2') is not first
+
+def test_each_thread_gets_its_own_client():
+    factory = GoogleServiceFactory()
+    main = factory.get_service('gmail', 'v1', 'token')
+    other = []
+    worker = threading.Thread(target=lambda: other.append(factory.get_service('gmail', 'v1', 'token')))
+    worker.start()
+    worker.join()
+    assert other[0] is not main and other[0]._http is not main._http
@@ -0,0 +1,21 @@
+from modules import memory
+
+def test_lookup_spans_parameter_batches(memory_manager, monkeypatch):
+    monkeypatch.setattr(memory, 'MAX_BATCH_PARAMS', 3)
+    for i in range(8):
+        memory_manager.store_memory(f'email_checked_{i}', {'n': i}, category='emails')
+    memory_manager.cache.invalidate()
+
+    keys = [f'email_checked_{i}' for i in range(10)]
+    found = memory_manager.get_memories_many(keys)
+    assert found == {f'email_checked_{i}': {'n': i} for i in range(8)}
+
+def test_duplicate_and_missing_keys(memory_manager, monkeypatch):
+    monkeypatch.setattr(memory, 'MAX_BATCH_PARAMS', 2)
+    memory_manager.store_memory('a', 1)
+    memory_manager.store_memory('b', 2)
+
+    # Duplicates collapse before batching, so ['a', 'a'] never fills a batch on its own
+    assert memory_manager.get_memories_many(['a', 'a', 'missing', 'b', 'a']) == {'a': 1, 'b': 2}
+    assert memory_manager.get_memories_many(['missing']) == {}
+    assert memory_manager.get_memories_many([]) == {}
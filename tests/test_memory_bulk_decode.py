@@ -0,0 +1,61 @@
+from cryptography.fernet import Fernet
+
+from modules import memory
+from modules.memory import MemoryManager
+
+def insert_raw(manager, rows):
+    conn = manager.get_connection()
+    with conn:
+        conn.executemany('INSERT INTO memories (key, encrypted_value, category) VALUES (?, ?, ?)', rows)
+
+def test_thread_pool_decodes_in_row_order(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(memory, 'PARALLEL_DECODE_MIN_ROWS', 5)
+    monkeypatch.setattr(memory, 'DECODE_CHUNK_ROWS', 3)
+    manager = MemoryManager(str(tmp_path / 'bulk.db'), decode_workers=3)
+    for i in range(20):
+        manager.store_memory(f'email_checked_{i}', {'n': i}, category='emails')
+    manager.cache.invalidate()
+
+    values = manager.get_memories_by_category('emails')
+    assert list(values) == [f'email_checked_{i}' for i in range(20)]
+    assert [v['n'] for v in values.values()] == list(range(20))
+    assert set(manager._decode_pools) == {'thread'}
+
+    # Decoded rows landed in the cache: a second read decrypts nothing
+    misses = manager.cache.stats()['misses']
+    manager.get_memories_by_category('emails')
+    assert manager.cache.stats()['misses'] == misses
+    manager.close()
+
+def test_undecryptable_rows_are_skipped(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(memory, 'PARALLEL_DECODE_MIN_ROWS', 2)
+    manager = MemoryManager(str(tmp_path / 'bulk.db'), decode_workers=2)
+    manager.store_memory('good_1', 'one', category='emails')
+    insert_raw(manager, [
+        ('foreign_key', Fernet(Fernet.generate_key()).encrypt(b'"other"'), 'emails'),
+        ('not_json', manager.cipher.encrypt(b'{oops'), 'emails'),
+        ('garbage', b'not a token', 'emails'),
+    ])
+    manager.store_memory('good_2', 'two', category='emails')
+
+    assert manager.get_memories_by_category('emails') == {'good_1': 'one', 'good_2': 'two'}
+    assert 'Skipped 3 memories' in capsys.readouterr().out
+    assert [m['key'] for m in manager.get_all_memories()] == ['good_1', 'good_2']
+    manager.close()
+
+def test_broken_pool_falls_back_to_inline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(memory, 'PARALLEL_DECODE_MIN_ROWS', 2)
+    manager = MemoryManager(str(tmp_path / 'bulk.db'), decode_workers=2)
+    for i in range(5):
+        manager.store_memory(f'k{i}', i, category='emails')
+    manager.cache.invalidate()
+
+    def no_pool(kind):
+        raise RuntimeError('cannot start new thread')
+
+    monkeypatch.setattr(manager, '_decode_pool', no_pool)
+    assert manager.get_memories_by_category('emails') == {f'k{i}': i for i in range(5)}
+    manager.close()
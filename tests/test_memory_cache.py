@@ -0,0 +1,37 @@
+from modules.memory import MemoryManager
+
+def test_cached_reads_hand_out_private_copies(memory_manager):
+    memory_manager.store_memory('k', {'a': 1, 'items': [1]})
+
+    first = memory_manager.get_memory('k')
+    first['a'] = 2
+    first['items'].append(2)
+    assert memory_manager.get_memory('k') == {'a': 1, 'items': [1]}
+
+    many = memory_manager.get_memories_many(['k'])
+    many['k']['a'] = 3
+    by_category = memory_manager.get_memories_by_category('general')
+    by_category['k']['a'] = 4
+    assert memory_manager.get_memory('k') == {'a': 1, 'items': [1]}
+    assert memory_manager.cache.stats()['hits'] >= 3
+
+    # What a fresh process would read
+    fresh = MemoryManager(memory_manager.db_path)
+    assert fresh.get_memory('k') == {'a': 1, 'items': [1]}
+    fresh.close()
+
+def test_value_passed_to_store_is_not_aliased(memory_manager):
+    value = {'feature_counts': {'urgent': 1}}
+    memory_manager.store_memory('model', value, category='models')
+    value['feature_counts']['urgent'] = 99
+    assert memory_manager.get_memory('model') == {'feature_counts': {'urgent': 1}}
+
+def test_rewritten_rows_are_not_served_stale(memory_manager):
+    memory_manager.store_memory('k', 'old')
+    assert memory_manager.get_memory('k') == 'old'
+
+    # Another worker rewrites the row behind this manager's cache
+    other = MemoryManager(memory_manager.db_path)
+    other.store_memory('k', 'new')
+    other.close()
+    assert memory_manager.get_memory('k') == 'new'
@@ -0,0 +1,63 @@
+import gc
+import os
+import sqlite3
+import threading
+
+import pytest
+
+def _open_fds():
+    return len(os.listdir('/proc/self/fd'))
+
+def test_connection_is_reused_within_a_thread(memory_manager):
+    assert memory_manager.get_connection() is memory_manager.get_connection()
+
+def test_each_thread_gets_its_own_connection(memory_manager):
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(memory_manager.get_connection()))
+    thread.start()
+    thread.join()
+    assert seen[0] is not memory_manager.get_connection()
+
+def test_connections_close_when_their_thread_exits(memory_manager):
+    memory_manager.get_memory_count()
+    gc.collect()
+    baseline_holders = len(memory_manager._holders)
+    baseline_fds = _open_fds() if os.path.isdir('/proc/self/fd') else None
+
+    for _ in range(200):
+        thread = threading.Thread(target=memory_manager.get_memory_count)
+        thread.start()
+        thread.join()
+    gc.collect()
+
+    assert len(memory_manager._holders) == baseline_holders
+    if baseline_fds is not None:
+        assert _open_fds() <= baseline_fds + 2
+
+def test_close_closes_live_connections(memory_manager):
+    conn = memory_manager.get_connection()
+    memory_manager.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute('SELECT 1')
+    # A later call transparently reconnects
+    assert memory_manager.get_memory_count() == 0
+
+def test_concurrent_writers_do_not_hit_locked_errors(memory_manager):
+    errors = []
+
+    def writer(worker):
+        try:
+            for i in range(50):
+                memory_manager.store_memory(f'w{worker}_{i}', {'i': i})
+                memory_manager.get_memory(f'w{worker}_{i}')
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert memory_manager.get_memory_count() == 400
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from modules import main
+
+@pytest.fixture
+def memories(memory_manager):
+    for i in range(7):
+        memory_manager.store_memory(f'email_checked_{i}', {'n': i}, category='emails')
+    memory_manager.store_memory('user_name', 'Sam', category='profile')
+    memory_manager.store_memory('email_signature', 'xo', category='profile')
+    conn = memory_manager.get_connection()
+    # Written by another key: must be skipped without ending the page early
+    with conn:
+        conn.execute('INSERT INTO memories (key, encrypted_value, category) VALUES (?, ?, ?)',
+                     ('email_checked_stale', b'not a token', 'emails'))
+    memory_manager.store_memory('email_checked_7', {'n': 7}, category='emails')
+    return memory_manager
+
+@pytest.fixture
+def client(memories, monkeypatch):
+    monkeypatch.setattr(main, '_monitoring_started', True)
+    monkeypatch.setattr(main, '_memory_manager', memories)
+    return main.app.test_client()
+
+def read_page(client, **params):
+    response = client.get('/memory', query_string=params)
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    return lines[:-1], lines[-1]
+
+def test_keyset_pages_cover_every_readable_row_once(memories):
+    everything = list(memories.iter_memories(batch_size=2))
+    assert [m['key'] for m in everything] == [f'email_checked_{i}' for i in range(7)] + \
+        ['user_name', 'email_signature', 'email_checked_7']
+    assert [m['id'] for m in everything] == sorted(m['id'] for m in everything)
+
+    pages = []
+    cursor = 0
+    while True:
+        page = list(memories.iter_memories(after_id=cursor, limit=3, batch_size=2))
+        if not page:
+            break
+        pages.append([m['key'] for m in page])
+        cursor = page[-1]['id']
+    assert [key for page in pages for key in page] == [m['key'] for m in everything]
+    assert [len(page) for page in pages] == [3, 3, 3, 1]
+
+def test_category_and_prefix_filters(memories):
+    assert [m['key'] for m in memories.iter_memories(category='profile')] == ['user_name', 'email_signature']
+    assert [m['key'] for m in memories.iter_memories(prefix='email_')] == \
+        [f'email_checked_{i}' for i in range(7)] + ['email_signature', 'email_checked_7']
+    assert [m['key'] for m in memories.iter_memories(category='profile', prefix='email_')] == ['email_signature']
+    assert list(memories.iter_memories(prefix='zzz')) == []
+
+def test_endpoint_walks_the_table_with_next_cursor(client):
+    seen = []
+    cursor = 0
+    for _ in range(10):
+        rows, trailer = read_page(client, cursor=cursor, limit=4, category='emails')
+        assert trailer['count'] == len(rows)
+        seen.extend(row['value']['n'] for row in rows)
+        cursor = trailer['next_cursor']
+        if cursor is None:
+            break
+        assert cursor == rows[-1]['id']
+    assert seen == list(range(8))
+
+def test_endpoint_last_full_page_is_followed_by_an_empty_one(client):
+    rows, trailer = read_page(client, prefix='email_checked_', limit=8)
+    assert len(rows) == 8 and trailer['next_cursor'] == rows[-1]['id']
+
+    rows, trailer = read_page(client, prefix='email_checked_', limit=8, cursor=trailer['next_cursor'])
+    assert rows == [] and trailer == {'next_cursor': None, 'count': 0}
+
+def test_endpoint_rejects_non_integer_paging(client):
+    response = client.get('/memory?limit=lots')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
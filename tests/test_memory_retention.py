@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+def _age(memory_manager, key, days):
+    conn = memory_manager.get_connection()
+    with conn:
+        conn.execute(
+            'UPDATE memories SET updated_at = ? WHERE key = ?',
+            (datetime.now() - timedelta(days=days), key)
+        )
+
+def test_prune_drops_only_old_rows_of_the_category(memory_manager):
+    memory_manager.store_memory('email_checked_old', {'subject': 'quarterly invoice', 'urgent': False}, category='emails')
+    memory_manager.store_memory('email_checked_new', {'subject': 'lunch today', 'urgent': False}, category='emails')
+    memory_manager.store_memory('favourite_colour', 'green', category='preferences')
+    _age(memory_manager, 'email_checked_old', 120)
+    _age(memory_manager, 'favourite_colour', 120)
+    # Warm the cache so pruning has to invalidate it
+    assert memory_manager.get_memory('email_checked_old') is not None
+    assert memory_manager.search_memories('quarterly invoice')
+
+    removed = []
+    memory_manager.add_write_listener(lambda kind, ref, text: removed.append(ref) if text is None else None)
+
+    assert memory_manager.prune_memories('emails', datetime.now() - timedelta(days=90)) == 1
+    assert memory_manager.get_memory('email_checked_old') is None
+    assert memory_manager.get_memory('email_checked_new') is not None
+    assert memory_manager.get_memory('favourite_colour') == 'green'
+    assert removed == ['email_checked_old']
+    assert not memory_manager.search_memories('quarterly invoice')
+
+def test_prune_with_nothing_expired(memory_manager):
+    memory_manager.store_memory('email_checked_1', {'subject': 'hi'}, category='emails')
+    assert memory_manager.prune_memories('emails', datetime.now() - timedelta(days=90)) == 0
+    assert memory_manager.get_memory_count() == 1
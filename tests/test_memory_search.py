@@ -0,0 +1,41 @@
+def test_conversation_search_ranks_relevant_turns(memory_manager):
+    memory_manager.store_conversation('what should I cook tonight', 'maybe a mushroom risotto babe')
+    memory_manager.store_conversation('remind me about the dentist', 'sure, Thursday at 3pm')
+    memory_manager.store_conversation('any good risotto tips', 'toast the rice first and keep stirring risotto')
+
+    hits = memory_manager.search_conversations('risotto recipe', limit=5)
+    assert [hit['user'] for hit in hits] == ['any good risotto tips', 'what should I cook tonight']
+    assert 'risotto' in hits[0]['snippet']
+
+    # Porter stemming: "reminded" finds "remind"
+    assert [hit['user'] for hit in memory_manager.search_conversations('reminded')] == ['remind me about the dentist']
+
+def test_conversation_search_excludes_ids_and_tracks_deletes(memory_manager):
+    for i in range(3):
+        memory_manager.store_conversation(f'gym plan {i}', 'leg day')
+    recent = memory_manager.get_recent_conversations(3)
+    newest_id = recent[0]['id']
+
+    hits = memory_manager.search_conversations('gym', limit=2, exclude_ids=[newest_id])
+    assert len(hits) == 2 and newest_id not in {hit['id'] for hit in hits}
+
+    conn = memory_manager.get_connection()
+    with conn:
+        conn.execute('DELETE FROM conversations WHERE id = ?', (newest_id,))
+    assert newest_id not in {hit['id'] for hit in memory_manager.search_conversations('gym')}
+
+def test_memory_search_uses_blind_terms(memory_manager):
+    memory_manager.store_memory('favourite_food', 'spicy ramen from the corner shop', category='preferences')
+    memory_manager.store_memory('partner_birthday', 'March 3rd', category='dates')
+    memory_manager.store_memory('calendar_sync_token', 'ramen-looking-token', category='sync')
+
+    assert [hit['key'] for hit in memory_manager.search_memories('ramen')] == ['favourite_food']
+
+    # The index holds keyed hashes, never the plaintext words
+    terms = ' '.join(row[0] for row in memory_manager.get_connection().execute('SELECT terms FROM memories_fts'))
+    assert 'ramen' not in terms and 'spicy' not in terms
+
+    # Rewriting a memory re-indexes it
+    memory_manager.store_memory('favourite_food', 'sourdough pizza', category='preferences')
+    assert memory_manager.search_memories('ramen') == []
+    assert [hit['key'] for hit in memory_manager.search_memories('pizza')] == ['favourite_food']
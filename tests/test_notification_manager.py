@@ -0,0 +1,57 @@
+import pytest
+
+from fakes.twilio import TEST_CREDENTIALS, TwilioStub
+from modules import notification_manager, twilio_transport
+from modules.notification_manager import NotificationManager
+from modules.replit_connector import ReplitConnector
+
+@pytest.fixture
+def twilio(monkeypatch):
+    stub = TwilioStub(latency=0.05)
+    monkeypatch.setattr(twilio_transport, 'Client', stub.client)
+    monkeypatch.setattr(ReplitConnector, 'get_twilio_credentials', staticmethod(lambda: dict(TEST_CREDENTIALS)))
+    monkeypatch.setattr(notification_manager, 'get_twilio_transport', twilio_transport.TwilioTransport)
+    monkeypatch.setenv('USER_PHONE_NUMBER', '+15551234567')
+    monkeypatch.setenv('NOTIFY_COALESCE_SECONDS', '0')
+    monkeypatch.setenv('NOTIFY_SMS_BURST', '100')
+    return stub
+
+@pytest.fixture
+def manager(memory_manager, twilio):
+    manager = NotificationManager(memory_manager)
+    # Drive the queue by hand instead of through its worker thread
+    manager.queue.stop()
+    yield manager
+    manager.transport._executor and manager.transport._executor.shutdown()
+
+def test_oversized_digest_goes_out_as_concurrent_sms(manager, twilio):
+    for i in range(30):
+        manager.send_notification(f'Update {i:02d}: ' + 'x' * 90, force_sms=True)
+    # 20 rows per claim: 15 + 5 on the first pass, 10 on the second
+    manager.queue.drain_once()
+    manager.queue.drain_once()
+
+    bodies = [sms['body'] for sms in twilio.sent]
+    assert len(bodies) == 3
+    assert all(len(body) <= 1600 for body in bodies)
+    assert sum(body.count('• Update') for body in bodies) == 30
+    assert sorted(body.split(' updates')[0] for body in bodies) == ['💌 10', '💌 15', '💌 5']
+    assert twilio.max_in_flight > 1
+    # One client for the whole run, reused across every send
+    assert twilio.clients_built == 1
+    assert manager.get_queue_stats()['queued']['sent'] == 30
+
+def test_failed_send_is_queued_for_retry(manager, twilio):
+    twilio.fail_all = True
+    manager.send_notification('Your 3pm moved to 4pm', force_sms=True)
+    manager.queue.drain_once()
+
+    stats = manager.get_queue_stats()
+    assert stats['queued']['pending'] == 1
+    assert stats['retries'] == 1
+    assert twilio.sent == []
+
+def test_without_force_sms_nothing_is_queued(manager, twilio):
+    result = manager.send_notification('FYI only')
+    assert result['method'] == 'console'
+    assert manager.get_queue_stats()['enqueued'] == 0
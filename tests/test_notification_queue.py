@@ -0,0 +1,142 @@
+import time
+
+import pytest
+
+from modules.notification_queue import NotificationQueue
+
+class Recorder:
+    def __init__(self, fail_when=lambda body: False):
+        self.fail_when = fail_when
+        self.bodies = []
+        self.batches = []
+
+    def deliver(self, channel, body):
+        self.bodies.append(body)
+        return {'success': False, 'error': 'boom'} if self.fail_when(body) else {'success': True}
+
+    def deliver_many(self, channel, bodies):
+        self.batches.append(len(bodies))
+        return [self.deliver(channel, body) for body in bodies]
+
+def make_queue(memory_manager, recorder, **kwargs):
+    kwargs.setdefault('rate_limits', {'sms': (100, 3600)})
+    kwargs.setdefault('coalesce_windows', {'sms': 0})
+    return NotificationQueue(memory_manager, recorder.deliver, deliver_many=recorder.deliver_many, **kwargs)
+
+def statuses(memory_manager):
+    conn = memory_manager.get_connection()
+    return dict(conn.execute('SELECT status, COUNT(*) FROM notification_queue GROUP BY status').fetchall())
+
+def test_digest_is_split_to_fit_the_body_limit(memory_manager):
+    recorder = Recorder()
+    queue = make_queue(memory_manager, recorder, max_body_chars=200)
+    for i in range(10):
+        queue.enqueue('sms', f'message number {i} ' + '-' * 30)
+
+    queue.drain_once()
+    assert recorder.batches == [len(recorder.bodies)]
+    assert len(recorder.bodies) > 1
+    assert all(len(body) <= 200 for body in recorder.bodies)
+    # Queue order survives the split
+    delivered = [line for body in recorder.bodies for line in body.splitlines() if 'message number' in line]
+    assert [line.split('number ')[1].split()[0] for line in delivered] == [str(i) for i in range(10)]
+    assert statuses(memory_manager) == {'sent': 10}
+
+def test_only_the_failed_body_is_retried(memory_manager):
+    recorder = Recorder(fail_when=lambda body: 'number 9' in body)
+    queue = make_queue(memory_manager, recorder, max_body_chars=200)
+    for i in range(10):
+        queue.enqueue('sms', f'message number {i} ' + '-' * 30)
+
+    queue.drain_once()
+    counts = statuses(memory_manager)
+    assert counts['pending'] >= 1
+    assert counts['pending'] + counts['sent'] == 10
+    assert queue.get_stats()['retries'] == 1
+
+def test_single_body_uses_plain_deliver(memory_manager):
+    recorder = Recorder()
+    queue = make_queue(memory_manager, recorder)
+    queue.enqueue('sms', 'Dinner at 7')
+    queue.enqueue('sms', 'Bring wine')
+
+    queue.drain_once()
+    assert recorder.batches == []
+    assert recorder.bodies == ["💌 2 updates from Grace:\n• Dinner at 7\n• Bring wine"]
+
+@pytest.mark.parametrize('max_attempts', [1, 2])
+def test_rows_fail_after_max_attempts(memory_manager, max_attempts):
+    recorder = Recorder(fail_when=lambda body: True)
+    queue = make_queue(memory_manager, recorder, max_attempts=max_attempts, base_backoff=0)
+    queue.enqueue('sms', 'Never arrives')
+
+    for _ in range(max_attempts):
+        queue.drain_once()
+    assert statuses(memory_manager) == {'failed': 1}
+    assert len(recorder.bodies) == max_attempts
+
+def test_coalescing_window_holds_the_first_message(memory_manager):
+    recorder = Recorder()
+    queue = make_queue(memory_manager, recorder, coalesce_windows={'sms': 30})
+    queue.enqueue('sms', 'First')
+    queue.enqueue('sms', 'Second')
+
+    wait = queue.drain_once()
+    assert recorder.bodies == []
+    assert 0 < wait <= queue.poll_interval
+
+    conn = memory_manager.get_connection()
+    with conn:
+        conn.execute('UPDATE notification_queue SET created_at = created_at - 31')
+    queue.drain_once()
+    assert recorder.bodies == ["💌 2 updates from Grace:\n• First\n• Second"]
+    assert queue.get_stats()['digests'] == 1
+
+def test_rate_limit_defers_the_next_send(memory_manager):
+    recorder = Recorder()
+    queue = make_queue(memory_manager, recorder, rate_limits={'sms': (1, 1)})
+    queue.enqueue('sms', 'One')
+    queue.drain_once()
+    queue.enqueue('sms', 'Two')
+    queue.drain_once()
+
+    assert recorder.bodies == ['One']
+    assert statuses(memory_manager) == {'sent': 1, 'pending': 1}
+
+def test_full_claim_asks_for_an_immediate_next_pass(memory_manager):
+    recorder = Recorder()
+    queue = make_queue(memory_manager, recorder)
+    for i in range(45):
+        queue.enqueue('sms', f'Update {i}')
+
+    waits = [queue.drain_once() for _ in range(3)]
+    assert waits[:2] == [0.05, 0.05]
+    assert statuses(memory_manager) == {'sent': 45}
+
+def test_pending_rows_survive_a_restart_and_expired_leases_return(memory_manager):
+    recorder = Recorder()
+    make_queue(memory_manager, recorder).enqueue('sms', 'Survives restart')
+    conn = memory_manager.get_connection()
+    with conn:
+        # A sender that crashed mid-send, its lease long gone
+        conn.execute('''
+            INSERT INTO notification_queue (channel, encrypted_message, created_at, available_at, status, lease_expires_at)
+            VALUES ('sms', ?, 0, 0, 'sending', 1)
+        ''', (memory_manager.cipher.encrypt(b'Crashed mid-send'),))
+
+    make_queue(memory_manager, recorder).drain_once()
+    assert recorder.bodies == ["💌 2 updates from Grace:\n• Survives restart\n• Crashed mid-send"]
+    assert statuses(memory_manager) == {'sent': 2}
+
+def test_worker_thread_delivers_in_the_background(memory_manager):
+    recorder = Recorder()
+    queue = make_queue(memory_manager, recorder)
+    queue.start()
+    try:
+        queue.enqueue('sms', 'Background')
+        deadline = time.monotonic() + 5
+        while not recorder.bodies and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        queue.stop()
+    assert recorder.bodies == ['Background']
@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+
+from fakes.connector_server import FakeConnectorServer
+from modules import replit_connector
+from modules.replit_connector import DEFAULT_SETTINGS_TTL, TOKEN_SAFETY_MARGIN, ReplitConnector
+
+@pytest.fixture
+def server(monkeypatch):
+    with FakeConnectorServer() as server:
+        monkeypatch.setenv('REPLIT_CONNECTORS_HOSTNAME', server.url)
+        monkeypatch.setenv('REPL_IDENTITY', 'test-identity')
+        ReplitConnector.invalidate()
+        yield server
+        ReplitConnector.invalidate()
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Virtual time for the cache; the server keeps stamping expiries off the real clock
+    now = [replit_connector.time.time()]
+
+    class Clock:
+        @staticmethod
+        def time():
+            return now[0]
+
+        @staticmethod
+        def advance(seconds):
+            now[0] += seconds
+
+    monkeypatch.setattr(replit_connector, 'time', Clock)
+    return Clock
+
+def test_settings_are_reused_until_the_safety_margin(server, clock):
+    server.expires_in = 600
+    assert ReplitConnector.get_gmail_credentials() == {'access_token': 'gmail-token-0'}
+    ReplitConnector.get_gmail_credentials()
+    assert server.requests['google-mail'] == 1
+
+    server.rotate()
+    # Still outside the margin: cached
+    clock.advance(600 - TOKEN_SAFETY_MARGIN - 5)
+    assert ReplitConnector.get_gmail_credentials() == {'access_token': 'gmail-token-0'}
+    assert server.requests['google-mail'] == 1
+
+    # Inside the margin the token is refreshed before it actually expires
+    clock.advance(10)
+    assert ReplitConnector.get_gmail_credentials() == {'access_token': 'gmail-token-1'}
+    assert server.requests['google-mail'] == 2
+
+def test_token_already_inside_the_margin_is_never_cached(server):
+    server.expires_in = TOKEN_SAFETY_MARGIN - 1
+    ReplitConnector.get_gmail_credentials()
+    ReplitConnector.get_gmail_credentials()
+    assert server.requests['google-mail'] == 2
+
+def test_settings_without_expiry_use_the_default_ttl(server, clock):
+    server.expires_in = None
+    ReplitConnector.get_twilio_credentials()
+    clock.advance(DEFAULT_SETTINGS_TTL - TOKEN_SAFETY_MARGIN - 5)
+    ReplitConnector.get_twilio_credentials()
+    assert server.requests['twilio'] == 1
+
+    clock.advance(10)
+    ReplitConnector.get_twilio_credentials()
+    assert server.requests['twilio'] == 2
+
+def test_concurrent_misses_collapse_into_one_fetch(server):
+    server.delay = 0.2
+    barrier = threading.Barrier(16)
+    tokens = []
+
+    def fetch():
+        barrier.wait()
+        tokens.append(ReplitConnector.get_gmail_credentials()['access_token'])
+
+    threads = [threading.Thread(target=fetch) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert tokens == ['gmail-token-0'] * 16
+    assert server.requests['google-mail'] == 1
+
+def test_connectors_are_cached_independently(server):
+    ReplitConnector.get_gmail_credentials()
+    ReplitConnector.get_calendar_credentials()
+    ReplitConnector.invalidate('google-mail')
+    ReplitConnector.get_gmail_credentials()
+    ReplitConnector.get_calendar_credentials()
+    assert server.requests == {'google-mail': 2, 'google-calendar': 1}
+
+def test_missing_connection_is_not_cached(server):
+    del server.connections['spotify']
+    for _ in range(2):
+        with pytest.raises(Exception, match='spotify not connected'):
+            ReplitConnector.get_spotify_credentials()
+    assert server.requests['spotify'] == 2
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from modules.vector_store import QUERY_BLOCK_ROWS, VectorStore
+
+@pytest.fixture
+def store(memory_manager, tmp_path):
+    return VectorStore(memory_manager, path=str(tmp_path / 'test.vectors'))
+
+def refs(hits):
+    return [(hit['kind'], hit['ref']) for hit in hits]
+
+def test_paraphrases_find_stored_rows(memory_manager, store):
+    memory_manager.store_memory('dentist_appointment', 'cleaning every six months', category='health')
+    memory_manager.store_memory('favourite_food', 'spicy ramen', category='preferences')
+    memory_manager.store_conversation('my sister is visiting next weekend', 'aww, you must be excited')
+
+    # Plurals and inflections share trigrams with the stored words
+    assert refs(store.search('dentists appointments', k=1)) == [('memory', 'dentist_appointment')]
+    assert refs(store.search('sister visits next weekend', k=1))[0][0] == 'conversation'
+    assert store.search('quantum chromodynamics') == []
+
+def test_index_follows_memory_writes(memory_manager, store):
+    memory_manager.store_memory('favourite_food', 'spicy ramen', category='preferences')
+    memory_manager.store_memory('calendar_sync_token', 'ramen ramen ramen', category='sync')
+    assert refs(store.search('ramen')) == [('memory', 'favourite_food')]
+
+    memory_manager.store_memory('favourite_food', 'sourdough pizza', category='preferences')
+    assert store.search('ramen') == []
+    assert refs(store.search('pizza')) == [('memory', 'favourite_food')]
+
+    memory_manager.store_memory('old_email', 'pizza coupon', category='emails')
+    memory_manager.store_memory('new_email', 'ramen coupon', category='emails')
+    memory_manager.prune_memories('emails', datetime.now() + timedelta(seconds=1))
+    assert store.search('coupon') == []
+    # Swap-removal kept the surviving row addressable
+    assert refs(store.search('pizza')) == [('memory', 'favourite_food')]
+    assert len(store) == 1
+
+def test_saved_index_is_encrypted_and_reloads(memory_manager, store, tmp_path, monkeypatch):
+    memory_manager.store_memory('favourite_food', 'spicy ramen', category='preferences')
+    assert store.save()
+    assert b'ramen' not in (tmp_path / 'test.vectors').read_bytes()
+
+    def no_rebuild(self):
+        raise AssertionError('a readable index should not be rebuilt')
+
+    monkeypatch.setattr(VectorStore, 'rebuild', no_rebuild)
+    reloaded = VectorStore(memory_manager, path=store.path)
+    assert refs(reloaded.search('ramen')) == [('memory', 'favourite_food')]
+    monkeypatch.undo()
+
+    # A torn or foreign file falls back to rebuilding from SQLite
+    (tmp_path / 'test.vectors').write_bytes(b'not a fernet token')
+    rebuilt = VectorStore(memory_manager, path=store.path)
+    assert refs(rebuilt.search('ramen')) == [('memory', 'favourite_food')]
+
+def test_budget_cuts_the_scan_but_keeps_recent_rows(store):
+    store.add_many([('conversation', 'old', 'booked the piano lesson')])
+    store.add_many([('conversation', str(i), f'weather chat number {i}') for i in range(3 * QUERY_BLOCK_ROWS)])
+    store.add_many([('conversation', 'new', 'booked the piano lesson')])
+
+    # A spent budget still scans the newest block
+    assert refs(store.search('piano lesson', k=2, budget_ms=0)) == [('conversation', 'new')]
+    full = refs(store.search('piano lesson', k=2, budget_ms=10_000))
+    assert sorted(full) == [('conversation', 'new'), ('conversation', 'old')]
+
+def test_writes_never_save_inline(memory_manager, store, monkeypatch):
+    saves = []
+    monkeypatch.setattr(store, 'save', lambda: saves.append(1))
+    for i in range(100):
+        memory_manager.store_conversation(f'question {i}', f'answer {i}')
+    assert saves == []
+    assert store.stats()['unsaved_changes'] == 100
@@ -0,0 +1,88 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from twilio.base.exceptions import TwilioRestException
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client
+from modules.replit_connector import ReplitConnector
+
+HTTP_TIMEOUT = 15
+MAX_PARALLEL_SENDS = 4
+
+class TwilioTransport:
+    # One Twilio client per process over a pooled keep-alive session. The
+    # credentials come from ReplitConnector's TTL cache on every send; when
+    # they change the Client is rebuilt on the same HTTP session, so rotated
+    # keys are picked up without dropping warm TLS connections.
+    def __init__(self, timeout=HTTP_TIMEOUT, max_workers=MAX_PARALLEL_SENDS):
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.http_client = TwilioHttpClient(pool_connections=True, timeout=timeout)
+        # Enough pooled connections for every concurrent sender
+        self.http_client.session.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=max_workers))
+        self._client = None
+        self._credentials_key = None
+        self.from_number = None
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_client(self):
+        creds = ReplitConnector.get_twilio_credentials()
+        credentials_key = (creds['account_sid'], creds['api_key'], creds['api_key_secret'])
+        with self._lock:
+            if self._client is None or credentials_key != self._credentials_key:
+                self._client = Client(
+                    creds['api_key'],
+                    creds['api_key_secret'],
+                    creds['account_sid'],
+                    http_client=self.http_client
+                )
+                self._credentials_key = credentials_key
+            self.from_number = creds.get('phone_number')
+            return self._client, self.from_number
+
+    def ensure_ready(self):
+        # Raises if the Twilio connector isn't set up; returns the sender number
+        return self._get_client()[1]
+
+    def send(self, to, body):
+        client, from_number = self._get_client()
+        try:
+            return client.messages.create(body=body, from_=from_number, to=to)
+        except TwilioRestException as e:
+            if e.status != 401:
+                raise
+            # Keys rotated under us: drop the cached settings and retry once
+            ReplitConnector.invalidate('twilio')
+            client, from_number = self._get_client()
+            return client.messages.create(body=body, from_=from_number, to=to)
+
+    def send_many(self, to, bodies):
+        # Sends concurrently over the shared pool; returns (message, error)
+        # pairs in input order so one failure never hides the others.
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='twilio-send')
+
+        def send_one(body):
+            try:
+                return self.send(to, body), None
+            except (TwilioRestException, OSError, ValueError) as e:
+                return None, e
+
+        return list(self._executor.map(send_one, bodies))
+
+_transport = None
+_transport_pid = None
+_transport_lock = threading.Lock()
+
+def get_twilio_transport():
+    # Per process: a pooled session must never be shared across a fork
+    global _transport, _transport_pid
+    with _transport_lock:
+        if _transport is None or _transport_pid != os.getpid():
+            _transport = TwilioTransport()
+            _transport_pid = os.getpid()
+        return _transport
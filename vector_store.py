@@ -0,0 +1,229 @@
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+import numpy as np
+from cryptography.fernet import InvalidToken
+
+EMBEDDING_DIM = 512
+QUERY_BLOCK_ROWS = 4096
+
+_TOKEN_RE = re.compile(r'\w+')
+
+def _features(text):
+    # Words carry most of the meaning; character trigrams of each word let
+    # "meeting"/"meetings" or small typos still land near each other.
+    words = [w.lower() for w in _TOKEN_RE.findall(text or '')]
+    for word in words:
+        yield word, 1.0
+        padded = f'<{word}>'
+        for i in range(len(padded) - 2):
+            yield padded[i:i + 3], 0.5
+    for first, second in zip(words, words[1:]):
+        yield f'{first} {second}', 0.75
+
+def embed_texts(texts, dim=EMBEDDING_DIM):
+    # Feature hashing: each feature is hashed to a column and a sign, so the
+    # embedding needs no vocabulary, no model download and no network.
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for feature, weight in _features(text):
+            digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'little')
+            matrix[row, digest % dim] += weight if digest >> 63 else -weight
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+class VectorStore:
+    # In-process cosine index over memories and conversations, kept current
+    # through MemoryManager's write listeners and persisted (encrypted with the
+    # memory key) next to the database. Each worker keeps its own copy and
+    # last writer wins on disk; a lost update only means a rebuild-worth of
+    # recall drift, never wrong data, since hits are re-read from SQLite.
+    # Writes never save: rewriting the file takes seconds at 100k rows, so
+    # the owner persists on a timer and at exit instead.
+    def __init__(self, memory_manager, path=None, dim=EMBEDDING_DIM):
+        self.memory_manager = memory_manager
+        self.path = path or os.path.splitext(memory_manager.db_path)[0] + '.vectors'
+        self.dim = dim
+        self.refs = []
+        self.positions = {}
+        self.vectors = np.zeros((256, dim), dtype=np.float32)
+        self._count = 0
+        self._dirty = 0
+        self._lock = threading.Lock()
+
+        if not self._load():
+            self.rebuild()
+        memory_manager.add_write_listener(self.on_write)
+
+    def __len__(self):
+        return self._count
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'rb') as f:
+                payload = self.memory_manager.cipher.decrypt(f.read())
+            data = np.load(io.BytesIO(payload), allow_pickle=False)
+            vectors = data['vectors']
+            refs = [tuple(ref.split(':', 1)) for ref in data['refs'].tolist()]
+        except (OSError, InvalidToken, ValueError, KeyError) as e:
+            print(f"⚠️ Vector index unreadable, rebuilding: {e}")
+            return False
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim or len(refs) != len(vectors):
+            return False
+
+        with self._lock:
+            self.vectors = np.array(vectors, dtype=np.float32)
+            self.refs = refs
+            self.positions = {ref: i for i, ref in enumerate(refs)}
+            self._count = len(refs)
+        return True
+
+    def save(self):
+        with self._lock:
+            if self._dirty == 0 and os.path.exists(self.path):
+                return False
+            vectors = self.vectors[:self._count].copy()
+            refs = np.array([f'{kind}:{ref}' for kind, ref in self.refs], dtype=str)
+            self._dirty = 0
+
+        buffer = io.BytesIO()
+        np.savez(buffer, vectors=vectors, refs=refs)
+        encrypted = self.memory_manager.cipher.encrypt(buffer.getvalue())
+
+        # Write-then-rename so a crash mid-save never leaves a torn index
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(encrypted)
+        os.replace(tmp_path, self.path)
+        return True
+
+    def rebuild(self):
+        items = []
+        for memory in self.memory_manager.iter_memories():
+            text = self.memory_manager.memory_search_text(memory['key'], memory['value'], memory['category'])
+            if text:
+                items.append(('memory', memory['key'], text))
+
+        after_id = 0
+        while True:
+            page = self.memory_manager.get_conversations_between(after_id, limit=500)
+            if not page:
+                break
+            items += [('conversation', str(c['id']), f"{c['user']} {c['bot']}") for c in page]
+            after_id = page[-1]['id']
+
+        with self._lock:
+            self.refs = []
+            self.positions = {}
+            self._count = 0
+        self.add_many(items)
+        self.save()
+        print(f"🧭 Built vector index over {len(items)} memories and conversations")
+
+    def on_write(self, kind, ref, text):
+        # Called by MemoryManager after every committed write; text is None
+        # for rows that should not be recallable.
+        if text is None:
+            self.remove(kind, ref)
+            return
+        self.add_many([(kind, str(ref), text)])
+
+    def add_many(self, items):
+        if not items:
+            return
+        for start in range(0, len(items), QUERY_BLOCK_ROWS):
+            block = items[start:start + QUERY_BLOCK_ROWS]
+            embedded = embed_texts([text for _, _, text in block], self.dim)
+            with self._lock:
+                for (kind, ref, _), vector in zip(block, embedded):
+                    self._set(kind, ref, vector)
+                self._dirty += len(block)
+
+    def _set(self, kind, ref, vector):
+        position = self.positions.get((kind, ref))
+        if position is None:
+            if self._count == len(self.vectors):
+                grown = np.zeros((max(256, len(self.vectors) * 2), self.dim), dtype=np.float32)
+                grown[:self._count] = self.vectors[:self._count]
+                self.vectors = grown
+            position = self._count
+            self._count += 1
+            self.refs.append((kind, ref))
+            self.positions[(kind, ref)] = position
+        self.vectors[position] = vector
+
+    def remove(self, kind, ref):
+        with self._lock:
+            position = self.positions.pop((kind, str(ref)), None)
+            if position is None:
+                return
+            # Swap the last row into the hole to keep the matrix dense
+            last = self._count - 1
+            if position != last:
+                self.vectors[position] = self.vectors[last]
+                moved = self.refs[last]
+                self.refs[position] = moved
+                self.positions[moved] = position
+            self.refs.pop()
+            self._count -= 1
+            self._dirty += 1
+
+    def search(self, text, k=5, budget_ms=25, min_score=0.2, exclude=()):
+        # Scans the matrix in blocks and stops once the latency budget is
+        # spent, returning the best hits seen so far: recall degrades
+        # gracefully instead of delaying the chat reply.
+        deadline = time.perf_counter() + budget_ms / 1000
+        query = embed_texts([text], self.dim)[0]
+        if not query.any():
+            return []
+        excluded = set(exclude)
+
+        with self._lock:
+            vectors = self.vectors
+            refs = list(self.refs)
+            count = self._count
+
+        best_scores = np.empty(0, dtype=np.float32)
+        best_rows = np.empty(0, dtype=np.int64)
+        scanned = 0
+        # Newest rows first, so a cut-off scan still covers recent history
+        for end in range(count, 0, -QUERY_BLOCK_ROWS):
+            start = max(0, end - QUERY_BLOCK_ROWS)
+            scores = vectors[start:end] @ query
+            best_scores = np.concatenate([best_scores, scores])
+            best_rows = np.concatenate([best_rows, np.arange(start, end)])
+            if len(best_scores) > k + len(excluded):
+                keep = np.argpartition(-best_scores, k + len(excluded))[:k + len(excluded)]
+                best_scores, best_rows = best_scores[keep], best_rows[keep]
+            scanned = count - start
+            if time.perf_counter() > deadline:
+                break
+
+        hits = []
+        for i in np.argsort(-best_scores):
+            if best_scores[i] < min_score:
+                break
+            kind, ref = refs[best_rows[i]]
+            if (kind, ref) in excluded:
+                continue
+            hits.append({'kind': kind, 'ref': ref, 'score': round(float(best_scores[i]), 3)})
+            if len(hits) == k:
+                break
+        if scanned < count:
+            print(f"⏱️ Vector recall hit its {budget_ms}ms budget after {scanned}/{count} rows")
+        return hits
+
+    def stats(self):
+        with self._lock:
+            return {
+                'items': self._count,
+                'dim': self.dim,
+                'unsaved_changes': self._dirty,
+                'bytes': int(self._count * self.dim * 4)
+            }
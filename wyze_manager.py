@@ -47,17 +47,27 @@ class WyzeManager:
         except Exception as e:
             return {'error': str(e)}
     
-    def simulate_motion_event(self, camera_name='Front Door'):
-        if self.ai_brain and self.notification_manager:
-            decision = self.ai_brain.analyze_camera_event(
-                camera_name,
-                'motion_detected',
-                datetime.now().strftime('%I:%M %p')
-            )
-            
+    def handle_motion_events(self, events):
+        # events: [(camera_name, event_type, timestamp), ...]; decisions fan out concurrently
+        if not (self.ai_brain and self.notification_manager) or not events:
+            return []
+        
+        results = []
+        for (camera_name, _, _), decision in zip(events, self.ai_brain.analyze_camera_events(events)):
             if decision.get('alert', False):
                 message = decision.get('message', f'📹 Motion detected on {camera_name}!')
                 self.notification_manager.send_notification(message)
-                return {'alerted': True, 'message': message}
+                results.append({'camera': camera_name, 'alerted': True, 'message': message})
+            else:
+                results.append({'camera': camera_name, 'alerted': False})
+        return results
+    
+    def simulate_motion_event(self, camera_name='Front Door'):
+        results = self.handle_motion_events([
+            (camera_name, 'motion_detected', datetime.now().strftime('%I:%M %p'))
+        ])
+        
+        if results and results[0]['alerted']:
+            return {'alerted': True, 'message': results[0]['message']}
         
         return {'alerted': False, 'message': 'Wyze camera monitoring active'}